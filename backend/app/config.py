@@ -7,7 +7,123 @@ class Settings:
     SUPABASE_URL = os.getenv("SUPABASE_URL")
     SUPABASE_KEY = os.getenv("SUPABASE_KEY")
     JWT_SECRET = os.getenv("JWT_SECRET", "super-secret-key")
+    # Verified JWT claims kept in memory (LRU, until each token expires)
+    TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+    # Users table: supabase:// (REST client), postgres://... (asyncpg pool) or sqlite:///users.db
+    USERS_DB_URL = os.getenv("USERS_DB_URL", "supabase://")
+    USERS_DB_POOL_MIN = int(os.getenv("USERS_DB_POOL_MIN", "1"))
+    USERS_DB_POOL_MAX = int(os.getenv("USERS_DB_POOL_MAX", "10"))
+    # Prepared statements cached per connection; 0 behind a transaction-mode pooler
+    USERS_DB_STATEMENT_CACHE = int(os.getenv("USERS_DB_STATEMENT_CACHE", "100"))
+    # POST /entitlements (for the payment system: grant or revoke paid access) needs
+    # "Authorization: Bearer <ENTITLEMENTS_TOKEN>"; the endpoint is off while it is empty
+    ENTITLEMENTS_TOKEN = os.getenv("ENTITLEMENTS_TOKEN", "")
+    # Password hashing: bcrypt cost (hashes with another cost are redone at login), worker
+    # processes, and how many hash/verify calls may be in flight before logins get a 503
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", "2"))
+    BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", "64"))
     YT_CLIENT_SECRETS_PATH = os.getenv("YT_CLIENT_SECRETS_PATH", "client_secrets.json")
+    YT_TOKEN_PATH = os.getenv("YT_TOKEN_PATH", "token.json")
+    # Refresh the YouTube access token this many seconds before it expires
+    YT_TOKEN_REFRESH_MARGIN = int(os.getenv("YT_TOKEN_REFRESH_MARGIN", "300"))
+    # YouTube Data API endpoint; point it at a local stand-in (backend/benchmarks/youtube_standin.py)
+    # with YT_AUTH_DISABLED=1 to run without Google credentials or quota
+    YOUTUBE_API_BASE_URL = os.getenv("YOUTUBE_API_BASE_URL", "https://www.googleapis.com/youtube/v3")
+    YT_AUTH_DISABLED = os.getenv("YT_AUTH_DISABLED", "").lower() in ("1", "true", "yes")
+    YT_HTTP_TIMEOUT = float(os.getenv("YT_HTTP_TIMEOUT", "30"))
+    YT_MAX_CONNECTIONS = int(os.getenv("YT_MAX_CONNECTIONS", "20"))
+    # Retries on 429/5xx: exponential backoff with full jitter, capped at YT_BACKOFF_CAP seconds
+    YT_MAX_RETRIES = int(os.getenv("YT_MAX_RETRIES", "4"))
+    YT_BACKOFF_BASE = float(os.getenv("YT_BACKOFF_BASE", "0.5"))
+    YT_BACKOFF_CAP = float(os.getenv("YT_BACKOFF_CAP", "20"))
+    # Parallel inserts per POST /broadcasts/batch request
+    YT_BATCH_CONCURRENCY = int(os.getenv("YT_BATCH_CONCURRENCY", "5"))
+    # Daily YouTube Data API quota (units) and how much of it background work must leave alone
+    YT_DAILY_QUOTA = int(os.getenv("YT_DAILY_QUOTA", "10000"))
+    YT_QUOTA_ADMIN_RESERVE = int(os.getenv("YT_QUOTA_ADMIN_RESERVE", "1000"))
+    YT_QUOTA_REFRESH_RESERVE = int(os.getenv("YT_QUOTA_REFRESH_RESERVE", "500"))
+    # Circuit breaker: fail fast for YT_BREAKER_RESET seconds after this many consecutive failures
+    YT_BREAKER_THRESHOLD = int(os.getenv("YT_BREAKER_THRESHOLD", "5"))
+    YT_BREAKER_RESET = float(os.getenv("YT_BREAKER_RESET", "30"))
+    # /broadcasts listing: served fresh for TTL seconds, then stale (while refreshing) up to STALE_TTL
+    BROADCAST_CACHE_TTL = float(os.getenv("BROADCAST_CACHE_TTL", "30"))
+    BROADCAST_CACHE_STALE_TTL = float(os.getenv("BROADCAST_CACHE_STALE_TTL", "300"))
+    # Broadcast listing: page size per YouTube call, pages buffered while streaming
+    BROADCAST_PAGE_SIZE = int(os.getenv("BROADCAST_PAGE_SIZE", "50"))
+    BROADCAST_STREAM_QUEUE = int(os.getenv("BROADCAST_STREAM_QUEUE", "4"))
+    # Live tracker poll intervals (seconds) and how early before a scheduled start to poll fast
+    LIVE_POLL_FAST = float(os.getenv("LIVE_POLL_FAST", "5"))
+    LIVE_POLL_ACTIVE = float(os.getenv("LIVE_POLL_ACTIVE", "30"))
+    LIVE_POLL_IDLE = float(os.getenv("LIVE_POLL_IDLE", "120"))
+    LIVE_SOON_WINDOW = float(os.getenv("LIVE_SOON_WINDOW", "600"))
+    # WebSocket fan-out: per-client queue length, send timeout (s), overflows in a row before disconnect
+    SCORE_SEND_QUEUE = int(os.getenv("SCORE_SEND_QUEUE", "4"))
+    # Score deltas kept for clients resuming with ?since=N
+    SCORE_BACKLOG = int(os.getenv("SCORE_BACKLOG", "256"))
+    # Per-broadcast scoreboards: drop a room after this many idle seconds, cap on live rooms
+    SCORE_ROOM_IDLE_TTL = float(os.getenv("SCORE_ROOM_IDLE_TTL", "3600"))
+    SCORE_MAX_ROOMS = int(os.getenv("SCORE_MAX_ROOMS", "200"))
+    # Largest score change (either sign) one update may make
+    SCORE_MAX_POINTS = int(os.getenv("SCORE_MAX_POINTS", "1000"))
+    # Scoreboard persistence: "" (off), sqlite:///scoreboards.db or supabase://; dirty boards are
+    # written every SCORE_FLUSH_INTERVAL s in upserts of up to SCORE_FLUSH_BATCH rows
+    SCORE_STORE_URL = os.getenv("SCORE_STORE_URL", "sqlite:///scoreboards.db")
+    SCORE_FLUSH_INTERVAL = float(os.getenv("SCORE_FLUSH_INTERVAL", "1"))
+    SCORE_FLUSH_BATCH = int(os.getenv("SCORE_FLUSH_BATCH", "100"))
+    SCORE_FLUSH_TIMEOUT = float(os.getenv("SCORE_FLUSH_TIMEOUT", "5"))
+    # Per-game score event logs (memory-mapped, append-only); "" disables them
+    SCORE_LOG_DIR = os.getenv("SCORE_LOG_DIR", "score_logs")
+    SCORE_LOG_CHUNK = int(os.getenv("SCORE_LOG_CHUNK", "65536"))
+    SCORE_LOG_CHECKPOINT = int(os.getenv("SCORE_LOG_CHECKPOINT", "1024"))
+    # When an idle game's log is closed, changes older than this many seconds are squashed
+    # into one record per field (its value at that point); 0 keeps every change forever
+    SCORE_LOG_KEEP_DETAIL = float(os.getenv("SCORE_LOG_KEEP_DETAIL", "604800"))
+    # Chat: messages are batched into one frame per CHAT_FRAME_MS (or CHAT_FRAME_MAX messages)
+    CHAT_FRAME_MS = float(os.getenv("CHAT_FRAME_MS", "75"))
+    CHAT_FRAME_MAX = int(os.getenv("CHAT_FRAME_MAX", "200"))
+    CHAT_SEND_QUEUE = int(os.getenv("CHAT_SEND_QUEUE", "32"))
+    CHAT_MAX_MESSAGE_CHARS = int(os.getenv("CHAT_MAX_MESSAGE_CHARS", "500"))
+    # Chat history: last CHAT_HISTORY_SIZE messages per room (for at most CHAT_HISTORY_ROOMS
+    # rooms per worker); CHAT_REPLAY_COUNT of them are replayed to sockets that join
+    CHAT_HISTORY_SIZE = int(os.getenv("CHAT_HISTORY_SIZE", "500"))
+    CHAT_HISTORY_ROOMS = int(os.getenv("CHAT_HISTORY_ROOMS", "200"))
+    CHAT_REPLAY_COUNT = int(os.getenv("CHAT_REPLAY_COUNT", "50"))
+    CHAT_HISTORY_PAGE_MAX = int(os.getenv("CHAT_HISTORY_PAGE_MAX", "100"))
+    WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "5"))
+    WS_MAX_STRIKES = int(os.getenv("WS_MAX_STRIKES", "50"))
+    # Inbound flood control, in messages/s and burst size, per socket and per client (all its sockets);
+    # a socket is closed after WS_FLOOD_MAX_STRIKES messages over the limit in a row
+    CHAT_RATE = float(os.getenv("CHAT_RATE", "2"))
+    CHAT_BURST = float(os.getenv("CHAT_BURST", "5"))
+    CHAT_CLIENT_RATE = float(os.getenv("CHAT_CLIENT_RATE", "5"))
+    CHAT_CLIENT_BURST = float(os.getenv("CHAT_CLIENT_BURST", "10"))
+    SCORE_WS_RATE = float(os.getenv("SCORE_WS_RATE", "1"))
+    SCORE_WS_BURST = float(os.getenv("SCORE_WS_BURST", "5"))
+    SCORE_WS_CLIENT_RATE = float(os.getenv("SCORE_WS_CLIENT_RATE", "5"))
+    SCORE_WS_CLIENT_BURST = float(os.getenv("SCORE_WS_CLIENT_BURST", "20"))
+    WS_FLOOD_MAX_STRIKES = int(os.getenv("WS_FLOOD_MAX_STRIKES", "20"))
+    # Logging: LOG_LEVEL for everything, LOG_LEVELS to override per subsystem
+    # ("chat=WARNING,score=DEBUG"), LOG_FORMAT json or text. Records go through a queue of
+    # LOG_QUEUE_SIZE to a writer thread; each call site may log LOG_SAMPLE_RATE/s
+    # (bursts of LOG_SAMPLE_BURST) before it is sampled, 0 turns sampling off
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "20"))
+    LOG_SAMPLE_BURST = float(os.getenv("LOG_SAMPLE_BURST", "50"))
+    # /metrics (Prometheus text format, per worker). Scrapers must send "Authorization:
+    # Bearer <METRICS_TOKEN>"; without a token it is refused unless METRICS_PUBLIC is set
+    # (e.g. when only a private network can reach the app)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+    METRICS_PUBLIC = os.getenv("METRICS_PUBLIC", "false").lower() in ("1", "true", "yes")
+    # ws_active_connections labels the busiest rooms by name; the rest are summed as room="_other"
+    METRICS_ROOM_LABELS = int(os.getenv("METRICS_ROOM_LABELS", "20"))
+    # Cross-worker state/pub-sub: memory:// (single worker) or redis://host:6379/0
+    BROKER_URL = os.getenv("BROKER_URL", "memory://")
+    BROKER_PREFIX = os.getenv("BROKER_PREFIX", "livestream:")
     FRONTEND_ORIGIN = os.getenv("FRONTEND_ORIGIN", "http://localhost:3000")
 
 settings = Settings()
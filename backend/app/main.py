@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -9,14 +10,54 @@ from backend.app.routers import broadcasts
 from backend.app.ws.scoreboard import router as scoreboard_router
 from backend.app.ws.chat import router as chat_router
 from backend.app.routers.auth import router as auth_router
+from backend.app.routers.metrics import router as metrics_router
+from services.live_tracker import live_tracker
+from services.youtube_async import youtube_api
+from ws.score_rooms import score_rooms
+from ws.chat_rooms import chat_hub
+from services.broker import broker
+from ws.score_persistence import score_writer
+from ws.score_log import score_logs
+from services.password_hasher import password_hasher
+from services.user_repository import user_repository
+from services.entitlements import entitlements
+from services.metrics import MetricsMiddleware
+from services.log import setup_logging
 
+# Before anything logs: app and uvicorn loggers write through a background thread
+setup_logging()
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await broker.start()
+    await score_writer.start()
+    live_tracker.start()
+    score_rooms.start()
+    chat_hub.start()
+    password_hasher.start()
+    await user_repository.start()
+    await entitlements.start()
+    yield
+    await entitlements.stop()
+    await user_repository.close()
+    password_hasher.stop()
+    await chat_hub.stop()
+    await score_rooms.stop()
+    await score_writer.stop()
+    await score_logs.close()
+    await live_tracker.stop()
+    await broker.close()
+    await youtube_api.aclose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(chat_router)
 app.include_router(scoreboard_router)
 app.include_router(auth_router)
 app.include_router(broadcasts.router)
+app.include_router(metrics_router)
 
 app.add_middleware(
     CORSMiddleware,
@@ -25,3 +66,6 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+
+# Outermost, so the recorded latency includes every other middleware
+app.add_middleware(MetricsMiddleware)
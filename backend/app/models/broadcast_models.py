@@ -1,6 +1,6 @@
 ### models/broadcast_models.py
-from pydantic import BaseModel, StringConstraints
-from typing import Annotated, Optional
+from pydantic import BaseModel, Field, StringConstraints
+from typing import Annotated, List, Optional
 
 class BroadcastRequest(BaseModel):
     title: Annotated[str, StringConstraints(min_length=1)]
@@ -15,4 +15,19 @@ class BroadcastResponse(BaseModel):
     description: Optional[str]= ""
     date: str
     time: str
-    url: str
\ No newline at end of file
+    url: str
+
+class BroadcastBatchRequest(BaseModel):
+    items: Annotated[List[BroadcastRequest], Field(min_length=1, max_length=500)]
+
+class BroadcastBatchItemResult(BaseModel):
+    index: int
+    ok: bool
+    broadcast: Optional[BroadcastResponse] = None
+    error: Optional[str] = None
+    status: Optional[int] = None  # HTTP status the item would have failed with on its own
+
+class BroadcastBatchResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[BroadcastBatchItemResult]
\ No newline at end of file
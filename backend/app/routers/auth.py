@@ -1,20 +1,20 @@
 # auth.py
 
-from fastapi import APIRouter, HTTPException, Depends
+import hmac
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Header
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
 from config import settings
-import bcrypt
-import os
-from supabase import create_client
 from services.auth_utils import create_access_token, verify_token
-
+from services.entitlements import entitlements
+from services.log import get_logger
+from services.password_hasher import password_hasher, HasherBusyError
+from services.user_repository import user_repository
 
 router = APIRouter()
+logger = get_logger("auth")
 
-url = settings.SUPABASE_URL
-key = settings.SUPABASE_KEY
-supabase = create_client(url, key)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
 class UserCreate(BaseModel):
@@ -26,38 +26,57 @@ class UserLogin(BaseModel):
     email: str
     password: str
 
+class EntitlementChange(BaseModel):
+    user_id: int
+    broadcast_id: Optional[str] = None  # None: every broadcast (users.pay_status)
+    granted: bool
+
 def get_current_user(token: str = Depends(oauth2_scheme)):
     payload = verify_token(token)
     if not payload:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
     return payload
 
-@router.post("/register")
-def register(user: UserCreate):
-    hashed_pw = bcrypt.hashpw(user.password.encode(), bcrypt.gensalt()).decode()
+def _busy(e: HasherBusyError):
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
 
-    existing = supabase.table("users").select("*").eq("email", user.email).execute()
-    if existing.data:
-        raise HTTPException(status_code=400, detail="Email already registered")
+async def _rehash(user_id, password: str):
+    """Re-hash a password made with an old cost; runs after the login response."""
+    try:
+        new_hash = await password_hasher.hash(password)
+        await user_repository.update_password_hash(user_id, new_hash)
+    except Exception as e:
+        logger.warning("Rehash for user %s failed: %r", user_id, e)
 
-    result = supabase.table("users").insert({
-        "email": user.email,
-        "password_hash": hashed_pw,
-        "name": user.name
-    }).execute()
+@router.post("/register")
+async def register(user: UserCreate):
+    # bcrypt runs on the hasher's process pool
+    try:
+        hashed_pw = await password_hasher.hash(user.password)
+    except HasherBusyError as e:
+        raise _busy(e)
+
+    # Insert-unless-exists in one call
+    user_id = await user_repository.create(user.email, hashed_pw, user.name)
+    if user_id is None:
+        raise HTTPException(status_code=400, detail="Email already registered")
 
-    return {"message": "User registered", "id": result.data[0]["id"]}
+    return {"message": "User registered", "id": user_id}
 
 @router.post("/login")
-def login(user: UserLogin):
-    result = supabase.table("users").select("*").eq("email", user.email).execute()
-
-    if not result.data:
+async def login(user: UserLogin, background_tasks: BackgroundTasks):
+    db_user = await user_repository.get_login(user.email)
+    if db_user is None:
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
-    db_user = result.data[0]
-    if not bcrypt.checkpw(user.password.encode(), db_user["password_hash"].encode()):
+    try:
+        valid = await password_hasher.verify(user.password, db_user["password_hash"])
+    except HasherBusyError as e:
+        raise _busy(e)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid email or password")
+    if password_hasher.needs_rehash(db_user["password_hash"]):
+        background_tasks.add_task(_rehash, db_user["id"], user.password)
 
     token = create_access_token({
         "id": db_user["id"],
@@ -67,6 +86,25 @@ def login(user: UserLogin):
 
     return {"access_token": token, "token_type": "bearer"}
 
+@router.get("/access/{broadcast_id}")
+async def check_access(broadcast_id: str, current_user: dict = Depends(get_current_user)):
+    # In-memory lookup, kept current by payment events; the token's pay_status may be stale
+    return {"broadcast_id": broadcast_id, "allowed": entitlements.can_watch(current_user["id"], broadcast_id)}
+
+@router.post("/entitlements", include_in_schema=False)
+async def change_entitlement(change: EntitlementChange, authorization: str = Header("")):
+    """Called by the payment system when access is bought, refunded or expires."""
+    if not settings.ENTITLEMENTS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    # Bytes: compare_digest refuses str with non-ASCII characters, which a header can carry
+    if not hmac.compare_digest(authorization.encode(), f"Bearer {settings.ENTITLEMENTS_TOKEN}".encode()):
+        raise HTTPException(status_code=401, detail="Invalid entitlements token")
+    if change.granted:
+        await entitlements.grant(change.user_id, change.broadcast_id)
+    else:
+        await entitlements.revoke(change.user_id, change.broadcast_id)
+    return change
+
 @router.get("/me")
 def get_my_info(current_user: dict = Depends(get_current_user)):
     return current_user
@@ -1,58 +1,136 @@
 ### routers/broadcasts.py
 
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import PlainTextResponse
+import asyncio
+import json
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from typing import List
 from datetime import datetime
-from models.broadcast_models import BroadcastRequest, BroadcastResponse
+from models.broadcast_models import (
+    BroadcastRequest,
+    BroadcastResponse,
+    BroadcastBatchRequest,
+    BroadcastBatchItemResult,
+    BroadcastBatchResponse
+)
+from helpers.time_utils import build_scheduled_start_utc
+from config import settings
 from services.youtube_utils import (
-    schedule_broadcast,
-    get_scheduled_broadcasts,
+    create_broadcast as youtube_create_broadcast,
     update_broadcast as youtube_update_broadcast,
     delete_broadcast as youtube_delete_broadcast,
-    get_current_broadcast
+    iter_broadcasts,
+    api_error,
+    BROADCAST_STATUSES
 )
+from services.broadcast_cache import broadcast_cache
+from services.live_tracker import live_tracker
+from services.youtube_quota import quota_meter
 
 router = APIRouter()
 
 @router.get("/broadcasts", response_model=List[BroadcastResponse])
-def list_broadcasts():
+async def list_broadcasts():
     try:
-        broadcasts = get_scheduled_broadcasts()
-        return broadcasts
+        return await broadcast_cache.get()
     except Exception as e:
-        raise HTTPException(status_code=500, detail="Failed to fetch broadcasts")
+        # Keeps 429/503 and their Retry-After instead of flattening them into a 500
+        raise api_error(e, "Failed to fetch broadcasts")
+
+@router.get("/broadcasts/stream")
+async def stream_broadcasts(status: List[str] = Query(default=list(BROADCAST_STATUSES))):
+    """Every broadcast in the given status sets, one JSON object per line, as pages arrive."""
+    invalid = [s for s in status if s not in BROADCAST_STATUSES]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid status: {', '.join(invalid)}")
+
+    async def ndjson():
+        try:
+            async for row in iter_broadcasts(tuple(dict.fromkeys(status))):
+                yield json.dumps(row) + "\n"
+        except Exception as e:
+            # Headers are already sent, so report the failure (and its status) in-band
+            error = api_error(e, "Failed to fetch broadcasts")
+            yield json.dumps({"error": error.detail, "status": error.status_code}) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
 
 @router.post("/broadcast", response_model=BroadcastResponse)
-def create_broadcast(request: BroadcastRequest):
+async def create_broadcast(request: BroadcastRequest):
     try:
-        broadcast_id, youtube_url = schedule_broadcast(
-            title=request.title,
-            month=request.month,
-            day=request.day,
-            time_str=request.time,
-            description=request.description
+        scheduled_start = build_scheduled_start_utc(request.month, request.day, request.time)
+        broadcast_id, youtube_url = await youtube_create_broadcast(
+            request.title, scheduled_start, request.description
         )
 
         if not broadcast_id:
             raise HTTPException(status_code=500, detail="Broadcast creation failed")
 
-        year = datetime.utcnow().year
-        date_str = f"{year}-{request.month:02d}-{request.day:02d}"
-
-        return BroadcastResponse(
+        # Same UTC date/time as the batch path and the YouTube listing, so the
+        # cached row doesn't change when the next refresh replaces it
+        response = BroadcastResponse(
             id=broadcast_id,
             title=request.title,
             description=request.description,
-            date=date_str,
-            time=request.time,
+            date=scheduled_start.strftime("%Y-%m-%d"),
+            time=scheduled_start.strftime("%H:%M"),
             url=youtube_url
         )
+        broadcast_cache.upsert({**response.model_dump(), "status": "created"})
+        return response
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date/time: {e}")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise api_error(e, "Broadcast creation failed")
+
+@router.post("/broadcasts/batch", response_model=BroadcastBatchResponse)
+async def create_broadcasts_batch(batch: BroadcastBatchRequest):
+    """
+    Schedule many broadcasts in one request. Every item is validated before anything
+    is sent upstream; valid ones are inserted with bounded concurrency (the YouTube
+    client still applies quota checks and backoff per call). Results are per item.
+    """
+    results = [None] * len(batch.items)
+    valid = []
+    for index, item in enumerate(batch.items):
+        try:
+            valid.append((index, item, build_scheduled_start_utc(item.month, item.day, item.time)))
+        except ValueError as e:
+            results[index] = BroadcastBatchItemResult(index=index, ok=False, error=f"Invalid date/time: {e}",
+                                                      status=400)
+
+    semaphore = asyncio.Semaphore(settings.YT_BATCH_CONCURRENCY)
+
+    async def insert(index, item, scheduled_start):
+        async with semaphore:
+            try:
+                broadcast_id, youtube_url = await youtube_create_broadcast(
+                    item.title, scheduled_start, item.description
+                )
+            except Exception as e:
+                error = api_error(e, "Broadcast creation failed")
+                return BroadcastBatchItemResult(index=index, ok=False, error=str(error.detail),
+                                                status=error.status_code)
+
+        broadcast = BroadcastResponse(
+            id=broadcast_id,
+            title=item.title,
+            description=item.description,
+            date=scheduled_start.strftime("%Y-%m-%d"),
+            time=scheduled_start.strftime("%H:%M"),
+            url=youtube_url
+        )
+        broadcast_cache.upsert({**broadcast.model_dump(), "status": "created"})
+        return BroadcastBatchItemResult(index=index, ok=True, broadcast=broadcast)
+
+    for result in await asyncio.gather(*(insert(*v) for v in valid)):
+        results[result.index] = result
+
+    created = sum(1 for r in results if r.ok)
+    return BroadcastBatchResponse(created=created, failed=len(results) - created, results=results)
 
 @router.put("/broadcast/{broadcast_id}", response_model=BroadcastResponse)
-def update_broadcast(broadcast_id: str, request: BroadcastRequest):
+async def update_broadcast(broadcast_id: str, request: BroadcastRequest):
     try:
         year = datetime.utcnow().year
         scheduled_start = datetime(
@@ -63,7 +141,7 @@ def update_broadcast(broadcast_id: str, request: BroadcastRequest):
             minute=int(request.time.split(":")[1])
         )
 
-        updated = youtube_update_broadcast(
+        updated = await youtube_update_broadcast(
             broadcast_id=broadcast_id,
             title=request.title,
             scheduled_start=scheduled_start
@@ -72,24 +150,34 @@ def update_broadcast(broadcast_id: str, request: BroadcastRequest):
         if not updated:
             raise HTTPException(status_code=500, detail="Failed to update broadcast")
 
+        broadcast_cache.upsert(updated)
         return updated
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date/time: {e}")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise api_error(e, "Failed to update broadcast")
 
 @router.delete("/broadcast/{broadcast_id}")
-def delete_broadcast(broadcast_id: str):
+async def delete_broadcast(broadcast_id: str):
     try:
-        success = youtube_delete_broadcast(broadcast_id)
+        success = await youtube_delete_broadcast(broadcast_id)
         if not success:
             raise HTTPException(status_code=500, detail="Failed to delete broadcast")
+        broadcast_cache.remove(broadcast_id)
         return {"message": "Broadcast deleted successfully"}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise api_error(e, "Failed to delete broadcast")
 
 @router.get("/live_url", response_class=PlainTextResponse)
-def get_live_url():
-    try:
-        current = get_current_broadcast()
-        return current["url"] if current else "No livestream available."
-    except Exception as e:
-        raise HTTPException(status_code=500, detail="Failed to retrieve livestream URL")
+async def get_live_url():
+    # Served from the live tracker's in-memory state, no YouTube call here
+    return live_tracker.live_url or "No livestream available."
+
+@router.get("/live_status")
+async def get_live_status():
+    return live_tracker.state
+
+@router.get("/youtube/quota")
+async def get_youtube_quota():
+    await quota_meter.sync()
+    return quota_meter.snapshot()
@@ -0,0 +1,88 @@
+# metrics.py
+
+import hmac
+from fastapi import APIRouter, HTTPException, Request, Response
+from config import settings
+from services.auth_utils import token_cache
+from services.broadcast_cache import broadcast_cache
+from services.log import dropped_records
+from services.metrics import Collected, REGISTRY
+from services.password_hasher import password_hasher
+from services.youtube_async import youtube_api
+from services.youtube_quota import quota_meter
+from ws import flood
+from ws.chat_rooms import chat_hub
+from ws.fanout import retired_counts
+from ws.score_persistence import score_writer
+from ws.score_rooms import score_rooms
+
+router = APIRouter()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Everything below is read from counters the components already keep, at scrape
+# time only, so it costs nothing on the paths that update them.
+
+def _ws_connections():
+    # A series per room would grow with the number of rooms: only the busiest get one
+    samples = [(("score", name), len(room.clients)) for name, room in list(score_rooms.rooms.items())
+               if len(room.clients)]
+    samples += [(("chat", name), len(room.clients)) for name, room in list(chat_hub.rooms.items())
+                if len(room.clients)]
+    samples.sort(key=lambda sample: sample[1], reverse=True)
+    other = {}
+    for (endpoint, _), count in samples[settings.METRICS_ROOM_LABELS:]:
+        other[endpoint] = other.get(endpoint, 0) + count
+    return samples[:settings.METRICS_ROOM_LABELS] + [((endpoint, "_other"), count) for endpoint, count in other.items()]
+
+def _fanout_counts(index: int):
+    """Retired rooms' totals plus the live rooms' own counters ([dropped, disconnected][index])."""
+    totals = {kind: counts[index] for kind, counts in retired_counts.items()}
+    for kind, rooms in (("score", score_rooms.rooms), ("chat", chat_hub.rooms)):
+        for room in list(rooms.values()):
+            totals[kind] = totals.get(kind, 0) + (room.clients.dropped, room.clients.disconnected)[index]
+    return [((kind,), value) for kind, value in totals.items()]
+
+Collected("ws_active_connections", "Open WebSockets on this worker by endpoint and room",
+          "gauge", _ws_connections, labels=("endpoint", "room"))
+Collected("fanout_dropped_messages_total", "Messages a slow subscriber never got", "counter",
+          lambda: _fanout_counts(0), labels=("kind",))
+Collected("fanout_disconnected_total", "Subscribers disconnected for falling behind or failing sends",
+          "counter", lambda: _fanout_counts(1), labels=("kind",))
+Collected("token_cache_requests_total", "Verified-token cache lookups", "counter",
+          lambda: [(("hit",), token_cache.hits), (("miss",), token_cache.misses)], labels=("result",))
+Collected("broadcast_cache_requests_total", "Broadcast listing cache lookups (stale = served while refreshing)",
+          "counter", lambda: [(("hit",), broadcast_cache.hits), (("stale",), broadcast_cache.stale_hits),
+                              (("miss",), broadcast_cache.misses)], labels=("result",))
+Collected("ws_flood_messages_total", "Inbound WebSocket messages checked by flood control", "counter",
+          lambda: [((g.name, r), getattr(g, r)) for g in flood.guards for r in ("admitted", "shed")],
+          labels=("endpoint", "result"))
+Collected("ws_flood_disconnects_total", "Sockets closed for flooding", "counter",
+          lambda: [((g.name,), g.disconnected) for g in flood.guards], labels=("endpoint",))
+Collected("bcrypt_pending", "bcrypt jobs queued or running", "gauge",
+          lambda: [((), password_hasher.pending)])
+Collected("bcrypt_rejected_total", "Logins turned away because the bcrypt pool was full", "counter",
+          lambda: [((), password_hasher.rejected)])
+Collected("youtube_quota_used", "YouTube quota units used today", "gauge",
+          lambda: [((), quota_meter.used)])
+Collected("youtube_breaker_open", "1 while the YouTube circuit breaker is open", "gauge",
+          lambda: [((), int(youtube_api.breaker.state == "open"))])
+Collected("log_records_dropped_total", "Log records dropped because the log queue was full", "counter",
+          lambda: [((), dropped_records())])
+Collected("score_store_rows_written_total", "Scoreboard rows persisted by the write-behind", "counter",
+          lambda: [((), score_writer.rows_written)])
+Collected("score_store_failures_total", "Failed scoreboard flush batches", "counter",
+          lambda: [((), score_writer.failures)])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        if not hmac.compare_digest(request.headers.get("authorization", ""), expected):
+            raise HTTPException(status_code=401, detail="Invalid metrics token")
+    elif not settings.METRICS_PUBLIC:
+        raise HTTPException(status_code=403, detail="Set METRICS_TOKEN (or METRICS_PUBLIC=true) to serve metrics")
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -1,5 +1,8 @@
 # auth_utils.py
 
+import hashlib
+import time
+from collections import OrderedDict
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from config import settings
@@ -17,8 +20,51 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+class TokenCache:
+    """
+    LRU of verified token claims, keyed by the token's SHA-256 so raw tokens aren't
+    kept around. Entries are only served until the token's own `exp`; failed
+    verifications are never cached.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries = OrderedDict()  # digest -> (claims, exp)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, digest: bytes):
+        entry = self._entries.get(digest)
+        if entry is None:
+            self.misses += 1
+            return None
+        claims, exp = entry
+        if exp is not None and exp <= time.time():
+            del self._entries[digest]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(digest)
+        self.hits += 1
+        return claims
+
+    def put(self, digest: bytes, claims: dict):
+        self._entries[digest] = (claims, claims.get("exp"))
+        self._entries.move_to_end(digest)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE_SIZE)
+
 def verify_token(token: str):
+    """Claims of a valid token, else None. Treat the returned dict as read-only: it is shared."""
+    digest = hashlib.sha256(token.encode()).digest()
+    claims = token_cache.get(digest)
+    if claims is not None:
+        return claims
     try:
-        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
         return None
+    token_cache.put(digest, claims)
+    return claims
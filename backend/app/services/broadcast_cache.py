@@ -0,0 +1,128 @@
+# broadcast_cache.py
+
+import asyncio
+import time
+from config import settings
+from services.log import get_logger
+from services.youtube_utils import get_scheduled_broadcasts
+from services.youtube_quota import Priority, quota_priority
+
+logger = get_logger("cache")
+
+
+class BroadcastCache:
+    """
+    TTL cache for the scheduled broadcast listing.
+
+    - fresh (age < ttl): served straight from memory
+    - stale (age < stale_ttl): served from memory while one background refresh runs
+    - miss / expired: concurrent callers await a single upstream call
+
+    Admin writes patch the cached list in place (copy-on-write), so edits show up
+    right away without another upstream call. Writes made while a load is running
+    are replayed onto its result, which may have been read before they landed.
+    """
+
+    def __init__(self, loader, ttl: float, stale_ttl: float):
+        self.loader = loader
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self._value = None
+        self._loaded_at = 0.0
+        self._generation = 0
+        self._inflight = None  # asyncio.Task while a load is running
+        self._writes = []      # admin writes made during that load, replayed onto its result
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    async def get(self):
+        age = time.monotonic() - self._loaded_at
+        if self._value is not None and age < self.ttl:
+            self.hits += 1
+            return self._value
+        if self._value is not None and age < self.stale_ttl:
+            self.stale_hits += 1
+            if self._inflight is None:
+                self._start_load()
+            return self._value
+
+        self.misses += 1
+        # Loop: a load that an invalidate() overtook stores nothing
+        while True:
+            if self._inflight is None:
+                self._start_load()
+            # shield: one caller going away must not cancel the load for everyone else
+            await asyncio.shield(self._inflight)
+            if self._value is not None:
+                return self._value
+
+    def _start_load(self):
+        self._writes = []
+        self._inflight = asyncio.create_task(self._load())
+
+    async def _load(self):
+        # Runs in its own task, so this only tags the refresh call
+        quota_priority.set(Priority.REFRESH)
+        generation = self._generation
+        try:
+            value = await self.loader()
+        except Exception as e:
+            logger.warning("Broadcast refresh failed: %s", e)
+            if self._value is None:
+                raise
+            return
+        finally:
+            self._inflight = None
+
+        if generation != self._generation:
+            # Invalidated while loading; this copy may predate whatever changed
+            return
+        # Admin writes that landed while we were loading may not be upstream yet
+        for op, arg in self._writes:
+            value = _upserted(value, arg) if op == "upsert" else _removed(value, arg)
+        self._writes = []
+        self._value = value
+        self._loaded_at = time.monotonic()
+
+    def upsert(self, broadcast: dict):
+        """Insert or merge a broadcast into the cached listing."""
+        if self._inflight is not None:
+            self._writes.append(("upsert", broadcast))
+        if self._value is not None:
+            self._value = _upserted(self._value, broadcast)
+
+    def remove(self, broadcast_id: str):
+        if self._inflight is not None:
+            self._writes.append(("remove", broadcast_id))
+        if self._value is not None:
+            self._value = _removed(self._value, broadcast_id)
+
+    def invalidate(self):
+        self._generation += 1
+        self._writes = []
+        self._value = None
+        self._loaded_at = 0.0
+
+
+def _upserted(items: list, broadcast: dict) -> list:
+    updated = []
+    found = False
+    for item in items:
+        if item["id"] == broadcast["id"]:
+            item = {**item, **broadcast}
+            found = True
+        updated.append(item)
+    if not found:
+        updated.append(broadcast)
+    return updated
+
+
+def _removed(items: list, broadcast_id: str) -> list:
+    return [b for b in items if b["id"] != broadcast_id]
+
+broadcast_cache = BroadcastCache(
+    get_scheduled_broadcasts,
+    ttl=settings.BROADCAST_CACHE_TTL,
+    stale_ttl=settings.BROADCAST_CACHE_STALE_TTL,
+)
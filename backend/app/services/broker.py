@@ -0,0 +1,271 @@
+# broker.py
+
+import asyncio
+import fnmatch
+import json
+import math
+import secrets
+import time
+from abc import ABC, abstractmethod
+from config import settings
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # only needed for BROKER_URL=redis://...
+    aioredis = None
+
+VERSION_FIELD = "__v"
+
+
+class Broker(ABC):
+    """
+    Shared state + pub/sub between workers.
+
+    Each worker keeps one subscription per channel pattern and fans messages out to
+    its own sockets, so adding workers adds viewer capacity. State updates are
+    applied, versioned and published in one atomic step, so every worker sees the
+    same order.
+    """
+
+    # Identifies this broker's version sequence; clients resuming with a version
+    # from a different epoch get a snapshot instead of deltas
+    epoch = None
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    @abstractmethod
+    async def publish(self, channel: str, message: str):
+        ...
+
+    @abstractmethod
+    def subscribe(self, pattern: str, ready: asyncio.Event = None):
+        """
+        Async iterator of (channel, message) for channels matching a glob pattern.
+        `ready` is set once the subscription is in place (after the first __anext__
+        has started), so callers can tell when nothing published will be missed.
+        """
+
+    @abstractmethod
+    async def get_state(self, key: str):
+        """Return (version, {field: str}) for a state hash."""
+
+    @abstractmethod
+    async def apply_update(self, key: str, channel: str, incr: dict = None, set: dict = None):
+        """
+        Atomically add `incr` to integer fields, overwrite `set` fields, bump the
+        version and publish {"v": version, "changes": {...}} on `channel`.
+        Returns (version, changes).
+        """
+
+    @abstractmethod
+    async def seed_state(self, key: str, version: int, values: dict):
+        """
+        Replace a state hash with saved values, unless it already holds `version` or
+        later. Returns True if it was replaced.
+        """
+
+    @abstractmethod
+    async def next_id(self, key: str) -> int:
+        """Next value of a counter that never expires or repeats (1, 2, ...)."""
+
+    @abstractmethod
+    async def incr_counters(self, key: str, amounts: dict, ttl: float):
+        """
+        Add `amounts` to integer counters in a hash that expires `ttl` seconds after
+        the last update. Returns every counter in the hash, as ints.
+        """
+
+    @abstractmethod
+    async def get_counters(self, key: str):
+        """Return {field: int} for a counter hash ({} once it has expired)."""
+
+
+class InMemoryBroker(Broker):
+    """Single-process broker; the default when there is only one worker."""
+
+    def __init__(self):
+        self.epoch = secrets.token_hex(4)
+        self._state = {}
+        self._counters = {}  # key -> (expires_at, {field: int})
+        self._ids = {}
+        self._subscribers = []  # (pattern, asyncio.Queue)
+
+    async def publish(self, channel: str, message: str):
+        for pattern, queue in self._subscribers:
+            if fnmatch.fnmatchcase(channel, pattern):
+                queue.put_nowait((channel, message))
+
+    async def subscribe(self, pattern: str, ready: asyncio.Event = None):
+        entry = (pattern, asyncio.Queue())
+        self._subscribers.append(entry)
+        if ready is not None:
+            ready.set()
+        try:
+            while True:
+                yield await entry[1].get()
+        finally:
+            self._subscribers.remove(entry)
+
+    async def get_state(self, key: str):
+        values = dict(self._state.get(key, {}))
+        version = int(values.pop(VERSION_FIELD, 0))
+        return version, values
+
+    async def apply_update(self, key: str, channel: str, incr: dict = None, set: dict = None):
+        # No awaits until the publish, so this is atomic on the event loop
+        values = self._state.setdefault(key, {})
+        changes = {}
+        for field, amount in (incr or {}).items():
+            changes[field] = int(values.get(field, 0)) + amount
+            values[field] = str(changes[field])
+        for field, value in (set or {}).items():
+            changes[field] = value
+            values[field] = str(value)
+        version = int(values.get(VERSION_FIELD, 0)) + 1
+        values[VERSION_FIELD] = str(version)
+        await self.publish(channel, json.dumps({"v": version, "changes": changes}))
+        return version, changes
+
+    async def seed_state(self, key: str, version: int, values: dict):
+        if int(self._state.get(key, {}).get(VERSION_FIELD, 0)) >= version:
+            return False
+        self._state[key] = {field: str(value) for field, value in values.items()}
+        self._state[key][VERSION_FIELD] = str(version)
+        return True
+
+    async def next_id(self, key: str) -> int:
+        self._ids[key] = self._ids.get(key, 0) + 1
+        return self._ids[key]
+
+    async def incr_counters(self, key: str, amounts: dict, ttl: float):
+        values = await self.get_counters(key)
+        for field, amount in amounts.items():
+            values[field] = values.get(field, 0) + amount
+        self._counters[key] = (time.monotonic() + ttl, values)
+        return dict(values)
+
+    async def get_counters(self, key: str):
+        expires_at, values = self._counters.get(key, (0, {}))
+        if expires_at <= time.monotonic():
+            self._counters.pop(key, None)
+            return {}
+        return dict(values)
+
+
+# HINCRBY/HSET + version bump + PUBLISH in one script, so versions and publish
+# order agree no matter which worker handled the request
+_APPLY_UPDATE_LUA = """
+local args = cjson.decode(ARGV[2])
+local changes = {}
+for field, amount in pairs(args.incr) do
+    changes[field] = redis.call('HINCRBY', KEYS[1], field, amount)
+end
+for field, value in pairs(args.set) do
+    redis.call('HSET', KEYS[1], field, value)
+    changes[field] = value
+end
+local version = redis.call('HINCRBY', KEYS[1], '__v', 1)
+local message = cjson.encode({v = version, changes = changes})
+redis.call('PUBLISH', ARGV[1], message)
+return message
+"""
+
+_SEED_STATE_LUA = """
+if tonumber(redis.call('HGET', KEYS[1], '__v') or '0') >= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], '__v', ARGV[1], unpack(cjson.decode(ARGV[2])))
+return 1
+"""
+
+
+class RedisBroker(Broker):
+    """
+    Redis-protocol broker for multiple workers/instances. Anything that speaks the
+    protocol works, including a local redis-server or fakeredis (pass client=...).
+    """
+
+    def __init__(self, url: str = None, client=None):
+        if client is None:
+            if aioredis is None:
+                raise RuntimeError("BROKER_URL is redis://... but the 'redis' package is not installed")
+            client = aioredis.from_url(url, decode_responses=True)
+        self.redis = client
+        self._apply_update = self.redis.register_script(_APPLY_UPDATE_LUA)
+        self._seed_state = self.redis.register_script(_SEED_STATE_LUA)
+
+    async def start(self):
+        key = f"{settings.BROKER_PREFIX}epoch"
+        await self.redis.set(key, secrets.token_hex(4), nx=True)
+        self.epoch = await self.redis.get(key)
+
+    async def close(self):
+        await self.redis.aclose()
+
+    def _key(self, key):
+        return f"{settings.BROKER_PREFIX}{key}"
+
+    async def publish(self, channel: str, message: str):
+        await self.redis.publish(self._key(channel), message)
+
+    async def subscribe(self, pattern: str, ready: asyncio.Event = None):
+        prefix_len = len(settings.BROKER_PREFIX)
+        pubsub = self.redis.pubsub()
+        await pubsub.psubscribe(self._key(pattern))
+        if ready is not None:
+            ready.set()
+        try:
+            async for message in pubsub.listen():
+                if message["type"] == "pmessage":
+                    yield message["channel"][prefix_len:], message["data"]
+        finally:
+            await pubsub.aclose()
+
+    async def get_state(self, key: str):
+        values = await self.redis.hgetall(self._key(key))
+        version = int(values.pop(VERSION_FIELD, 0))
+        return version, values
+
+    async def apply_update(self, key: str, channel: str, incr: dict = None, set: dict = None):
+        # cjson turns an empty Lua table into {} either way, so always send both
+        args = json.dumps({"incr": incr or {}, "set": set or {}})
+        message = await self._apply_update(keys=[self._key(key)], args=[self._key(channel), args])
+        data = json.loads(message)
+        return data["v"], data["changes"]
+
+    async def seed_state(self, key: str, version: int, values: dict):
+        # Flat [field, value, ...] so the script can pass it straight to HSET
+        flat = json.dumps([str(x) for item in values.items() for x in item])
+        return bool(await self._seed_state(keys=[self._key(key)], args=[version, flat]))
+
+    async def next_id(self, key: str) -> int:
+        return await self.redis.incr(self._key(key))
+
+    async def incr_counters(self, key: str, amounts: dict, ttl: float):
+        key = self._key(key)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for field, amount in amounts.items():
+                pipe.hincrby(key, field, amount)
+            pipe.expire(key, max(1, math.ceil(ttl)))
+            pipe.hgetall(key)
+            results = await pipe.execute()
+        return {field: int(value) for field, value in results[-1].items()}
+
+    async def get_counters(self, key: str):
+        return {field: int(value) for field, value in (await self.redis.hgetall(self._key(key))).items()}
+
+
+def create_broker(url: str) -> Broker:
+    if url.startswith("memory://"):
+        return InMemoryBroker()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBroker(url)
+    raise ValueError(f"Unsupported BROKER_URL: {url}")
+
+
+broker = create_broker(settings.BROKER_URL)
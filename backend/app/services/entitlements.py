@@ -0,0 +1,150 @@
+# entitlements.py
+
+import asyncio
+import json
+import time
+from services.broker import broker
+from services.log import get_logger
+from services.user_repository import user_repository
+
+logger = get_logger("entitlements")
+
+CHANNEL = "entitlements"
+
+
+class Entitlements:
+    """
+    Who has paid access to what, held in memory on every worker.
+
+    Loaded in bulk from the database at startup (retried in the background until it
+    works). The payment system calls POST /entitlements, which runs grant() /
+    revoke(); they write the change and announce it on the broker, so every
+    worker applies it within one pub/sub hop. Checking access never touches the
+    database.
+    """
+
+    def __init__(self, retry_delay: float = 1, max_retry_delay: float = 60, subscribe_timeout: float = 5):
+        self.all_access = set()   # user IDs with access to every broadcast
+        self.by_broadcast = {}    # broadcast_id -> set of user IDs
+        self.loaded_at = None
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.subscribe_timeout = subscribe_timeout
+        self._during_load = None  # changes seen while a load is running
+        self._task = None
+        self._retry = None
+
+    def can_watch(self, user_id, broadcast_id: str) -> bool:
+        if user_id in self.all_access:
+            return True
+        users = self.by_broadcast.get(broadcast_id)
+        return users is not None and user_id in users
+
+    def _apply(self, user_id, broadcast_id, granted: bool):
+        if self._during_load is not None:
+            self._during_load.append((user_id, broadcast_id, granted))
+        if broadcast_id is None:
+            target = self.all_access
+        else:
+            target = self.by_broadcast.get(broadcast_id)
+            if target is None:
+                if not granted:
+                    return
+                target = self.by_broadcast[broadcast_id] = set()
+        if granted:
+            target.add(user_id)
+        else:
+            target.discard(user_id)
+            if broadcast_id is not None and not target:
+                del self.by_broadcast[broadcast_id]
+
+    async def load(self):
+        started = time.perf_counter()
+        self._during_load = []
+        try:
+            rows = await user_repository.load_entitlements()
+        except BaseException:
+            self._during_load = None
+            raise
+        all_access, by_broadcast = set(), {}
+        for user_id, broadcast_id in rows:
+            if broadcast_id is None:
+                all_access.add(user_id)
+            else:
+                by_broadcast.setdefault(broadcast_id, set()).add(user_id)
+        # Swap in whole, so checks never see a half-loaded map, then redo any
+        # change that arrived while the rows were being read
+        self.all_access, self.by_broadcast = all_access, by_broadcast
+        changes, self._during_load = self._during_load, None
+        for change in changes:
+            self._apply(*change)
+        self.loaded_at = time.time()
+        logger.info("Loaded %d in %.1f ms", len(rows), (time.perf_counter() - started) * 1000)
+
+    async def _set(self, user_id, broadcast_id, granted: bool):
+        await user_repository.set_entitlement(user_id, broadcast_id, granted)
+        self._apply(user_id, broadcast_id, granted)
+        await broker.publish(CHANNEL, json.dumps({"user": user_id, "broadcast": broadcast_id, "granted": granted}))
+
+    async def grant(self, user_id, broadcast_id: str = None):
+        """Give `user_id` access to one broadcast, or to all of them."""
+        await self._set(user_id, broadcast_id, True)
+
+    async def revoke(self, user_id, broadcast_id: str = None):
+        await self._set(user_id, broadcast_id, False)
+
+    async def _relay(self, subscribed: asyncio.Event):
+        while True:
+            try:
+                async for _, message in broker.subscribe(CHANNEL, ready=subscribed):
+                    data = json.loads(message)
+                    self._apply(data["user"], data["broadcast"], data["granted"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Broker subscription lost: %s", e)
+                await asyncio.sleep(1)
+                # Changes published while we were away are only in the database
+                try:
+                    await self.load()
+                except Exception as e:
+                    logger.error("Reload failed: %r", e)
+
+    async def _load_until_done(self):
+        delay = self.retry_delay
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await self.load()
+                return
+            except Exception as e:
+                delay = min(delay * 2, self.max_retry_delay)
+                logger.error("Load failed again, retrying in %.0f s: %r", delay, e)
+
+    async def start(self):
+        if self._task is not None:
+            return
+        # Subscribe first, so nothing granted during the load is missed
+        subscribed = asyncio.Event()
+        self._task = asyncio.create_task(self._relay(subscribed))
+        try:
+            await asyncio.wait_for(subscribed.wait(), self.subscribe_timeout)
+        except asyncio.TimeoutError:
+            # The relay keeps retrying and reloads once it is back
+            logger.error("Broker subscription not confirmed after %.0f s, loading anyway", self.subscribe_timeout)
+        try:
+            await self.load()
+        except Exception as e:
+            # Without the table everyone is locked out; say so loudly but keep serving
+            logger.error("Initial load failed, paid access will be denied until a retry works: %r", e)
+            self._retry = asyncio.create_task(self._load_until_done())
+
+    async def stop(self):
+        tasks = [t for t in (self._task, self._retry) if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = self._retry = None
+
+
+entitlements = Entitlements()
@@ -0,0 +1,114 @@
+# live_tracker.py
+
+import asyncio
+import datetime
+from config import settings
+from services.log import get_logger
+from services.youtube_utils import fetch_live_snapshot
+from services.youtube_quota import Priority, quota_meter, quota_priority
+
+logger = get_logger("live")
+
+# Same window get_current_broadcast uses for "starting soon"
+STARTING_SOON_SECONDS = 300
+
+OFFLINE_STATE = {"status": "offline", "id": None, "title": None, "url": None, "next": None, "updated_at": None}
+
+
+class LiveTracker:
+    """
+    Polls YouTube in one background task and keeps the current live state in memory,
+    so /live_url and /live_status never make an upstream call.
+
+    Polling is adaptive: fast around a scheduled start, slower while a stream is live,
+    and slow when nothing is coming up. Everything is stretched further as the
+    daily YouTube quota runs low.
+    """
+
+    def __init__(self, fetch=fetch_live_snapshot):
+        self.fetch = fetch
+        self.state = dict(OFFLINE_STATE, status="unknown")
+        self._task = None
+        self._failures = 0
+
+    @property
+    def live_url(self):
+        return self.state["url"]
+
+    def _build_state(self, snapshot, now):
+        active = snapshot.get("active")
+        upcoming = snapshot.get("upcoming")
+        updated_at = now.isoformat() + "Z"
+        nxt = None
+        if upcoming:
+            nxt = {
+                "id": upcoming["id"],
+                "title": upcoming["title"],
+                "scheduled_start": upcoming["scheduled_start"].isoformat() + "Z" if upcoming["scheduled_start"] else None
+            }
+
+        if active:
+            return {"status": "live", "id": active["id"], "title": active["title"],
+                    "url": active["url"], "next": None, "updated_at": updated_at}
+
+        if upcoming and upcoming["scheduled_start"]:
+            if abs((upcoming["scheduled_start"] - now).total_seconds()) < STARTING_SOON_SECONDS:
+                return {"status": "starting_soon", "id": upcoming["id"], "title": upcoming["title"],
+                        "url": upcoming["url"], "next": nxt, "updated_at": updated_at}
+
+        return dict(OFFLINE_STATE, next=nxt, updated_at=updated_at)
+
+    def next_interval(self, snapshot, now):
+        """Seconds to wait before the next poll."""
+        if self._failures:
+            return min(settings.LIVE_POLL_FAST * 2 ** self._failures, settings.LIVE_POLL_IDLE)
+        if snapshot.get("active"):
+            return settings.LIVE_POLL_ACTIVE
+
+        upcoming = snapshot.get("upcoming")
+        if upcoming and upcoming["scheduled_start"]:
+            until_start = (upcoming["scheduled_start"] - now).total_seconds()
+            if until_start <= settings.LIVE_SOON_WINDOW:
+                # Close to (or past) the scheduled start; streams often go live late
+                return settings.LIVE_POLL_FAST
+            # Wake up right when the fast window opens
+            return min(settings.LIVE_POLL_IDLE, until_start - settings.LIVE_SOON_WINDOW)
+        return settings.LIVE_POLL_IDLE
+
+    async def poll_once(self):
+        snapshot = await self.fetch()
+        now = datetime.datetime.utcnow()
+        # Swap in a new dict so readers never see a half-updated state
+        self.state = self._build_state(snapshot, now)
+        return snapshot, now
+
+    async def run(self):
+        quota_priority.set(Priority.POLL)
+        snapshot = {}
+        while True:
+            try:
+                snapshot, now = await self.poll_once()
+                self._failures = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._failures += 1
+                now = datetime.datetime.utcnow()
+                logger.warning("Poll failed (%d): %s", self._failures, e)
+            await asyncio.sleep(self.next_interval(snapshot, now) * quota_meter.poll_slowdown())
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+live_tracker = LiveTracker()
@@ -0,0 +1,197 @@
+# log.py
+
+import atexit
+import json
+import logging
+import queue
+import re
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from config import settings
+
+# All app loggers hang off this one, so they share one queue and one writer
+ROOT = "livestream"
+
+# ?token=... in a logged URL (old WebSocket clients still send it there)
+_TOKEN_PARAM = re.compile(r"([?&]token=)[^&\s\"]*")
+
+# Attributes every LogRecord has; anything else was passed in `extra` and is a field
+# (uvicorn adds color_message, a copy of the message with terminal colours)
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "color_message"}
+
+_listener = None
+_handler = None
+
+
+def get_logger(subsystem: str) -> logging.Logger:
+    """Logger for one subsystem ("chat", "score", ...); its level comes from LOG_LEVELS."""
+    return logging.getLogger(f"{ROOT}.{subsystem}")
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, then any `extra` fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """The old "[CHAT] ..." look, with `extra` fields appended as key=value."""
+
+    def format(self, record):
+        if record.name.startswith(ROOT + "."):
+            subsystem = record.name[len(ROOT) + 1:]
+        else:
+            # uvicorn.error is uvicorn's general logger, not just errors
+            subsystem = "access" if record.name == "uvicorn.access" else record.name.split(".", 1)[0]
+        line = f"[{subsystem.upper()}] {record.getMessage()}"
+        fields = [f"{k}={v}" for k, v in vars(record).items() if k not in _RECORD_ATTRS]
+        if fields:
+            line += " (" + " ".join(fields) + ")"
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class SampleFilter(logging.Filter):
+    """
+    Rate limit per call site (logger + message template): `rate` records per second
+    with bursts of `burst`. The next record let through from a throttled site carries
+    a `suppressed` count, so nothing disappears without a trace.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self._sites = {}  # (logger, template) -> [tokens, stamp, suppressed]
+
+    def filter(self, record):
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        site = self._sites.get(key)
+        if site is None:
+            site = self._sites[key] = [self.burst, now, 0]
+        tokens = min(self.burst, site[0] + (now - site[1]) * self.rate)
+        site[1] = now
+        if tokens < 1:
+            site[0] = tokens
+            site[2] += 1
+            return False
+        site[0] = tokens - 1
+        if site[2]:
+            record.suppressed = site[2]
+            site[2] = 0
+        return True
+
+
+class RedactFilter(logging.Filter):
+    """
+    Blank out token query parameters in a record's message and args, so a URL
+    carrying a JWT (uvicorn's access and WebSocket handshake lines) never reaches
+    the log output.
+    """
+
+    def filter(self, record):
+        if isinstance(record.msg, str) and "token=" in record.msg:
+            record.msg = _TOKEN_PARAM.sub(r"\1[redacted]", record.msg)
+        if isinstance(record.args, tuple) and any(isinstance(a, str) and "token=" in a for a in record.args):
+            record.args = tuple(_TOKEN_PARAM.sub(r"\1[redacted]", a) if isinstance(a, str) else a
+                                for a in record.args)
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to the writer thread. The caller only merges the message with its
+    args (so later changes to mutable args can't leak into the log); formatting and
+    I/O happen on the writer. A full queue drops the record instead of waiting.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _parse_levels(spec: str):
+    """"chat=WARNING,score=DEBUG" -> {"chat": "WARNING", "score": "DEBUG"}"""
+    levels = {}
+    for item in spec.split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging():
+    """
+    Route the app's loggers (and uvicorn's) through a bounded queue to one
+    background writer thread, so logging never does I/O on the event loop.
+    """
+    global _listener, _handler
+    if _listener is not None:
+        return
+
+    formatter = JsonFormatter() if settings.LOG_FORMAT == "json" else TextFormatter()
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(formatter)
+
+    handler = NonBlockingQueueHandler(queue.Queue(settings.LOG_QUEUE_SIZE))
+    handler.addFilter(RedactFilter())
+    if settings.LOG_SAMPLE_RATE > 0:
+        handler.addFilter(SampleFilter(settings.LOG_SAMPLE_RATE, settings.LOG_SAMPLE_BURST))
+
+    root = logging.getLogger(ROOT)
+    root.setLevel(settings.LOG_LEVEL.upper())
+    root.handlers = [handler]
+    root.propagate = False
+    for subsystem, level in _parse_levels(settings.LOG_LEVELS).items():
+        get_logger(subsystem).setLevel(level)
+
+    # uvicorn's access log writes every request synchronously otherwise
+    for name in ("uvicorn", "uvicorn.access"):
+        logger = logging.getLogger(name)
+        logger.handlers = [handler]
+        logger.propagate = False
+
+    _handler = handler
+    _listener = QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    # uvicorn still logs after the app's lifespan ends; drain at process exit
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Write out whatever is still queued and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def dropped_records() -> int:
+    """Records thrown away because the queue was full."""
+    return _handler.dropped if _handler is not None else 0
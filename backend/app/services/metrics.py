@@ -0,0 +1,268 @@
+# metrics.py
+
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from services.log import get_logger
+
+logger = get_logger("metrics")
+
+# Latency buckets (seconds) for requests and upstream calls
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# In-process work that should take microseconds (fan-out, codec)
+FAST_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.01, 0.05)
+
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class CounterValue:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class GaugeValue(CounterValue):
+    __slots__ = ()
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+
+class HistogramValue:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metric(ABC):
+    """
+    A metric family. Labelled series are created on first use by `labels()`; hot
+    paths should look the series up once and keep it, so recording is a single
+    attribute update with no locking (everything runs on the event loop).
+    """
+
+    type = None
+
+    def __init__(self, name: str, help: str, labels=(), registry=None):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._series = {}
+        if not self.label_names:
+            self._default = self._series[()] = self._new()
+        (registry or REGISTRY).register(self)
+
+    @abstractmethod
+    def _new(self):
+        """A fresh value for one labelled series."""
+
+    def labels(self, *values):
+        key = tuple(str(v) for v in values)
+        series = self._series.get(key)
+        if series is None:
+            if len(key) != len(self.label_names):
+                raise ValueError(f"{self.name} takes labels {self.label_names}")
+            series = self._series[key] = self._new()
+        return series
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for key, series in list(self._series.items()):
+            lines.extend(self._render_series(key, series))
+        return lines
+
+    def _render_series(self, key, series):
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(series.value)}"]
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def _new(self):
+        return CounterValue()
+
+    def inc(self, amount=1):
+        self._default.value += amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def _new(self):
+        return GaugeValue()
+
+    def inc(self, amount=1):
+        self._default.value += amount
+
+    def dec(self, amount=1):
+        self._default.value -= amount
+
+    def set(self, value):
+        self._default.value = value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labels, registry)
+
+    def _new(self):
+        return HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def _render_series(self, key, series):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), series.counts):
+            cumulative += count
+            le = 'le="' + _format_value(float(bound)) + '"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+        labels = _format_labels(self.label_names, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(series.sum)}")
+        lines.append(f"{self.name}_count{labels} {series.count}")
+        return lines
+
+
+class Collected:
+    """
+    A metric read at scrape time from counters a component already keeps, so the
+    component's hot path pays nothing. `collect()` returns (label values, value) pairs.
+    """
+
+    def __init__(self, name: str, help: str, type: str, collect, labels=(), registry=None):
+        self.name = name
+        self.help = help
+        self.type = type
+        self.label_names = tuple(labels)
+        self.collect = collect
+        (registry or REGISTRY).register(self)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        try:
+            samples = list(self.collect())
+        except Exception as e:
+            logger.warning("Collecting %s failed: %r", self.name, e)
+            return []
+        for key, value in samples:
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (0.0.4)."""
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+# Metrics recorded inline by the code paths they describe
+
+http_request_seconds = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    labels=("method", "route", "status"),
+)
+ws_connections_total = Counter(
+    "ws_connections_total", "WebSocket connections accepted", labels=("endpoint",),
+)
+fanout_publish_seconds = Histogram(
+    "fanout_publish_duration_seconds", "Time to queue one message for every subscriber of a room",
+    labels=("kind",), buckets=FAST_BUCKETS,
+)
+chat_messages_in_total = Counter("chat_messages_in_total", "Chat messages accepted from clients")
+chat_messages_out_total = Counter(
+    "chat_messages_out_total", "Chat messages queued to subscribers (messages x subscribers)",
+)
+chat_frames_total = Counter("chat_frames_total", "Chat frames published to rooms")
+youtube_request_seconds = Histogram(
+    "youtube_request_duration_seconds", "YouTube API attempt latency by quota method",
+    labels=("method",),
+)
+youtube_retries_total = Counter("youtube_retries_total", "YouTube API retries", labels=("method",))
+youtube_errors_total = Counter(
+    "youtube_errors_total", "YouTube API calls that failed, by final status", labels=("method", "status"),
+)
+bcrypt_seconds = Histogram(
+    "bcrypt_duration_seconds", "bcrypt hash/verify time including the wait for a worker",
+    labels=("op",), buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+
+class MetricsMiddleware:
+    """
+    Records http_request_duration_seconds for every HTTP request. Routes are
+    labelled by their template ("/broadcast/{broadcast_id}"), never the raw path,
+    so the number of series stays bounded. WebSockets are passed straight through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            http_request_seconds.labels(scope["method"], template, status).observe(time.perf_counter() - start)
@@ -0,0 +1,96 @@
+# password_hasher.py
+
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+import bcrypt
+from config import settings
+from services.metrics import bcrypt_seconds
+
+
+class HasherBusyError(Exception):
+    pass
+
+
+# Run in the worker processes; top-level so they can be pickled
+
+def _hash(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def _check(password: bytes, hashed: bytes) -> bool:
+    try:
+        return bcrypt.checkpw(password, hashed)
+    except ValueError:  # malformed hash in the database
+        return False
+
+
+def _warm_up():
+    return True
+
+
+class PasswordHasher:
+    """
+    bcrypt on a small, dedicated process pool.
+
+    bcrypt is pure CPU; run in the request threadpool it stalls every other sync
+    endpoint and, through the GIL, the event loop too. Here it runs on `workers`
+    separate processes. At most `max_pending` calls may be running or queued; past
+    that, callers get HasherBusyError right away (turned into a 503) instead of
+    waiting in a queue whose tail would time out anyway.
+    """
+
+    def __init__(self, workers: int, max_pending: int, rounds: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self.pending = 0
+        self.rejected = 0
+        self._pool = None
+
+    def start(self):
+        if self._pool is None:
+            # spawn, not fork: the parent has an event loop and threads running
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            # Start the workers now rather than on the first login
+            for _ in range(self.workers):
+                self._pool.submit(_warm_up)
+
+    def stop(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def _run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HasherBusyError("Too many logins in progress, try again shortly")
+        self.start()
+        self.pending += 1
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+        finally:
+            self.pending -= 1
+            bcrypt_seconds.labels(fn.__name__.lstrip("_")).observe(time.perf_counter() - start)
+
+    async def hash(self, password: str) -> str:
+        return (await self._run(_hash, password.encode(), self.rounds)).decode()
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(_check, password.encode(), hashed.encode())
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """True if `hashed` was made with a different cost than BCRYPT_ROUNDS ("$2b$12$...")."""
+        try:
+            return int(hashed.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+
+password_hasher = PasswordHasher(
+    workers=settings.BCRYPT_WORKERS,
+    max_pending=settings.BCRYPT_MAX_PENDING,
+    rounds=settings.BCRYPT_ROUNDS,
+)
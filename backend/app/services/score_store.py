@@ -0,0 +1,120 @@
+# score_store.py
+
+import asyncio
+import json
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from config import settings
+
+# Postgres/Supabase table used by SupabaseScoreStore:
+#
+#   create table scoreboards (
+#       broadcast_id text primary key,
+#       version      bigint not null,
+#       state        jsonb not null,
+#       updated_at   double precision not null
+#   );
+
+
+class ScoreStore(ABC):
+    """
+    Durable copy of the scoreboards: one row per broadcast holding its latest
+    version and full state. Writes are batched upserts; a row is only replaced by
+    a higher version, so workers flushing the same room can't roll it back.
+    """
+
+    @abstractmethod
+    async def load_all(self):
+        """Return {broadcast_id: (version, state)}."""
+
+    @abstractmethod
+    async def upsert_many(self, rows):
+        """Upsert [(broadcast_id, version, state), ...] in one round-trip."""
+
+    async def close(self):
+        pass
+
+
+class SqliteScoreStore(ScoreStore):
+    """Local file (or :memory:) stand-in for development and tests."""
+
+    def __init__(self, path: str):
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS scoreboards ("
+            " broadcast_id TEXT PRIMARY KEY,"
+            " version INTEGER NOT NULL,"
+            " state TEXT NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self.db.commit()
+
+    def _load_all(self):
+        rows = self.db.execute("SELECT broadcast_id, version, state FROM scoreboards").fetchall()
+        return {bid: (version, json.loads(state)) for bid, version, state in rows}
+
+    def _upsert_many(self, rows):
+        now = time.time()
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO scoreboards (broadcast_id, version, state, updated_at) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(broadcast_id) DO UPDATE SET"
+                " version = excluded.version, state = excluded.state, updated_at = excluded.updated_at"
+                " WHERE excluded.version > scoreboards.version",
+                [(bid, version, json.dumps(state), now) for bid, version, state in rows],
+            )
+
+    async def load_all(self):
+        return await asyncio.to_thread(self._load_all)
+
+    async def upsert_many(self, rows):
+        await asyncio.to_thread(self._upsert_many, rows)
+
+    async def close(self):
+        self.db.close()
+
+
+class SupabaseScoreStore(ScoreStore):
+    """
+    Supabase (PostgREST) adapter. The client is synchronous, so calls run in a
+    thread. PostgREST upserts can't carry the version condition, so rows are
+    upserted as-is; the broker remains the source of truth while running.
+    """
+
+    def __init__(self, client=None):
+        if client is None:
+            from supabase import create_client
+            client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+        self.client = client
+
+    def _load_all(self):
+        result = self.client.table("scoreboards").select("broadcast_id,version,state").execute()
+        return {row["broadcast_id"]: (row["version"], row["state"]) for row in result.data}
+
+    def _upsert_many(self, rows):
+        now = time.time()
+        self.client.table("scoreboards").upsert(
+            [{"broadcast_id": bid, "version": version, "state": state, "updated_at": now}
+             for bid, version, state in rows],
+            on_conflict="broadcast_id",
+        ).execute()
+
+    async def load_all(self):
+        return await asyncio.to_thread(self._load_all)
+
+    async def upsert_many(self, rows):
+        await asyncio.to_thread(self._upsert_many, rows)
+
+
+def create_score_store(url: str):
+    """SCORE_STORE_URL: "" (off), sqlite:///path/to/file.db, sqlite://:memory: or supabase://"""
+    if not url:
+        return None
+    if url.startswith("sqlite://"):
+        return SqliteScoreStore(url[len("sqlite://"):].removeprefix("/") or ":memory:")
+    if url.startswith("supabase://"):
+        return SupabaseScoreStore()
+    raise ValueError(f"Unsupported SCORE_STORE_URL: {url}")
@@ -0,0 +1,214 @@
+# youtube_async.py
+
+import asyncio
+import email.utils
+import random
+import time
+import httpx
+from starlette.concurrency import run_in_threadpool
+from config import settings
+from services.metrics import youtube_errors_total, youtube_request_seconds, youtube_retries_total
+from services.youtube_client import provider
+from services.youtube_quota import quota_meter, quota_priority, upstream_limiter
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class YouTubeAPIError(Exception):
+    def __init__(self, status_code: int, message: str, retry_after: float = None):
+        super().__init__(f"{status_code}: {message}")
+        self.status_code = status_code
+        self.message = message
+        self.retry_after = retry_after  # seconds, if YouTube (or the breaker) said when to come back
+
+
+class CircuitOpenError(YouTubeAPIError):
+    def __init__(self, retry_in: float):
+        super().__init__(503, f"YouTube API circuit open, retry in {retry_in:.0f}s", retry_after=retry_in)
+        self.retry_in = retry_in
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def parse_retry_after(value):
+    """Retry-After is either a number of seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(when.timestamp() - time.time(), 0.0)
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive upstream failures and fails fast
+    for `reset_timeout` seconds, then lets a single trial call through (half-open).
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_started = None
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self):
+        state = self.state
+        if state == "open":
+            raise CircuitOpenError(self.reset_timeout - (time.monotonic() - self.opened_at))
+        if state == "half_open":
+            # One trial call at a time; a trial that never reported back expires
+            now = time.monotonic()
+            if self._trial_started is not None and now - self._trial_started < self.reset_timeout:
+                raise CircuitOpenError(0)
+            self._trial_started = now
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_started = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self._trial_started is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._trial_started = None
+
+
+class AsyncYouTubeClient:
+    """
+    Non-blocking YouTube Data API client on top of httpx.
+
+    Credentials come from the shared YouTubeClientProvider (which keeps the token
+    fresh in the background); requests go out over one pooled AsyncClient.
+    base_url/auth let it point at a local stand-in that needs no credentials.
+    """
+
+    def __init__(self, base_url: str = None, auth: bool = True):
+        self.base_url = base_url or settings.YOUTUBE_API_BASE_URL
+        self.auth = auth
+        self.breaker = CircuitBreaker(settings.YT_BREAKER_THRESHOLD, settings.YT_BREAKER_RESET)
+        self._client = None
+
+    def _http(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=settings.YT_HTTP_TIMEOUT,
+                limits=httpx.Limits(max_connections=settings.YT_MAX_CONNECTIONS),
+            )
+        return self._client
+
+    async def _auth_headers(self, force_refresh=False):
+        if not self.auth:
+            return {}
+        creds = provider.loaded_credentials
+        if creds is None:
+            # First load reads token.json and may refresh; keep it off the event loop
+            creds = await run_in_threadpool(provider.credentials)
+        if force_refresh or not creds.valid:
+            await run_in_threadpool(provider.refresh)
+        provider.start_refresher()
+        return {"Authorization": f"Bearer {creds.token}"}
+
+    async def request(self, method: str, path: str, quota_method: str, params=None, json=None):
+        """
+        Send one API call. `quota_method` is the QUOTA_COSTS key it is billed under;
+        every attempt (retries included) is charged, as YouTube does.
+        """
+        priority = quota_priority.get()
+        attempt = 0
+        refreshed = False
+        while True:
+            await quota_meter.check(quota_method, priority)
+            self.breaker.before_call()
+            retry_after = None
+            async with upstream_limiter.slot(priority):
+                headers = await self._auth_headers()
+                await quota_meter.record(quota_method)
+                start = time.perf_counter()
+                try:
+                    response = await self._http().request(
+                        method, path, params=params, json=json, headers=headers,
+                    )
+                except httpx.TransportError as e:
+                    response = None
+                    status, message = 503, f"transport error: {e}"
+                youtube_request_seconds.labels(quota_method).observe(time.perf_counter() - start)
+
+            if response is not None:
+                if response.status_code == 401 and not refreshed:
+                    # Token was revoked or expired early; refresh once and try again
+                    refreshed = True
+                    self.breaker.record_success()
+                    await self._auth_headers(force_refresh=True)
+                    continue
+                if response.status_code < 400:
+                    self.breaker.record_success()
+                    return response.json() if response.content else None
+                status, message = response.status_code, response.text
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+
+            if status not in RETRYABLE_STATUSES:
+                # The API answered, it just didn't like the request
+                self.breaker.record_success()
+                youtube_errors_total.labels(quota_method, status).inc()
+                raise YouTubeAPIError(status, message)
+
+            self.breaker.record_failure()
+            if attempt >= settings.YT_MAX_RETRIES:
+                youtube_errors_total.labels(quota_method, status).inc()
+                raise YouTubeAPIError(status, message, retry_after)
+            delay = backoff_delay(attempt, settings.YT_BACKOFF_BASE, settings.YT_BACKOFF_CAP)
+            if retry_after is not None:
+                if retry_after > settings.YT_BACKOFF_CAP:
+                    # Not worth holding the request open that long
+                    youtube_errors_total.labels(quota_method, status).inc()
+                    raise YouTubeAPIError(status, message, retry_after)
+                delay = max(delay, retry_after)
+            attempt += 1
+            youtube_retries_total.labels(quota_method).inc()
+            await asyncio.sleep(delay)
+
+    async def list_broadcasts(self, **params):
+        return await self.request("GET", "/liveBroadcasts", "list", params=params)
+
+    async def insert_broadcast(self, part: str, body: dict):
+        return await self.request("POST", "/liveBroadcasts", "insert", params={"part": part}, json=body)
+
+    async def update_broadcast(self, part: str, body: dict):
+        return await self.request("PUT", "/liveBroadcasts", "update", params={"part": part}, json=body)
+
+    async def delete_broadcast(self, broadcast_id: str):
+        return await self.request("DELETE", "/liveBroadcasts", "delete", params={"id": broadcast_id})
+
+    async def transition_broadcast(self, broadcast_id: str, status: str, part: str = "status"):
+        return await self.request(
+            "POST", "/liveBroadcasts/transition", "transition",
+            params={"id": broadcast_id, "broadcastStatus": status, "part": part},
+        )
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+youtube_api = AsyncYouTubeClient(settings.YOUTUBE_API_BASE_URL, auth=not settings.YT_AUTH_DISABLED)
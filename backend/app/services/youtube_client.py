@@ -0,0 +1,112 @@
+# youtube_client.py
+
+import datetime
+import os
+import threading
+
+import httplib2
+import google_auth_httplib2
+from google.auth.exceptions import RefreshError
+from google.oauth2.credentials import Credentials
+from google_auth_oauthlib.flow import InstalledAppFlow
+from config import settings
+from services.log import get_logger
+
+logger = get_logger("youtube")
+
+SCOPES = ["https://www.googleapis.com/auth/youtube.force-ssl"]
+
+
+def load_credentials(interactive: bool = True):
+    """Load saved OAuth credentials, refreshing or re-running the consent flow if needed."""
+    creds = None
+    if os.path.exists(settings.YT_TOKEN_PATH):
+        creds = Credentials.from_authorized_user_file(settings.YT_TOKEN_PATH, SCOPES)
+
+    if creds and not creds.valid and creds.refresh_token:
+        try:
+            creds.refresh(google_auth_httplib2.Request(httplib2.Http()))
+            save_credentials(creds)
+        except RefreshError:
+            creds = None
+
+    if not creds or not creds.valid:
+        if not interactive:
+            raise RuntimeError("No valid YouTube credentials; run helpers/youtube_auth.py first")
+        flow = InstalledAppFlow.from_client_secrets_file(settings.YT_CLIENT_SECRETS_PATH, SCOPES)
+        creds = flow.run_local_server(port=5000, access_type='offline', prompt='consent')
+        save_credentials(creds)
+    return creds
+
+
+def save_credentials(creds):
+    with open(settings.YT_TOKEN_PATH, "w") as token:
+        token.write(creds.to_json())
+
+
+class YouTubeClientProvider:
+    """
+    Process-wide YouTube credentials: loaded once, shared by every request, with
+    the access token refreshed in the background before it expires.
+    """
+
+    def __init__(self, refresh_margin: int = settings.YT_TOKEN_REFRESH_MARGIN):
+        self.refresh_margin = refresh_margin
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._creds = None
+        self._refresher = None
+
+    @property
+    def loaded_credentials(self):
+        """Credentials if they have already been loaded, else None (never blocks)."""
+        return self._creds
+
+    def credentials(self):
+        if self._creds is None:
+            with self._lock:
+                if self._creds is None:
+                    self._creds = load_credentials(interactive=False)
+        return self._creds
+
+    def refresh(self):
+        """Refresh the access token now and persist it."""
+        with self._refresh_lock:
+            creds = self.credentials()
+            creds.refresh(google_auth_httplib2.Request(httplib2.Http(timeout=settings.YT_HTTP_TIMEOUT)))
+            save_credentials(creds)
+
+    def _seconds_until_refresh(self):
+        expiry = self.credentials().expiry
+        if expiry is None:
+            return self.refresh_margin
+        remaining = (expiry - datetime.datetime.utcnow()).total_seconds()
+        return max(remaining - self.refresh_margin, 0)
+
+    def _refresh_loop(self):
+        while not self._stop.is_set():
+            if self._stop.wait(self._seconds_until_refresh()):
+                break
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning("Background token refresh failed: %s", e)
+                # Back off a bit; the async client still refreshes on a 401
+                self._stop.wait(30)
+
+    def start_refresher(self):
+        if self._refresher is not None:
+            return
+        with self._refresh_lock:
+            if self._refresher is None:
+                self._refresher = threading.Thread(
+                    target=self._refresh_loop, name="youtube-token-refresh", daemon=True
+                )
+                self._refresher.start()
+
+    def close(self):
+        self._stop.set()
+
+
+provider = YouTubeClientProvider()
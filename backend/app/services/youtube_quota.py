@@ -0,0 +1,191 @@
+# youtube_quota.py
+
+import asyncio
+import datetime
+import heapq
+import itertools
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from zoneinfo import ZoneInfo
+from config import settings
+from services.broker import broker as default_broker
+
+# YouTube Data API v3 unit costs for the liveBroadcasts calls we make
+QUOTA_COSTS = {
+    "list": 1,
+    "insert": 50,
+    "update": 50,
+    "delete": 50,
+    "transition": 50,
+}
+
+# The daily quota resets at midnight Pacific time
+QUOTA_TZ = ZoneInfo("America/Los_Angeles")
+
+
+class Priority(IntEnum):
+    """Lower value goes first."""
+    ADMIN = 0     # admin writes and anything a person is waiting on
+    REFRESH = 1   # cache refreshes
+    POLL = 2      # background live-status polling
+
+
+# Callers tag their upstream calls by setting this (tasks inherit it)
+quota_priority: ContextVar[Priority] = ContextVar("quota_priority", default=Priority.ADMIN)
+
+
+class QuotaExhaustedError(Exception):
+    def __init__(self, method: str, priority: Priority, remaining: int):
+        super().__init__(f"YouTube quota budget too low for {priority.name.lower()} {method} ({remaining} units left today)")
+        self.method = method
+        self.priority = priority
+        self.remaining = remaining
+
+
+class QuotaMeter:
+    """
+    Per-day running total of YouTube quota units, kept in the broker so every worker
+    spends from the same daily budget (with the in-memory broker it is per-process).
+    `used` and `calls` mirror the shared counters as of the last check/record.
+
+    Lower priority callers stop before the budget runs dry: polling may not dip into
+    the last admin_reserve + refresh_reserve units, cache refreshes not into the last
+    admin_reserve units. Admin writes can use everything.
+    """
+
+    def __init__(self, daily_limit: int, admin_reserve: int, refresh_reserve: int, broker=None):
+        self.daily_limit = daily_limit
+        self.admin_reserve = admin_reserve
+        self.refresh_reserve = refresh_reserve
+        self.broker = broker or default_broker
+        self.day = self._today()
+        self.used = 0
+        self.calls = {}
+
+    @staticmethod
+    def _today():
+        return datetime.datetime.now(QUOTA_TZ).date()
+
+    @staticmethod
+    def seconds_until_reset():
+        now = datetime.datetime.now(QUOTA_TZ)
+        midnight = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time(), QUOTA_TZ)
+        return (midnight - now).total_seconds()
+
+    def _roll_day(self):
+        today = self._today()
+        if today != self.day:
+            self.day = today
+            self.used = 0
+            self.calls = {}
+
+    def _key(self):
+        return f"yt_quota:{self.day.isoformat()}"
+
+    def _apply(self, counters: dict):
+        self.used = counters.pop("used", 0)
+        self.calls = counters
+
+    async def sync(self):
+        """Refresh `used`/`calls` from the shared counters."""
+        self._roll_day()
+        self._apply(await self.broker.get_counters(self._key()))
+
+    @property
+    def remaining(self):
+        self._roll_day()
+        return max(self.daily_limit - self.used, 0)
+
+    def _floor(self, priority: Priority):
+        if priority == Priority.ADMIN:
+            return 0
+        if priority == Priority.REFRESH:
+            return self.admin_reserve
+        return self.admin_reserve + self.refresh_reserve
+
+    async def check(self, method: str, priority: Priority):
+        await self.sync()
+        remaining = self.remaining
+        if remaining - QUOTA_COSTS[method] < self._floor(priority):
+            raise QuotaExhaustedError(method, priority, remaining)
+
+    async def record(self, method: str):
+        self._roll_day()
+        # The key is per day anyway; the expiry just cleans up yesterday's
+        counters = await self.broker.incr_counters(
+            self._key(), {"used": QUOTA_COSTS[method], method: 1}, ttl=self.seconds_until_reset() + 3600,
+        )
+        self._apply(counters)
+
+    def poll_slowdown(self):
+        """
+        Multiplier for background poll intervals: 1x while more than half the budget
+        is left, growing to 8x as the remaining budget approaches the polling floor.
+        """
+        floor = self._floor(Priority.POLL)
+        spendable = self.daily_limit - floor
+        if spendable <= 0:
+            return 8.0
+        left = (self.remaining - floor) / spendable
+        if left >= 0.5:
+            return 1.0
+        return 1.0 + 7.0 * (1 - max(left, 0.0) / 0.5)
+
+    def snapshot(self):
+        return {
+            "day": self.day.isoformat(),
+            "daily_limit": self.daily_limit,
+            "used": self.used,
+            "remaining": self.remaining,
+            "calls": dict(self.calls),
+            "poll_slowdown": round(self.poll_slowdown(), 2),
+        }
+
+
+class PriorityLimiter:
+    """Concurrency limit for upstream calls where waiting admin calls are let in before background ones."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self._waiters = []
+        self._seq = itertools.count()
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority):
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            entry = (int(priority), next(self._seq), future)
+            heapq.heappush(self._waiters, entry)
+            try:
+                await future  # the releasing call hands its slot straight to us
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    self._release()
+                elif entry in self._waiters:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                raise
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self):
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+
+quota_meter = QuotaMeter(
+    daily_limit=settings.YT_DAILY_QUOTA,
+    admin_reserve=settings.YT_QUOTA_ADMIN_RESERVE,
+    refresh_reserve=settings.YT_QUOTA_REFRESH_RESERVE,
+)
+upstream_limiter = PriorityLimiter(settings.YT_MAX_CONNECTIONS)
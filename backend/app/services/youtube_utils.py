@@ -1,125 +1,180 @@
 # youtube_utils.py
 
-import os
-import time
-import random
+import asyncio
 import datetime
+import math
 from fastapi import HTTPException
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
 from helpers.time_utils import build_scheduled_start_utc
 from config import settings
+from services.youtube_client import load_credentials
+from services.youtube_async import youtube_api, YouTubeAPIError, CircuitOpenError
+from services.youtube_quota import QuotaExhaustedError, quota_meter
+from services.log import get_logger
 
-SCOPES = ["https://www.googleapis.com/auth/youtube.force-ssl"]
+logger = get_logger("youtube")
+
+BROADCAST_STATUSES = ("upcoming", "active", "completed")
 
 
 def authenticate_youtube():
-    """Authenticate and return the YouTube API client."""
-    creds = None
-    if os.path.exists("token.json"):
-        creds = Credentials.from_authorized_user_file("token.json", SCOPES)
-    if not creds or not creds.valid:
-        flow = InstalledAppFlow.from_client_secrets_file(settings.YT_CLIENT_SECRETS_PATH, SCOPES)
-        creds = flow.run_local_server(port=5000, access_type='offline', prompt='consent')
-        with open("token.json", "w") as token:
-            token.write(creds.to_json())
+    """Authenticate and return a fresh YouTube API client (one-off scripts only)."""
+    creds = load_credentials()
     return build("youtube", "v3", credentials=creds)
 
 
-def create_broadcast(youtube, title, scheduled_start, description="", max_retries=5):
-    """Create a new YouTube live broadcast."""
+def _retry_after(seconds):
+    return {"Retry-After": str(max(1, math.ceil(seconds)))}
+
+
+def api_error(e: Exception, what: str) -> HTTPException:
+    """
+    The HTTPException to answer with for a failed YouTube call. Upstream statuses are
+    kept (429/5xx after retries, 4xx for bad requests), the breaker answers 503 and an
+    exhausted quota 429, each with Retry-After when we know it; anything else is a 500.
+    YouTube's 401/403 are about our credentials, not the caller's, so they become a
+    502 and the upstream reason goes to the log instead of the client.
+    """
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, CircuitOpenError):
+        return HTTPException(status_code=503, detail=f"YouTube is temporarily unavailable: {e}",
+                             headers=_retry_after(e.retry_in))
+    if isinstance(e, QuotaExhaustedError):
+        return HTTPException(status_code=429, detail=str(e),
+                             headers=_retry_after(quota_meter.seconds_until_reset()))
+    if isinstance(e, YouTubeAPIError) and e.status_code in (401, 403):
+        logger.warning(f"YouTube refused our credentials ({e.status_code}): {e.message[:500]}")
+        return HTTPException(status_code=502, detail=f"{what}: YouTube rejected the server's credentials")
+    if isinstance(e, YouTubeAPIError):
+        headers = _retry_after(e.retry_after) if e.retry_after is not None else None
+        return HTTPException(status_code=e.status_code, detail=f"{what}: {e}", headers=headers)
+    return HTTPException(status_code=500, detail=f"{what}: {e}")
+
+
+async def create_broadcast(title, scheduled_start, description=""):
+    """Create a new YouTube live broadcast. Retries/backoff are handled by youtube_api."""
     start_time = scheduled_start.isoformat() + "Z"
     end_time = (scheduled_start + datetime.timedelta(hours=3)).isoformat() + "Z"
 
-    retries = 0
-    while retries < max_retries:
-        try:
-            request = youtube.liveBroadcasts().insert(
-                part="snippet,status,contentDetails",
-                body={
-                    "snippet": {
-                        "title": title,
-                        "description": description,
-                        "scheduledStartTime": start_time,
-                        "scheduledEndTime": end_time
-                    },
-                    "status": {
-                        "privacyStatus": "public",
-                        "selfDeclaredMadeForKids": False
-                    },
-                    "contentDetails": {
-                        "enableAutoStart": False,
-                        "enableAutoStop": True
-                    }
+    try:
+        response = await youtube_api.insert_broadcast(
+            part="snippet,status,contentDetails",
+            body={
+                "snippet": {
+                    "title": title,
+                    "description": description,
+                    "scheduledStartTime": start_time,
+                    "scheduledEndTime": end_time
+                },
+                "status": {
+                    "privacyStatus": "public",
+                    "selfDeclaredMadeForKids": False
+                },
+                "contentDetails": {
+                    "enableAutoStart": False,
+                    "enableAutoStop": True
                 }
-            )
-            response = request.execute()
-            broadcast_id = response["id"]
-            youtube_url = f"https://www.youtube.com/embed/{broadcast_id}"
-
-            # Save URL if stream starts soon
-            now = datetime.datetime.utcnow()
-            if abs((scheduled_start - now).total_seconds()) < 300:
-                with open("live_url.txt", "w") as file:
-                    file.write(youtube_url)
-
-            return broadcast_id, youtube_url
-        except HttpError as e:
-            if "503" in str(e):
-                wait_time = random.randint(5, 15)
-                time.sleep(wait_time)
-                retries += 1
-            else:
-                raise HTTPException(status_code=500, detail=f"YouTube API error: {e}")
-    raise HTTPException(status_code=500, detail="Unable to schedule broadcast after retries.")
+            }
+        )
+    except (YouTubeAPIError, QuotaExhaustedError) as e:
+        raise api_error(e, "YouTube API error")
+
+    broadcast_id = response["id"]
+    youtube_url = f"https://www.youtube.com/embed/{broadcast_id}"
+    return broadcast_id, youtube_url
 
 
-def schedule_broadcast(title: str, month: int, day: int, time_str: str, description: str = ""):
-    youtube = authenticate_youtube()
+async def schedule_broadcast(title: str, month: int, day: int, time_str: str, description: str = ""):
     scheduled_start = build_scheduled_start_utc(month, day, time_str)
-    return create_broadcast(youtube, title, scheduled_start, description)
+    return await create_broadcast(title, scheduled_start, description)
+
+
+def _broadcast_row(item):
+    scheduled = item["snippet"].get("scheduledStartTime")
+    start_time = datetime.datetime.strptime(scheduled, "%Y-%m-%dT%H:%M:%SZ") if scheduled else None
+    return {
+        "id": item["id"],
+        "title": item["snippet"]["title"],
+        "description": item["snippet"].get("description", ""),
+        "url": f"https://www.youtube.com/embed/{item['id']}",
+        "status": item["status"]["lifeCycleStatus"],
+        "date": start_time.strftime("%Y-%m-%d") if start_time else "",
+        "time": start_time.strftime("%H:%M") if start_time else ""
+    }
+
+
+async def iter_broadcast_pages(status: str):
+    """Yield one page of broadcast rows at a time, following nextPageToken."""
+    page_token = None
+    while True:
+        params = {
+            "part": "snippet,contentDetails,status",
+            "broadcastStatus": status,
+            "maxResults": settings.BROADCAST_PAGE_SIZE
+        }
+        if page_token:
+            params["pageToken"] = page_token
+        response = await youtube_api.list_broadcasts(**params)
+        yield [_broadcast_row(item) for item in response.get("items", [])]
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            return
+
+
+async def iter_broadcasts(statuses=BROADCAST_STATUSES):
+    """
+    Yield broadcast rows for several status sets, fetched concurrently.
+
+    Pages are handed over through a small bounded queue, so the first rows come out
+    before the last page is fetched and memory stays flat however long the schedule is.
+    Rows from different status sets are interleaved.
+    """
+    queue = asyncio.Queue(maxsize=settings.BROADCAST_STREAM_QUEUE)
+    done = object()
+
+    async def fetch(status):
+        try:
+            async for page in iter_broadcast_pages(status):
+                await queue.put(page)
+            await queue.put(done)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await queue.put(e)
+
+    tasks = [asyncio.create_task(fetch(status)) for status in statuses]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            page = await queue.get()
+            if page is done:
+                remaining -= 1
+            elif isinstance(page, Exception):
+                raise page
+            else:
+                for row in page:
+                    yield row
+    finally:
+        for task in tasks:
+            task.cancel()
 
 
-def get_scheduled_broadcasts():
+async def get_scheduled_broadcasts():
     """Fetch all scheduled (upcoming) YouTube broadcasts."""
     try:
-        youtube = authenticate_youtube()
-        request = youtube.liveBroadcasts().list(
-            part="snippet,contentDetails,status",
-            broadcastStatus="upcoming",
-            maxResults=50
-        )
-        response = request.execute()
-
-        broadcasts = []
-        for item in response.get("items", []):
-            start_time = datetime.datetime.strptime(
-                item["snippet"]["scheduledStartTime"], "%Y-%m-%dT%H:%M:%SZ"
-            )
-            broadcasts.append({
-                "id": item["id"],
-                "title": item["snippet"]["title"],
-                "description": item["snippet"].get("description", ""),
-                "url": f"https://www.youtube.com/embed/{item['id']}",
-                "status": item["status"]["lifeCycleStatus"],
-                "date": start_time.strftime("%Y-%m-%d"),
-                "time": start_time.strftime("%H:%M")
-            })
-        return broadcasts
+        return [row async for row in iter_broadcasts(("upcoming",))]
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to fetch broadcasts: {e}")
+        raise api_error(e, "Failed to fetch broadcasts")
 
 
-def update_broadcast(broadcast_id: str, title: str, scheduled_start: datetime.datetime):
+async def update_broadcast(broadcast_id: str, title: str, scheduled_start: datetime.datetime):
     """Update an existing YouTube broadcast."""
     try:
-        youtube = authenticate_youtube()
         start_time = scheduled_start.isoformat() + "Z"
         end_time = (scheduled_start + datetime.timedelta(hours=3)).isoformat() + "Z"
 
-        request = youtube.liveBroadcasts().update(
+        response = await youtube_api.update_broadcast(
             part="snippet",
             body={
                 "id": broadcast_id,
@@ -130,7 +185,6 @@ def update_broadcast(broadcast_id: str, title: str, scheduled_start: datetime.da
                 }
             }
         )
-        response = request.execute()
         return {
             "id": response["id"],
             "title": response["snippet"]["title"],
@@ -140,71 +194,47 @@ def update_broadcast(broadcast_id: str, title: str, scheduled_start: datetime.da
             "time": scheduled_start.strftime("%H:%M")
         }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"YouTube update failed: {e}")
+        raise api_error(e, "YouTube update failed")
 
 
-def delete_broadcast(broadcast_id: str):
+async def delete_broadcast(broadcast_id: str):
     """Delete a broadcast from YouTube."""
     try:
-        youtube = authenticate_youtube()
-        youtube.liveBroadcasts().delete(id=broadcast_id).execute()
+        await youtube_api.delete_broadcast(broadcast_id)
         return True
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to delete broadcast: {e}")
-
-
-def get_current_broadcast():
-    """Return the currently active or next starting broadcast."""
-    try:
-        youtube = authenticate_youtube()
-
-        # Try active broadcast
-        response = youtube.liveBroadcasts().list(
-            part="snippet,contentDetails,status",
-            broadcastStatus="active",
-            maxResults=1
-        ).execute()
-
-        if response.get("items"):
-            item = response["items"][0]
-            url = f"https://www.youtube.com/embed/{item['id']}"
-            with open("live_url.txt", "w") as f:
-                f.write(url)
-            return {
-                "id": item["id"],
-                "title": item["snippet"]["title"],
-                "url": url,
-                "status": item["status"]["lifeCycleStatus"]
-            }
-
-        # Check for broadcast starting soon
-        response = youtube.liveBroadcasts().list(
-            part="snippet,contentDetails,status",
-            broadcastStatus="upcoming",
-            maxResults=1,
-            orderBy="startTime"
-        ).execute()
-
-        if response.get("items"):
-            item = response["items"][0]
-            scheduled = datetime.datetime.strptime(
-                item["snippet"]["scheduledStartTime"], "%Y-%m-%dT%H:%M:%SZ"
-            )
-            now = datetime.datetime.utcnow()
-            if abs((scheduled - now).total_seconds()) < 300:
-                url = f"https://www.youtube.com/embed/{item['id']}"
-                with open("live_url.txt", "w") as f:
-                    f.write(url)
-                return {
-                    "id": item["id"],
-                    "title": item["snippet"]["title"],
-                    "url": url,
-                    "status": "starting_soon"
-                }
-
-        # Clear saved URL if nothing is live
-        with open("live_url.txt", "w") as f:
-            f.write("")
-        return None
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Could not get live broadcast: {e}")
+        raise api_error(e, "Failed to delete broadcast")
+
+
+def _live_summary(item):
+    scheduled = item["snippet"].get("scheduledStartTime")
+    return {
+        "id": item["id"],
+        "title": item["snippet"]["title"],
+        "url": f"https://www.youtube.com/embed/{item['id']}",
+        "status": item["status"]["lifeCycleStatus"],
+        "scheduled_start": datetime.datetime.strptime(scheduled, "%Y-%m-%dT%H:%M:%SZ") if scheduled else None
+    }
+
+
+async def fetch_live_snapshot():
+    """
+    Return {"active": ..., "upcoming": ...} for the live tracker:
+    the active broadcast if there is one, otherwise the next upcoming one.
+    """
+    response = await youtube_api.list_broadcasts(
+        part="snippet,status",
+        broadcastStatus="active",
+        maxResults=1
+    )
+    if response.get("items"):
+        return {"active": _live_summary(response["items"][0]), "upcoming": None}
+
+    response = await youtube_api.list_broadcasts(
+        part="snippet,status",
+        broadcastStatus="upcoming",
+        maxResults=1,
+        orderBy="startTime"
+    )
+    upcoming = _live_summary(response["items"][0]) if response.get("items") else None
+    return {"active": None, "upcoming": upcoming}
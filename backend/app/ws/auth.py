@@ -0,0 +1,42 @@
+# ws/auth.py
+
+from fastapi import WebSocket
+from services.auth_utils import verify_token
+
+# Browsers can't set headers on a WebSocket, and a URL ends up in access logs, so
+# the JWT is offered as a subprotocol instead: ["livestream.json", "bearer.<jwt>"].
+# It is never the subprotocol the server accepts (see codec.negotiate).
+BEARER_PREFIX = "bearer."
+
+
+def handshake_token(websocket: WebSocket):
+    for subprotocol in websocket.scope.get("subprotocols", ()):
+        if subprotocol.startswith(BEARER_PREFIX):
+            return subprotocol[len(BEARER_PREFIX):]
+    # Older clients; the log filter blanks it out of logged URLs
+    return websocket.query_params.get("token")
+
+
+async def authenticate(websocket: WebSocket):
+    """
+    Check the socket's token once, at the handshake, and attach the claims as
+    websocket.state.user (None for guests without a token). A bad or expired token
+    is rejected before the socket is accepted; returns False in that case.
+    """
+    token = handshake_token(websocket)
+    claims = None
+    if token:
+        claims = verify_token(token)
+        if claims is None:
+            await websocket.close(code=1008)  # before accept: the handshake gets a 403
+            return False
+    websocket.state.user = claims
+    return True
+
+
+def client_key(websocket: WebSocket):
+    """Who is on the other end: the user ID if signed in, else the client address."""
+    user = websocket.state.user
+    if user is not None and user.get("id") is not None:
+        return f"user:{user['id']}"
+    return websocket.client.host if websocket.client else ""
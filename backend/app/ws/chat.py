@@ -1,22 +1,87 @@
 # ws/chat.py
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+import json
+from typing import Annotated, Optional
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Path, Query, Response
+from config import settings
+from services.log import get_logger
+from services.metrics import chat_messages_in_total, ws_connections_total
+from ws import codec
+from ws.auth import authenticate, client_key
+from ws.chat_rooms import chat_hub, DEFAULT_ROOM, RoomLimitError
+from ws.flood import FloodGuard, FloodError
 
 router = APIRouter()
+logger = get_logger("chat")
 
-chat_clients = []
+RoomName = Annotated[str, Path(pattern=r"^[A-Za-z0-9_-]{1,64}$")]
 
-@router.websocket("/ws/chat")
-async def chat(websocket: WebSocket):
-    await websocket.accept()
-    chat_clients.append(websocket)
-    print("[CHAT] Client connected")
+flood_guard = FloodGuard(
+    "chat",
+    rate=settings.CHAT_RATE,
+    burst=settings.CHAT_BURST,
+    user_rate=settings.CHAT_CLIENT_RATE,
+    user_burst=settings.CHAT_CLIENT_BURST,
+    max_strikes=settings.WS_FLOOD_MAX_STRIKES,
+)
+
+async def serve_chat(websocket: WebSocket, room: str):
+    # Token (if any) is checked once here; messages need no crypto after this
+    if not await authenticate(websocket):
+        return
+    # JSON unless the client asked for a binary format via Sec-WebSocket-Protocol
+    fmt, subprotocol = codec.negotiate(websocket)
+    await websocket.accept(subprotocol=subprotocol)
+    try:
+        sub = chat_hub.join(room, websocket, fmt)
+    except RoomLimitError:
+        await websocket.close(code=1013)
+        return
+    conn = flood_guard.connect(client_key(websocket))
+    ws_connections_total.labels("chat").inc()
+    logger.info("Client connected", extra={"room": room})
 
     try:
         while True:
-            data = await websocket.receive_json()
-            print("[CHAT] Received:", data)
-            for client in chat_clients:
-                await client.send_json(data)
+            payload = await codec.receive(websocket)
+            # Over-limit messages are dropped before they cost a parse or a publish
+            if not flood_guard.admit(conn):
+                continue
+            try:
+                data = codec.decode(fmt, payload)
+            except Exception:
+                continue
+            if not isinstance(data, dict):
+                continue
+            message = str(data.get("message", ""))[:settings.CHAT_MAX_MESSAGE_CHARS]
+            if not message.strip():
+                continue
+            username = str(data.get("username") or "Anonymous")[:64]
+            # Goes out through the broker; delivery happens in frames, off this loop
+            await chat_hub.post(room, username, message)
+            chat_messages_in_total.inc()
     except WebSocketDisconnect:
-        chat_clients.remove(websocket)
-        print("[CHAT] Client disconnected")
+        logger.info("Client disconnected", extra={"room": room})
+    except FloodError as e:
+        logger.warning("Disconnecting flooding client: %s", e, extra={"room": room, "shed": flood_guard.shed})
+        await websocket.close(code=1008)
+    finally:
+        chat_hub.leave(room, sub)
+
+@router.websocket("/ws/chat/{room}")
+async def chat_room(websocket: WebSocket, room: RoomName):
+    await serve_chat(websocket, room)
+
+@router.websocket("/ws/chat")
+async def chat(websocket: WebSocket):
+    await serve_chat(websocket, DEFAULT_ROOM)
+
+@router.get("/chat/{room}/history")
+async def chat_history(
+    room: RoomName,
+    before: Optional[int] = None,
+    limit: Annotated[int, Query(ge=1, le=settings.CHAT_HISTORY_PAGE_MAX)] = 50,
+):
+    messages, next_cursor = chat_hub.history(room, before, limit)
+    # Messages are stored serialized; splice them in instead of re-encoding
+    body = '{"messages":[' + ",".join(messages) + '],"next":' + json.dumps(next_cursor) + "}"
+    return Response(content=body, media_type="application/json")
@@ -0,0 +1,63 @@
+# ws/chat_history.py
+
+import heapq
+from array import array
+
+
+class ChatHistory:
+    """
+    Fixed-size ring buffer of one room's recent messages.
+
+    Message IDs live in a flat int64 array and the serialized messages in a
+    preallocated list of the same length, so a room never holds more than
+    `capacity` messages (each already capped in size by the chat handler) no
+    matter how long it runs.
+
+    IDs come from one counter per room but messages published by different workers
+    can arrive slightly out of ID order, so paging goes by ID, not ring position.
+    """
+
+    __slots__ = ("capacity", "_ids", "_messages", "_count", "_head")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._ids = array("q", bytes(8 * capacity))
+        self._messages = [None] * capacity
+        self._count = 0
+        self._head = 0  # next slot to write
+
+    def __len__(self):
+        return self._count
+
+    def append(self, message_id: int, message: str):
+        self._ids[self._head] = message_id
+        self._messages[self._head] = message
+        self._head = (self._head + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def _newest_first(self):
+        for i in range(1, self._count + 1):
+            slot = (self._head - i) % self.capacity
+            yield self._ids[slot], self._messages[slot]
+
+    def last(self, k: int):
+        """Up to `k` most recent messages, oldest first."""
+        out = []
+        for _, message in self._newest_first():
+            if len(out) >= k:
+                break
+            out.append(message)
+        out.reverse()
+        return out
+
+    def before(self, cursor, limit: int):
+        """
+        Up to `limit` messages older than message ID `cursor` (newest page if None),
+        oldest first, plus the cursor for the page before that (None at the start).
+        """
+        older = [entry for entry in self._newest_first() if cursor is None or entry[0] < cursor]
+        page = heapq.nlargest(limit, older, key=lambda entry: entry[0])
+        page.reverse()
+        more = len(older) > len(page)
+        return [message for _, message in page], (page[0][0] if more else None)
@@ -0,0 +1,184 @@
+# ws/chat_rooms.py
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from fastapi import WebSocket
+from config import settings
+from services.broker import broker
+from services.log import get_logger
+from services.metrics import chat_frames_total, chat_messages_out_total
+from ws.chat_history import ChatHistory
+from ws.codec import JSON, Message
+from ws.fanout import FanOut
+
+logger = get_logger("chat")
+
+DEFAULT_ROOM = "default"
+
+
+class RoomLimitError(Exception):
+    pass
+
+
+class ChatRoom:
+    """
+    One chat room on this worker: its subscribers and its recent history.
+
+    Incoming messages (already serialized, IDs kept alongside) are collected for one
+    frame interval and then sent as a single JSON array, built once and queued for
+    every subscriber.
+    Sent messages go into the history, so a replay never overlaps the next frame.
+    """
+
+    __slots__ = ("name", "clients", "history", "pending", "_flush_handle")
+
+    def __init__(self, name: str):
+        self.name = name
+        # Chat is a stream, not a state: a client that can't keep up misses frames
+        self.clients = FanOut(
+            f"chat:{name}",
+            queue_size=settings.CHAT_SEND_QUEUE,
+            policy="drop",
+            send_timeout=settings.WS_SEND_TIMEOUT,
+            max_strikes=settings.WS_MAX_STRIKES,
+        )
+        self.history = ChatHistory(settings.CHAT_HISTORY_SIZE)
+        self.pending = []
+        self._flush_handle = None
+
+    def add(self, message_id: int, message: str):
+        self.pending.append((message_id, message))
+        if len(self.pending) >= settings.CHAT_FRAME_MAX:
+            self.flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                settings.CHAT_FRAME_MS / 1000, self.flush
+            )
+
+    def flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self.pending:
+            return
+        # Messages are JSON already; joining them is cheaper than re-encoding
+        frame = Message(text="[" + ",".join(message for _, message in self.pending) + "]")
+        for message_id, message in self.pending:
+            self.history.append(message_id, message)
+        chat_frames_total.inc()
+        chat_messages_out_total.inc(len(self.pending) * len(self.clients))
+        self.pending = []
+        self.clients.publish(frame)
+
+    def replay(self, sub):
+        """Queue the last CHAT_REPLAY_COUNT messages for a newly joined subscriber."""
+        recent = self.history.last(settings.CHAT_REPLAY_COUNT)
+        if recent:
+            self.clients.send(sub, Message(text="[" + ",".join(recent) + "]"))
+
+    def close(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self.clients.retire()
+
+
+class ChatHub:
+    """
+    Chat rooms on this worker. Messages are published to the broker and come back
+    through one subscription per worker, which hands them to the local room for
+    framing, so every worker's viewers see every message. Senders only wait for the
+    publish, never for delivery.
+
+    Every worker keeps every room it hears about (so any of them can serve history),
+    up to `max_rooms`; past that, the least recently active room without local
+    subscribers is dropped along with its history. When every room has
+    subscribers, new rooms are refused (and messages for them not kept here).
+    """
+
+    def __init__(self, max_rooms: int):
+        self.max_rooms = max_rooms
+        self.rooms = OrderedDict()  # name -> ChatRoom, least recently active first
+        self._task = None
+
+    def _room(self, room: str) -> ChatRoom:
+        chat_room = self.rooms.get(room)
+        if chat_room is not None:
+            self.rooms.move_to_end(room)
+            return chat_room
+        if len(self.rooms) >= self.max_rooms:
+            for name, idle_room in self.rooms.items():
+                if not len(idle_room.clients):
+                    idle_room.close()
+                    del self.rooms[name]
+                    break
+            else:
+                raise RoomLimitError(f"Too many active chat rooms ({self.max_rooms})")
+        chat_room = self.rooms[room] = ChatRoom(room)
+        return chat_room
+
+    def join(self, room: str, websocket: WebSocket, format: str = JSON):
+        chat_room = self._room(room)
+        sub = chat_room.clients.subscribe(websocket, format=format)
+        chat_room.replay(sub)
+        return sub
+
+    def leave(self, room: str, sub):
+        chat_room = self.rooms.get(room)
+        if chat_room is not None:
+            chat_room.clients.unsubscribe(sub)
+            # Rooms with history stay (evictable) so it can still be served
+            if not len(chat_room.clients) and not len(chat_room.history) and not chat_room.pending:
+                chat_room.close()
+                del self.rooms[room]
+
+    def history(self, room: str, before: int = None, limit: int = 50):
+        """A page of `room`'s history older than message ID `before`, and the next cursor."""
+        chat_room = self.rooms.get(room)
+        if chat_room is None:
+            return [], None
+        return chat_room.history.before(before, limit)
+
+    async def post(self, room: str, username: str, message: str):
+        # One counter per room in the broker: unique and increasing across workers
+        message_id = await broker.next_id(f"chat:{room}:next_id")
+        data = {"id": message_id, "username": username, "message": message, "ts": round(time.time(), 3)}
+        # "<id> <json>": the ID travels next to the message so nothing re-parses it
+        await broker.publish(f"chat:{room}", f"{message_id} {json.dumps(data)}")
+
+    async def _relay(self):
+        while True:
+            try:
+                async for chan, payload in broker.subscribe("chat:*"):
+                    message_id, _, message = payload.partition(" ")
+                    try:
+                        chat_room = self._room(chan[len("chat:"):])
+                    except RoomLimitError:
+                        # Every room here has viewers; a room none of them watch isn't kept
+                        continue
+                    chat_room.add(int(message_id), message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Broker subscription lost: %s", e)
+                await asyncio.sleep(1)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._relay())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for chat_room in self.rooms.values():
+            chat_room.close()
+
+
+chat_hub = ChatHub(max_rooms=settings.CHAT_HISTORY_ROOMS)
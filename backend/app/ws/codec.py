@@ -0,0 +1,85 @@
+# ws/codec.py
+
+import json
+from fastapi import WebSocket, WebSocketDisconnect
+
+try:
+    import msgpack
+except ImportError:  # optional: only needed for the msgpack subprotocol
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:  # optional: only needed for the cbor subprotocol
+    cbor2 = None
+
+JSON = "json"
+
+# WebSocket subprotocol -> wire format. Clients that ask for none of these get JSON.
+SUBPROTOCOLS = {"livestream.msgpack": "msgpack", "livestream.cbor": "cbor", "livestream.json": JSON}
+
+_ENCODERS = {JSON: json.dumps}
+_DECODERS = {JSON: json.loads}
+if msgpack is not None:
+    _ENCODERS["msgpack"] = msgpack.packb
+    _DECODERS["msgpack"] = msgpack.unpackb
+if cbor2 is not None:
+    _ENCODERS["cbor"] = cbor2.dumps
+    _DECODERS["cbor"] = cbor2.loads
+
+
+class Message:
+    """
+    An outgoing message, encoded at most once per wire format however many sockets
+    it goes to. Messages built from JSON text keep it as-is and are only decoded if
+    a binary-format client needs them.
+    """
+
+    __slots__ = ("_data", "_encoded")
+
+    def __init__(self, data=None, text: str = None):
+        self._data = data
+        self._encoded = {} if text is None else {JSON: text}
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = json.loads(self._encoded[JSON])
+        return self._data
+
+    def encode(self, fmt: str = JSON):
+        encoded = self._encoded.get(fmt)
+        if encoded is None:
+            encoded = self._encoded[fmt] = _ENCODERS[fmt](self.data)
+        return encoded
+
+
+def negotiate(websocket: WebSocket):
+    """
+    Pick the first subprotocol the client offered that we can encode.
+    Returns (format, subprotocol to accept with, or None). Other offers, like the
+    bearer token (ws/auth.py), are never echoed back; clients sending one should
+    also offer "livestream.json", since browsers drop a socket whose offers were
+    all refused.
+    """
+    for subprotocol in websocket.scope.get("subprotocols", ()):
+        fmt = SUBPROTOCOLS.get(subprotocol)
+        if fmt in _ENCODERS:
+            return fmt, subprotocol
+    return JSON, None
+
+
+async def receive(websocket: WebSocket):
+    """Next text or binary payload from the client, without decoding it."""
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000))
+    text = message.get("text")
+    return text if text is not None else message.get("bytes")
+
+
+def decode(fmt: str, payload):
+    """Decode a client payload; text frames are JSON whatever the connection's format."""
+    if isinstance(payload, str) or fmt == JSON:
+        return json.loads(payload)
+    return _DECODERS[fmt](payload)
@@ -0,0 +1,155 @@
+# ws/fanout.py
+
+import asyncio
+import time
+from fastapi import WebSocket
+from services.log import get_logger
+from services.metrics import fanout_publish_seconds
+from ws.codec import JSON, Message
+
+logger = get_logger("ws")
+
+# kind ("score", "chat") -> [dropped, disconnected] of fan-outs whose rooms are gone;
+# /metrics adds the live rooms' own counts to these, so totals survive room removal
+retired_counts = {}
+
+
+class Subscriber:
+    __slots__ = ("websocket", "format", "queue", "task", "dropped", "strikes", "closed")
+
+    def __init__(self, websocket: WebSocket, queue_size: int, format: str = JSON):
+        self.websocket = websocket
+        self.format = format  # wire format negotiated for this socket
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.task = None
+        self.dropped = 0   # messages this client never got
+        self.strikes = 0   # overflows in a row
+        self.closed = False
+
+
+class FanOut:
+    """
+    Sends one pre-serialized message to many sockets. A codec.Message is encoded
+    once per wire format in use, the first time a subscriber needs that format.
+
+    Every subscriber has its own bounded queue and writer task, so publish() never
+    waits on a socket and one slow viewer can't hold up the rest. When a queue is
+    full the subscriber is behind:
+      - "latest": its backlog is thrown away and it skips straight to the new message,
+        or to `resync()` if given (e.g. a fresh snapshot when messages are deltas)
+      - "drop": the new message is dropped for that subscriber
+    A subscriber that overflows `max_strikes` times in a row, or whose send takes
+    longer than `send_timeout`, is disconnected.
+    """
+
+    def __init__(self, name: str, queue_size: int, policy: str = "latest",
+                 send_timeout: float = 5.0, max_strikes: int = 50, resync=None):
+        if policy not in ("latest", "drop"):
+            raise ValueError(f"Unknown overflow policy: {policy}")
+        self.name = name
+        self.queue_size = queue_size
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.max_strikes = max_strikes
+        self.resync = resync
+        self.subscribers = set()
+        self.dropped = 0
+        self.disconnected = 0
+        self._closing = set()  # close tasks for kicked subscribers, kept until they finish
+        # Kind of room ("score", "chat"); its latency series is looked up once
+        self.kind = name.split(":", 1)[0]
+        self._publish_seconds = fanout_publish_seconds.labels(self.kind)
+
+    def __len__(self):
+        return len(self.subscribers)
+
+    def subscribe(self, websocket: WebSocket, initial=None, format: str = JSON) -> Subscriber:
+        sub = Subscriber(websocket, self.queue_size, format)
+        if initial is not None:
+            sub.queue.put_nowait(initial)
+        sub.task = asyncio.create_task(self._writer(sub))
+        self.subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber):
+        if sub.closed:
+            return
+        sub.closed = True
+        self.subscribers.discard(sub)
+        if sub.task is not None and sub.task is not asyncio.current_task():
+            sub.task.cancel()
+
+    def send(self, sub: Subscriber, message):
+        """Queue a message for one subscriber. Returns False if it overflowed."""
+        if sub.closed:
+            return False
+        try:
+            sub.queue.put_nowait(message)
+            sub.strikes = 0
+            return True
+        except asyncio.QueueFull:
+            pass
+
+        sub.strikes += 1
+        if self.policy == "latest":
+            sub.dropped += sub.queue.qsize()
+            self.dropped += sub.queue.qsize()
+            while not sub.queue.empty():
+                sub.queue.get_nowait()
+            sub.queue.put_nowait(self.resync() if self.resync else message)
+        else:
+            sub.dropped += 1
+            self.dropped += 1
+        if sub.strikes >= self.max_strikes:
+            self._kick(sub)
+        return False
+
+    def publish(self, message):
+        """Queue `message` for every subscriber. Never blocks."""
+        start = time.perf_counter()
+        # Copy: _kick may remove subscribers while we iterate
+        for sub in tuple(self.subscribers):
+            self.send(sub, message)
+        self._publish_seconds.observe(time.perf_counter() - start)
+
+    def retire(self):
+        """Fold this fan-out's counts into retired_counts; call when its room is removed."""
+        totals = retired_counts.setdefault(self.kind, [0, 0])
+        totals[0] += self.dropped
+        totals[1] += self.disconnected
+        self.dropped = self.disconnected = 0
+
+    def _kick(self, sub: Subscriber):
+        self.disconnected += 1
+        self.unsubscribe(sub)
+        # The event loop only keeps weak references to tasks; hold on until it finishes
+        task = asyncio.create_task(self._close(sub.websocket))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _close(self, websocket: WebSocket):
+        try:
+            await websocket.close(code=1013)  # try again later
+        except Exception:
+            pass
+
+    async def _writer(self, sub: Subscriber):
+        websocket = sub.websocket
+        try:
+            # wait_for can swallow a cancel that lands as the send completes, so
+            # don't rely on cancellation alone to stop once unsubscribed
+            while not sub.closed:
+                message = await sub.queue.get()
+                if isinstance(message, Message):
+                    message = message.encode(sub.format)
+                if isinstance(message, bytes):
+                    await asyncio.wait_for(websocket.send_bytes(message), self.send_timeout)
+                else:
+                    await asyncio.wait_for(websocket.send_text(message), self.send_timeout)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.info("Dropping client: %r", e, extra={"room": self.name})
+            self.disconnected += 1
+            self.unsubscribe(sub)
+            await self._close(websocket)
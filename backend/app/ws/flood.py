@@ -0,0 +1,102 @@
+# ws/flood.py
+
+import time
+
+# Every FloodGuard, for the /metrics endpoint
+guards = []
+
+
+class FloodError(Exception):
+    pass
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `burst`."""
+
+    __slots__ = ("rate", "burst", "tokens", "stamp")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.stamp = now
+
+    def take(self, now: float) -> bool:
+        tokens = self.tokens + (now - self.stamp) * self.rate
+        self.tokens = tokens if tokens < self.burst else self.burst
+        self.stamp = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def full_at(self, now: float) -> bool:
+        return self.tokens + (now - self.stamp) * self.rate >= self.burst
+
+
+class Connection:
+    __slots__ = ("bucket", "user_bucket", "strikes", "shed")
+
+    def __init__(self, bucket: TokenBucket, user_bucket: TokenBucket):
+        self.bucket = bucket
+        self.user_bucket = user_bucket
+        self.strikes = 0   # messages shed in a row
+        self.shed = 0
+
+
+class FloodGuard:
+    """
+    Limits how fast clients may send on a socket, checked before a message is even
+    parsed. Each connection has its own token bucket, and all connections of the
+    same user share a second one, so opening more sockets doesn't buy more rate.
+    Messages over either limit are dropped; `max_strikes` drops in a row raise
+    FloodError and the caller disconnects the client.
+
+    Idle user buckets are forgotten once they have refilled, which keeps the table
+    down to users that sent something recently.
+    """
+
+    def __init__(self, name: str, rate: float, burst: float, user_rate: float,
+                 user_burst: float, max_strikes: int, max_users: int = 10000):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.max_strikes = max_strikes
+        self.max_users = max_users
+        self.users = {}  # user key -> TokenBucket
+        self.admitted = 0
+        self.shed = 0
+        self.disconnected = 0
+        guards.append(self)
+
+    def connect(self, user: str) -> Connection:
+        now = time.monotonic()
+        user_bucket = self.users.get(user)
+        if user_bucket is None:
+            if len(self.users) >= self.max_users:
+                self._prune(now)
+            user_bucket = self.users[user] = TokenBucket(self.user_rate, self.user_burst, now)
+        return Connection(TokenBucket(self.rate, self.burst, now), user_bucket)
+
+    def _prune(self, now: float):
+        for user in [u for u, bucket in self.users.items() if bucket.full_at(now)]:
+            del self.users[user]
+
+    def admit(self, conn: Connection) -> bool:
+        """True if the message may be handled, False if it should be dropped."""
+        now = time.monotonic()
+        # Charge the user bucket only for messages the connection bucket lets through
+        if conn.bucket.take(now) and conn.user_bucket.take(now):
+            conn.strikes = 0
+            self.admitted += 1
+            return True
+
+        conn.strikes += 1
+        conn.shed += 1
+        self.shed += 1
+        if conn.strikes >= self.max_strikes:
+            self.disconnected += 1
+            raise FloodError(f"{self.name}: {conn.strikes} messages over the rate limit in a row")
+        return False
@@ -0,0 +1,326 @@
+# ws/score_log.py
+
+import asyncio
+import fcntl
+import mmap
+import os
+import struct
+import time
+from contextlib import asynccontextmanager
+from config import settings
+from services.log import get_logger
+
+logger = get_logger("score")
+
+MAGIC = b"SCORELOG"
+# magic, record size, record count
+HEADER = struct.Struct("<8sIxxxxQ")
+# timestamp, version, field, value (score, or index into the game's name table);
+# scores are int64 like the broker's HINCRBY, so any score the broker holds fits
+RECORD = struct.Struct("<dqBxxxxxxxq")
+
+FIELDS = ("home", "away", "home_name", "away_name")
+FIELD_CODES = {name: code for code, name in enumerate(FIELDS)}
+NAME_FIELDS = frozenset((FIELD_CODES["home_name"], FIELD_CODES["away_name"]))
+
+
+class ScoreLog:
+    """
+    Append-only log of one game's score changes: fixed-size records in a
+    memory-mapped file, one per changed field, each holding the field's new value.
+
+    Appending is a struct pack into the map (the file grows in chunks of
+    `chunk_records`), so it can sit on the update path. Team names don't fit a
+    fixed record, so they go into a small side file and records hold their index.
+    Every `checkpoint_every` records the running state is remembered, which keeps
+    "state at time T" to a binary search plus a short replay.
+
+    Opening replays the whole file, so do it off the event loop. A `read_only` log
+    maps an existing file as it is at that moment, takes no lock and never writes.
+    """
+
+    def __init__(self, path: str, chunk_records: int = 65536, checkpoint_every: int = 1024,
+                 read_only: bool = False):
+        self.path = path
+        self.chunk_records = chunk_records
+        self.checkpoint_every = checkpoint_every
+        self.read_only = read_only
+        self._names_file = None
+        if read_only:
+            self._fd = os.open(path, os.O_RDONLY)
+            try:
+                self._map = mmap.mmap(self._fd, 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                os.close(self._fd)
+                raise ValueError(f"{path} is not a score log")
+        else:
+            self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                # One writer per file; a second process would corrupt the count
+                fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(self._fd)
+                raise
+            if os.fstat(self._fd).st_size < HEADER.size:
+                os.ftruncate(self._fd, HEADER.size + RECORD.size * chunk_records)
+                self._map = mmap.mmap(self._fd, 0)
+                HEADER.pack_into(self._map, 0, MAGIC, RECORD.size, 0)
+            else:
+                self._map = mmap.mmap(self._fd, 0)
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise ValueError(f"{path} is not a score log")
+        magic, record_size, self.count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or record_size != RECORD.size:
+            self.close()
+            raise ValueError(f"{path} is not a score log")
+        # A writer in another process may have counted records past our mapping
+        self.count = min(self.count, (len(self._map) - HEADER.size) // RECORD.size)
+
+        self.names = []
+        self._name_ids = {}
+        if read_only:
+            if os.path.exists(path + ".names"):
+                with open(path + ".names", encoding="utf-8") as f:
+                    for line in f:
+                        self._name_id(line.rstrip("\n"), write=False)
+        else:
+            self._names_file = open(path + ".names", "a+", encoding="utf-8")
+            self._names_file.seek(0)
+            for line in self._names_file:
+                self._name_id(line.rstrip("\n"), write=False)
+
+        self._checkpoints = []  # (record index, version, state tuple) before that record
+        self._state = [0, 0, None, None]
+        self._version = 0
+        for i in range(self.count):
+            self._advance(i, *RECORD.unpack_from(self._map, HEADER.size + i * RECORD.size))
+
+    def _name_id(self, name: str, write: bool = True):
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self.names)
+            self.names.append(name)
+            if write:
+                self._names_file.write(name.replace("\n", " ") + "\n")
+                self._names_file.flush()
+        return name_id
+
+    def _advance(self, index, ts, version, field, value):
+        if index % self.checkpoint_every == 0:
+            self._checkpoints.append((index, self._version, tuple(self._state)))
+        self._state[field] = value
+        self._version = version
+
+    def _grow(self):
+        self._map.close()
+        os.ftruncate(self._fd, HEADER.size + RECORD.size * (self.count + self.chunk_records))
+        self._map = mmap.mmap(self._fd, 0)
+
+    def append(self, ts: float, version: int, changes: dict):
+        """Record the new values of the changed fields (unknown fields are ignored)."""
+        for name, value in changes.items():
+            field = FIELD_CODES.get(name)
+            if field is None:
+                continue
+            if field in NAME_FIELDS:
+                value = self._name_id(str(value))
+            offset = HEADER.size + self.count * RECORD.size
+            if offset + RECORD.size > len(self._map):
+                self._grow()
+            RECORD.pack_into(self._map, offset, ts, version, field, value)
+            self._advance(self.count, ts, version, field, value)
+            self.count += 1
+        HEADER.pack_into(self._map, 0, MAGIC, RECORD.size, self.count)
+
+    def _record(self, index: int):
+        return RECORD.unpack_from(self._map, HEADER.size + index * RECORD.size)
+
+    def _bisect(self, ts: float, after: bool = True):
+        """Index of the first record later than `ts` (or at/after it if not `after`)."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            record_ts = self._record(mid)[0]
+            if record_ts < ts or (after and record_ts == ts):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _decode(self, state):
+        return {name: (self.names[value] if code in NAME_FIELDS else value)
+                for code, (name, value) in enumerate(zip(FIELDS, state)) if value is not None}
+
+    def state_at(self, ts: float):
+        """(version, fields) as of time `ts`; fields never set are left out."""
+        end = self._bisect(ts)
+        start, version, state = 0, 0, (0, 0, None, None)
+        for checkpoint in reversed(self._checkpoints):
+            if checkpoint[0] <= end:
+                start, version, state = checkpoint
+                break
+        state = list(state)
+        for i in range(start, end):
+            _, version, field, value = self._record(i)
+            state[field] = value
+        return version, self._decode(state)
+
+    def events(self, start_ts: float, end_ts: float, limit: int = 1000):
+        """Changes with start_ts <= ts < end_ts, oldest first."""
+        out = []
+        i = self._bisect(start_ts, after=False)
+        while i < self.count and len(out) < limit:
+            ts, version, field, value = self._record(i)
+            if ts >= end_ts:
+                break
+            out.append({"ts": ts, "v": version, "field": FIELDS[field],
+                        "value": self.names[value] if field in NAME_FIELDS else value})
+            i += 1
+        return out
+
+    def first_ts(self):
+        return self._record(0)[0] if self.count else None
+
+    def compact(self, before_ts: float):
+        """
+        Squash everything before `before_ts` into one record per field (its value at
+        that point), keeping later records as they are. Written to a new file and
+        swapped in, so a crash leaves either the old log or the new one.
+        """
+        cut = self._bisect(before_ts, after=False)
+        last = {}
+        for i in range(cut):
+            record = self._record(i)
+            last[record[2]] = record
+        kept = sorted(last.values(), key=lambda r: (r[0], r[1]))
+        if len(kept) >= cut:
+            return 0
+
+        tmp = self.path + ".compact"
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, RECORD.size, len(kept) + self.count - cut))
+            for record in kept:
+                f.write(RECORD.pack(*record))
+            f.write(self._map[HEADER.size + cut * RECORD.size:HEADER.size + self.count * RECORD.size])
+            f.flush()
+            os.fsync(f.fileno())
+        self.close()
+        os.replace(tmp, self.path)
+        self.__init__(self.path, self.chunk_records, self.checkpoint_every)
+        return cut - len(kept)
+
+    def flush(self):
+        self._map.flush()
+
+    def close(self):
+        if self._map.closed:
+            return
+        if not self.read_only:
+            self._map.flush()
+        self._map.close()
+        if self._names_file is not None:
+            self._names_file.close()
+        os.close(self._fd)  # also releases the lock
+
+
+class ScoreLogs:
+    """
+    One ScoreLog per game under `directory` (disabled when it is empty). A room's
+    log is opened when the room is loaded and closed when the room is swept;
+    closing first compacts changes older than `keep_detail` seconds.
+    """
+
+    def __init__(self, directory: str, keep_detail: float):
+        self.directory = directory
+        self.keep_detail = keep_detail
+        self.logs = {}      # room_id -> ScoreLog, or False if another process owns it
+        self._closing = {}  # room_id -> task compacting and closing its previous log
+
+    def _path(self, room_id: str):
+        return os.path.join(self.directory, f"{room_id}.log")
+
+    def _open_writer(self, room_id: str):
+        os.makedirs(self.directory, exist_ok=True)
+        return ScoreLog(self._path(room_id), chunk_records=settings.SCORE_LOG_CHUNK,
+                        checkpoint_every=settings.SCORE_LOG_CHECKPOINT)
+
+    async def open(self, room_id: str):
+        """Open the log a room appends to; the replay runs in a thread."""
+        if not self.directory or room_id in self.logs:
+            return
+        closing = self._closing.get(room_id)
+        if closing is not None:
+            # The file is still locked by the close of the room's last log
+            await asyncio.shield(closing)
+        try:
+            log = await asyncio.to_thread(self._open_writer, room_id)
+        except (OSError, ValueError) as e:
+            # Most likely another worker owns this game's log
+            logger.warning("Not logging %s: %s", room_id, e)
+            log = False
+        if room_id in self.logs:
+            if log:
+                log.close()
+            return
+        self.logs[room_id] = log
+
+    @asynccontextmanager
+    async def reader(self, room_id: str):
+        """
+        The game's log for reading: the one this worker has open, else the file
+        opened read-only (in a thread), else None. Never creates anything.
+        """
+        log = self.logs.get(room_id)
+        if log:
+            yield log
+            return
+        log = None
+        if self.directory and os.path.exists(self._path(room_id)):
+            try:
+                log = await asyncio.to_thread(ScoreLog, self._path(room_id),
+                                              checkpoint_every=settings.SCORE_LOG_CHECKPOINT, read_only=True)
+            except (OSError, ValueError) as e:
+                logger.warning("Can't read score log for %s: %s", room_id, e)
+        try:
+            yield log
+        finally:
+            if log is not None:
+                log.close()
+
+    def append(self, room_id: str, ts: float, version: int, changes: dict):
+        log = self.logs.get(room_id)
+        if log:
+            try:
+                log.append(ts, version, changes)
+            except (struct.error, OSError) as e:
+                # The update is applied and published already; only its history is lost
+                logger.warning("Not logging version %d of %s: %s", version, room_id, e)
+
+    def release(self, room_id: str):
+        """Compact and close a swept room's log in the background."""
+        log = self.logs.pop(room_id, None)
+        if log:
+            task = self._closing[room_id] = asyncio.create_task(asyncio.to_thread(self._retire, log))
+            task.add_done_callback(lambda t: self._closing.get(room_id) is t and self._closing.pop(room_id))
+
+    def _retire(self, log: ScoreLog):
+        try:
+            if self.keep_detail > 0:
+                squashed = log.compact(time.time() - self.keep_detail)
+                if squashed:
+                    logger.info("Compacted %s: %d records squashed", log.path, squashed)
+        except (OSError, ValueError) as e:
+            logger.warning("Compacting %s failed: %s", log.path, e)
+        finally:
+            log.close()
+
+    async def close(self):
+        await asyncio.gather(*self._closing.values(), return_exceptions=True)
+        for log in self.logs.values():
+            if log:
+                log.close()
+        self.logs.clear()
+
+
+score_logs = ScoreLogs(settings.SCORE_LOG_DIR, keep_detail=settings.SCORE_LOG_KEEP_DETAIL)
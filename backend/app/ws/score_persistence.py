@@ -0,0 +1,107 @@
+# ws/score_persistence.py
+
+import asyncio
+import time
+from config import settings
+from services.broker import broker
+from services.log import get_logger
+from services.score_store import create_score_store
+from ws.score_rooms import state_key
+
+logger = get_logger("score")
+
+
+class ScoreWriteBehind:
+    """
+    Saves scoreboards to a ScoreStore without putting the database on the update path.
+
+    Updates only mark their room dirty; every `interval` seconds the current state of
+    each dirty room is written in batched upserts of at most `batch_size` rows, so
+    any number of taps in between costs one row write. A flush that fails or takes
+    longer than `timeout` leaves its rooms dirty for the next one.
+
+    On startup the saved states are loaded in one query and seeded into the broker
+    (where a newer state, e.g. in Redis, wins), so rooms come back where they were.
+    """
+
+    def __init__(self, store, interval: float, batch_size: int, timeout: float):
+        self.store = store
+        self.interval = interval
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.dirty = {}  # room_id -> ScoreRoom
+        self.saved = {}  # room_id -> last version written
+        self.flushes = 0
+        self.rows_written = 0
+        self.failures = 0
+        self._task = None
+
+    def mark(self, room):
+        if self.store is not None:
+            self.dirty[room.room_id] = room
+
+    async def restore(self):
+        started = time.perf_counter()
+        rows = await self.store.load_all()
+        seeded = 0
+        for room_id, (version, state) in rows.items():
+            self.saved[room_id] = version
+            if await broker.seed_state(state_key(room_id), version, state):
+                seeded += 1
+        logger.info("Restored %d/%d scoreboard(s) in %.1f ms", seeded, len(rows), (time.perf_counter() - started) * 1000)
+
+    async def flush(self):
+        if not self.dirty:
+            return
+        rooms, self.dirty = self.dirty, {}
+        # Copy the state now; the rooms keep changing while the write is in flight
+        rows = [(room_id, room.score.version, dict(room.score.state))
+                for room_id, room in rooms.items()
+                if room.score.version > self.saved.get(room_id, 0)]
+        for i in range(0, len(rows), self.batch_size):
+            batch = rows[i:i + self.batch_size]
+            try:
+                await asyncio.wait_for(self.store.upsert_many(batch), self.timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                logger.warning("Saving %d scoreboard(s) failed: %r", len(batch), e)
+                for room_id, _, _ in rows[i:]:
+                    self.dirty.setdefault(room_id, rooms[room_id])
+                return
+            for room_id, version, _ in batch:
+                self.saved[room_id] = version
+            self.rows_written += len(batch)
+        self.flushes += 1
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    async def start(self):
+        if self.store is None or self._task is not None:
+            return
+        await self.restore()
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.store is not None:
+            await self.flush()
+            await self.store.close()
+
+
+score_writer = ScoreWriteBehind(
+    create_score_store(settings.SCORE_STORE_URL),
+    interval=settings.SCORE_FLUSH_INTERVAL,
+    batch_size=settings.SCORE_FLUSH_BATCH,
+    timeout=settings.SCORE_FLUSH_TIMEOUT,
+)
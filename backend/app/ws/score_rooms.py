@@ -0,0 +1,212 @@
+# ws/score_rooms.py
+
+import asyncio
+import json
+import time
+from config import settings
+from services.broker import broker
+from services.log import get_logger
+from ws.fanout import FanOut
+from ws.score_log import score_logs
+from ws.score_state import ScoreState
+
+logger = get_logger("score")
+
+DEFAULT_SCOREBOARD = {
+    "home": 0,
+    "away": 0,
+    "home_name": "Home",
+    "away_name": "Away"
+}
+INT_FIELDS = ("home", "away")
+
+# Room used by the original single-game endpoints (/ws/score, /score/update, ...)
+DEFAULT_ROOM = "default"
+
+
+class RoomLimitError(Exception):
+    pass
+
+
+def state_key(room_id: str):
+    return f"score:{room_id}:state"
+
+
+def channel(room_id: str):
+    return f"score:{room_id}"
+
+
+def decode_state(values: dict):
+    """Broker hashes hold strings; turn them back into a full scoreboard."""
+    state = dict(DEFAULT_SCOREBOARD)
+    for field, value in values.items():
+        state[field] = int(value) if field in INT_FIELDS else value
+    return state
+
+
+class ScoreRoom:
+    """
+    One game's scoreboard and this worker's viewers of it.
+
+    Updates go through the broker; every worker (this one included) applies them
+    when they come back on the room's channel and pushes them to its own viewers.
+    """
+
+    __slots__ = ("room_id", "score", "clients", "last_active")
+
+    def __init__(self, room_id: str, version: int, state: dict):
+        self.room_id = room_id
+        self.score = ScoreState(state, backlog_size=settings.SCORE_BACKLOG, epoch=broker.epoch)
+        self.score.version = version
+        # A viewer that falls behind is resynced with a snapshot of this room
+        self.clients = FanOut(
+            f"score:{room_id}",
+            queue_size=settings.SCORE_SEND_QUEUE,
+            policy="latest",
+            send_timeout=settings.WS_SEND_TIMEOUT,
+            max_strikes=settings.WS_MAX_STRIKES,
+            resync=self.score.snapshot,
+        )
+        self.last_active = time.monotonic()
+
+    async def update(self, incr: dict = None, set: dict = None):
+        """Apply an update through the broker; returns the resulting scoreboard."""
+        self.last_active = time.monotonic()
+        version, changes = await broker.apply_update(state_key(self.room_id), channel(self.room_id), incr, set)
+        # Apply it here right away; the copy that comes back through the relay is then a no-op
+        if not self.apply_remote(version, changes):
+            await self.resync()
+        return self.score.state
+
+    def apply_remote(self, version: int, changes: dict):
+        """Apply a delta from the broker. Returns False if we missed one and need a resync."""
+        self.last_active = time.monotonic()
+        if version <= self.score.version:
+            return True
+        if version != self.score.version + 1:
+            return False
+        self.clients.publish(self.score.apply(changes, version))
+        score_logs.append(self.room_id, time.time(), version, changes)
+        return True
+
+    async def resync(self):
+        version, values = await broker.get_state(state_key(self.room_id))
+        if version > self.score.version:
+            self.score.reset(decode_state(values), version)
+            score_logs.append(self.room_id, time.time(), version, self.score.state)
+            self.clients.publish(self.score.snapshot())
+
+    def idle_for(self, now: float):
+        if len(self.clients):
+            return 0.0
+        return now - self.last_active
+
+
+class ScoreRooms:
+    """
+    Scoreboards keyed by broadcast ID. Rooms nobody watches or updates are dropped
+    after `idle_ttl` (except the default room, which the legacy endpoints rely on);
+    the state itself lives on in the broker.
+    """
+
+    def __init__(self, idle_ttl: float, max_rooms: int):
+        self.idle_ttl = idle_ttl
+        self.max_rooms = max_rooms
+        self.rooms = {}
+        self._loading = {}
+        self._tasks = []
+        self._resyncs = set()
+
+    async def get(self, room_id: str) -> ScoreRoom:
+        room = self.rooms.get(room_id)
+        if room is not None:
+            return room
+        task = self._loading.get(room_id)
+        if task is None:
+            if len(self.rooms) + len(self._loading) >= self.max_rooms:
+                self.sweep()
+                if len(self.rooms) + len(self._loading) >= self.max_rooms:
+                    raise RoomLimitError(f"Too many active scoreboards ({self.max_rooms})")
+            task = self._loading[room_id] = asyncio.create_task(self._load(room_id))
+        return await asyncio.shield(task)
+
+    async def find(self, room_id: str):
+        """
+        The room for a scoreboard that exists: open on this worker, or with state
+        in the broker (scored through another worker). None for anything else, so
+        reads of made-up IDs never take a room.
+        """
+        if room_id in self.rooms or room_id in self._loading or room_id == DEFAULT_ROOM:
+            return await self.get(room_id)
+        version, _ = await broker.get_state(state_key(room_id))
+        if not version:
+            return None
+        return await self.get(room_id)
+
+    async def _load(self, room_id: str):
+        try:
+            version, values = await broker.get_state(state_key(room_id))
+            await score_logs.open(room_id)
+            room = self.rooms[room_id] = ScoreRoom(room_id, version, decode_state(values))
+            return room
+        finally:
+            del self._loading[room_id]
+
+    def sweep(self):
+        now = time.monotonic()
+        idle = [rid for rid, room in self.rooms.items()
+                if rid != DEFAULT_ROOM and room.idle_for(now) > self.idle_ttl]
+        for rid in idle:
+            self.rooms.pop(rid).clients.retire()
+            score_logs.release(rid)
+        return idle
+
+    async def _sweep_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            removed = self.sweep()
+            if removed:
+                logger.info("Dropped %d idle scoreboard(s)", len(removed))
+
+    async def _relay(self):
+        """One broker subscription for every room on this worker."""
+        while True:
+            try:
+                async for chan, message in broker.subscribe("score:*"):
+                    room = self.rooms.get(chan[len("score:"):])
+                    if room is None:
+                        continue
+                    data = json.loads(message)
+                    if not room.apply_remote(data["v"], data["changes"]):
+                        self._resync_later(room)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Broker subscription lost: %s", e)
+                await asyncio.sleep(1)
+                # Anything published while we were away is only in the broker's state
+                for room in list(self.rooms.values()):
+                    self._resync_later(room)
+
+    def _resync_later(self, room: ScoreRoom):
+        # The event loop only keeps weak references to tasks; hold on until it finishes
+        task = asyncio.create_task(room.resync())
+        self._resyncs.add(task)
+        task.add_done_callback(self._resyncs.discard)
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._sweep_loop(max(self.idle_ttl / 4, 1))),
+                asyncio.create_task(self._relay()),
+            ]
+
+    async def stop(self):
+        tasks = self._tasks + list(self._resyncs)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+
+
+score_rooms = ScoreRooms(idle_ttl=settings.SCORE_ROOM_IDLE_TTL, max_rooms=settings.SCORE_MAX_ROOMS)
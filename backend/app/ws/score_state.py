@@ -0,0 +1,75 @@
+# ws/score_state.py
+
+from collections import deque
+from ws.codec import Message
+
+
+class ScoreState:
+    """
+    Scoreboard state with a version number that goes up by one per change.
+
+    Changes are pushed as compact deltas ({"type": "delta", "v": N, "changes": {...}})
+    and the last `backlog_size` of them are kept, so a client that reconnects with the
+    last version it saw only gets what it missed. Clients too far behind get a snapshot.
+
+    `epoch` names the version sequence (it comes from the broker), so a client holding
+    a version from another sequence, e.g. from before a restart, gets a snapshot.
+    """
+
+    __slots__ = ("state", "version", "epoch", "backlog", "_snapshot")
+
+    def __init__(self, initial: dict, backlog_size: int, epoch: str):
+        self.state = dict(initial)
+        self.version = 0
+        self.epoch = epoch
+        self.backlog = deque(maxlen=backlog_size)  # (version, changes)
+        self._snapshot = None  # (version, snapshot Message)
+
+    def reset(self, state: dict, version: int):
+        """Replace the whole state (initial load or resync); older deltas no longer apply."""
+        self.state.clear()
+        self.state.update(state)
+        self.version = version
+        self.backlog.clear()
+        self._snapshot = None
+
+    def apply(self, changes: dict, version: int = None):
+        """
+        Apply new field values and return the delta message. Without `version`
+        unchanged fields are skipped (None if nothing changed) and the version is
+        bumped by one; with it, the change is recorded under that version as-is.
+        """
+        if version is None:
+            changes = {k: v for k, v in changes.items() if self.state.get(k) != v}
+            if not changes:
+                return None
+            version = self.version + 1
+        self.state.update(changes)
+        self.version = version
+        self.backlog.append((version, changes))
+        return Message({"type": "delta", "e": self.epoch, "v": version, "changes": changes})
+
+    def snapshot(self):
+        """Full state message, cached per version (so each format is encoded once per version)."""
+        if self._snapshot is None or self._snapshot[0] != self.version:
+            message = Message({"type": "snapshot", "e": self.epoch, "v": self.version, "state": dict(self.state)})
+            self._snapshot = (self.version, message)
+        return self._snapshot[1]
+
+    def catch_up(self, since, epoch=None):
+        """
+        Message(s) to bring a client at version `since` up to date: nothing if it is
+        current, one merged delta if the backlog still covers the gap, else a snapshot.
+        """
+        if since is None or epoch != self.epoch or since > self.version:
+            return [self.snapshot()]
+        if since == self.version:
+            return []
+        if not self.backlog or self.backlog[0][0] > since + 1:
+            return [self.snapshot()]
+
+        merged = {}
+        for version, changes in self.backlog:
+            if version > since:
+                merged.update(changes)
+        return [Message({"type": "delta", "e": self.epoch, "v": self.version, "from": since, "changes": merged})]
@@ -1,67 +1,197 @@
 # ws/scoreboard.py
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from typing import Annotated, Optional
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException, Path
 from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-from fastapi import Body
+from pydantic import BaseModel, Field
+from fastapi import Body, Query
+from config import settings
+from services.broadcast_cache import broadcast_cache
+from services.live_tracker import live_tracker
+from services.log import get_logger
+from services.metrics import ws_connections_total
+from ws import codec
+from ws.auth import authenticate, client_key
+from ws.flood import FloodGuard, FloodError
+from ws.score_log import score_logs
+from ws.score_persistence import score_writer
+from ws.score_rooms import score_rooms, DEFAULT_ROOM, DEFAULT_SCOREBOARD, RoomLimitError
 
 router = APIRouter()
+logger = get_logger("score")
 
-scoreboard = {
-    "home": 0, 
-    "away": 0,
-    "home_name": "Home",
-    "away_name": "Away"
-    }
-clients: list[WebSocket] = []
+SCORE_FIELDS = ("home", "away")
+
+# Broadcast IDs are short URL-safe strings; anything else is a typo or abuse
+RoomId = Annotated[str, Path(pattern=r"^[A-Za-z0-9_-]{1,64}$")]
+
+# Viewers have nothing to say on this socket; only keepalives are expected
+flood_guard = FloodGuard(
+    "score",
+    rate=settings.SCORE_WS_RATE,
+    burst=settings.SCORE_WS_BURST,
+    user_rate=settings.SCORE_WS_CLIENT_RATE,
+    user_burst=settings.SCORE_WS_CLIENT_BURST,
+    max_strikes=settings.WS_FLOOD_MAX_STRIKES,
+)
 
 class ScoreUpdate(BaseModel):
     team: str
-    points: int
+    points: int = Field(ge=-settings.SCORE_MAX_POINTS, le=settings.SCORE_MAX_POINTS)
 
-@router.post("/score/update")
-async def update_score(update: ScoreUpdate):
-    if update.team not in scoreboard:
+async def get_room(broadcast_id: str):
+    try:
+        return await score_rooms.get(broadcast_id)
+    except RoomLimitError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+async def find_room(broadcast_id: str):
+    """
+    Room for a viewer. Only scoreboards that exist, the live (or next) broadcast, or
+    IDs in the broadcast listing get one; anything else returns None instead of
+    taking one of SCORE_MAX_ROOMS.
+    """
+    room = await score_rooms.find(broadcast_id)
+    if room is None and await is_broadcast(broadcast_id):
+        room = await score_rooms.get(broadcast_id)
+    return room
+
+async def is_broadcast(broadcast_id: str) -> bool:
+    # The live tracker's last known state needs no upstream call, so the broadcast
+    # people are watching gets a room even while YouTube is down or out of quota
+    state = live_tracker.state
+    if broadcast_id in (state["id"], (state["next"] or {}).get("id")):
+        return True
+    # The listing (upcoming only) is cached and shared, so unknown IDs can't
+    # multiply upstream calls
+    try:
+        broadcasts = await broadcast_cache.get()
+    except Exception as e:
+        logger.warning("Broadcast listing unavailable: %s", e)
+        return False
+    return any(b["id"] == broadcast_id for b in broadcasts)
+
+async def apply_score_update(broadcast_id: str, update: ScoreUpdate):
+    if update.team not in SCORE_FIELDS:
         return JSONResponse(status_code=400, content={"error": "Invalid team"})
 
-    scoreboard[update.team] += update.points
-    print(f"[UPDATE] {update.team} +{update.points} → {scoreboard}")
+    room = await get_room(broadcast_id)
+    scoreboard = await room.update(incr={update.team: update.points})
+    # Saved in the background with other updates; never waits on the database
+    score_writer.mark(room)
+    logger.debug("Score update", extra={"room": broadcast_id, "team": update.team, "points": update.points,
+                                     "version": room.score.version})
 
-    for ws in clients:
-        try:
-            await ws.send_json(scoreboard)
-        except Exception as e:
-            print(f"[ERROR] Failed to notify client: {e}")
+    return scoreboard
 
+async def apply_team_names(broadcast_id: str, home_name: str, away_name: str):
+    # Notify all clients of new names
+    room = await get_room(broadcast_id)
+    scoreboard = await room.update(set={"home_name": home_name, "away_name": away_name})
+    score_writer.mark(room)
     return scoreboard
 
-@router.websocket("/ws/score")
-async def websocket_endpoint(websocket: WebSocket):
-    await websocket.accept()
-    print("[WS] Client connected.")
-    clients.append(websocket)
+async def serve_scoreboard(websocket: WebSocket, broadcast_id: str, since: Optional[int], epoch: Optional[str]):
+    """
+    Sends a snapshot, then deltas. A reconnecting client passes ?since=<last v>&epoch=<e>
+    and only gets what it missed. Clients may ask for a binary encoding through the
+    WebSocket subprotocol (see ws/codec.py); the default is JSON.
+    """
+    if not await authenticate(websocket):
+        return
+    fmt, subprotocol = codec.negotiate(websocket)
+    await websocket.accept(subprotocol=subprotocol)
+    try:
+        room = await find_room(broadcast_id)
+    except RoomLimitError:
+        await websocket.close(code=1013)
+        return
+    if room is None:
+        await websocket.close(code=4404, reason="Unknown scoreboard")
+        return
+    logger.info("Client connected", extra={"room": broadcast_id})
+    sub = room.clients.subscribe(websocket, format=fmt)
+    for message in room.score.catch_up(since, epoch):
+        room.clients.send(sub, message)
+    conn = flood_guard.connect(client_key(websocket))
+    ws_connections_total.labels("score").inc()
 
     try:
-        await websocket.send_json(scoreboard)
         while True:
-            await websocket.receive_text()
+            await codec.receive(websocket)
+            flood_guard.admit(conn)
     except WebSocketDisconnect:
-        print("[WS] Client disconnected.")
-        clients.remove(websocket)
+        logger.info("Client disconnected", extra={"room": broadcast_id})
+    except FloodError as e:
+        logger.warning("Disconnecting flooding client: %s", e, extra={"room": broadcast_id, "shed": flood_guard.shed})
+        await websocket.close(code=1008)
+    finally:
+        room.clients.unsubscribe(sub)
 
-@router.post("/score/team_names")
-async def update_team_names(
+@router.get("/score/{broadcast_id}")
+async def get_score(broadcast_id: RoomId):
+    room = await score_rooms.find(broadcast_id)
+    if room is None:
+        # Nothing scored yet; answer without taking a room
+        return dict(DEFAULT_SCOREBOARD)
+    return room.score.state
+
+def check_log(log):
+    if log is None or not log.count:
+        raise HTTPException(status_code=404, detail="No score history for this broadcast")
+
+@router.get("/score/{broadcast_id}/at")
+async def get_score_at(broadcast_id: RoomId, ts: Optional[float] = None, offset: Optional[float] = None):
+    """Scoreboard at unix time `ts`, or `offset` seconds after the first logged change."""
+    if (ts is None) == (offset is None):
+        raise HTTPException(status_code=400, detail="Pass exactly one of ts or offset")
+    async with score_logs.reader(broadcast_id) as log:
+        check_log(log)
+        if ts is None:
+            ts = log.first_ts() + offset
+        version, fields = log.state_at(ts)
+    return {"ts": ts, "v": version, "state": fields}
+
+@router.get("/score/{broadcast_id}/events")
+async def get_score_events(broadcast_id: RoomId, start: float = 0, end: float = float("inf"), limit: int = Query(1000, ge=1, le=10000)):
+    async with score_logs.reader(broadcast_id) as log:
+        check_log(log)
+        return log.events(start, end, limit)
+
+@router.post("/score/{broadcast_id}/update")
+async def update_room_score(broadcast_id: RoomId, update: ScoreUpdate):
+    return await apply_score_update(broadcast_id, update)
+
+@router.post("/score/{broadcast_id}/team_names")
+async def update_room_team_names(
+    broadcast_id: RoomId,
     home_name: str = Body(...),
     away_name: str = Body(...)
 ):
-    scoreboard["home_name"] = home_name
-    scoreboard["away_name"] = away_name
+    return await apply_team_names(broadcast_id, home_name, away_name)
 
-    # Notify all clients of new names
-    for ws in clients:
-        try:
-            await ws.send_json(scoreboard)
-        except Exception as e:
-            print(f"[ERROR] Failed to notify client: {e}")
+@router.websocket("/ws/score/{broadcast_id}")
+async def room_websocket_endpoint(
+    websocket: WebSocket,
+    broadcast_id: RoomId,
+    since: Optional[int] = None,
+    epoch: Optional[str] = None
+):
+    await serve_scoreboard(websocket, broadcast_id, since, epoch)
+
+# Single-game endpoints, kept for existing clients; they use the default room
+
+@router.post("/score/update")
+async def update_score(update: ScoreUpdate):
+    return await apply_score_update(DEFAULT_ROOM, update)
+
+@router.websocket("/ws/score")
+async def websocket_endpoint(websocket: WebSocket, since: Optional[int] = None, epoch: Optional[str] = None):
+    await serve_scoreboard(websocket, DEFAULT_ROOM, since, epoch)
 
-    return scoreboard
\ No newline at end of file
+@router.post("/score/team_names")
+async def update_team_names(
+    home_name: str = Body(...),
+    away_name: str = Body(...)
+):
+    return await apply_team_names(DEFAULT_ROOM, home_name, away_name)
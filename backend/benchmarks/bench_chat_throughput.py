@@ -0,0 +1,93 @@
+# bench_chat_throughput.py
+#
+# Chat throughput per room size, with in-memory fake sockets and the in-process
+# broker: the old "send every message to every client in the sender's loop" code
+# vs frame-coalesced delivery through ChatHub.
+#
+#   python backend/benchmarks/bench_chat_throughput.py [messages]
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from services.broker import broker
+from ws.chat_rooms import chat_hub
+
+SENDERS = 20
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.frames = 0
+        self.last_at = 0.0
+
+    async def send_text(self, message):
+        self.frames += 1
+        self.last_at = time.perf_counter()
+
+    async def send_json(self, data):
+        await self.send_text(json.dumps(data))
+
+    async def close(self, code=1000):
+        pass
+
+
+async def run_legacy(room_size, messages):
+    clients = [FakeWebSocket() for _ in range(room_size)]
+
+    async def sender(n):
+        for i in range(n):
+            data = {"username": "bench", "message": f"hello {i}"}
+            for client in clients:
+                await client.send_json(data)
+            await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(sender(messages // SENDERS) for _ in range(SENDERS)))
+    elapsed = time.perf_counter() - start
+    return {"msgs_per_s": round(messages / elapsed), "sends": sum(c.frames for c in clients)}
+
+
+async def run_framed(room_size, messages):
+    room = f"bench{room_size}"
+    clients = [FakeWebSocket() for _ in range(room_size)]
+    subs = [chat_hub.join(room, ws) for ws in clients]
+
+    async def sender(n):
+        for i in range(n):
+            await chat_hub.post(room, "bench", f"hello {i}")
+            await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(sender(messages // SENDERS) for _ in range(SENDERS)))
+    await asyncio.sleep(0.3)  # let the last frame go out
+    elapsed = max(c.last_at for c in clients) - start
+    dropped = chat_hub.rooms[room].clients.dropped
+    for sub in subs:
+        chat_hub.leave(room, sub)
+    return {"msgs_per_s": round(messages / elapsed), "sends": sum(c.frames for c in clients), "dropped": dropped}
+
+
+async def main():
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    await broker.start()
+    chat_hub.start()
+    await asyncio.sleep(0)
+    results = []
+    for room_size in (10, 100, 1000):
+        results.append({
+            "room_size": room_size,
+            "messages": messages,
+            "legacy": await run_legacy(room_size, messages),
+            "framed": await run_framed(room_size, messages),
+        })
+    await chat_hub.stop()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+# bench_login_storm.py
+#
+# Login storm: N guests verify their password at once. Compares bcrypt.checkpw
+# in the default threadpool (what the sync /login endpoint did) with the
+# PasswordHasher process pool. Also reports how late a 10 ms ticker on the event
+# loop ran during the storm, i.e. what every other request would have felt.
+#
+#   python backend/benchmarks/bench_login_storm.py [logins] [rounds]
+
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+import bcrypt
+from services.password_hasher import PasswordHasher
+
+PASSWORD = "correct horse battery staple"
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def ticker(lags, stop):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append(time.perf_counter() - start - 0.01)
+
+
+async def storm(logins, verify, cores):
+    lags, stop = [], asyncio.Event()
+    tick = asyncio.create_task(ticker(lags, stop))
+    latencies = []
+
+    async def one():
+        start = time.perf_counter()
+        assert await verify()
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await tick
+    return {
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "logins_per_s": round(logins / elapsed, 1),
+        "logins_per_s_per_core": round(logins / elapsed / cores, 1),
+        "loop_lag_p99_ms": round(percentile(lags, 0.99) * 1000, 1) if lags else None,
+    }
+
+
+async def main():
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+    hashed = bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt(rounds))
+    cores = os.cpu_count() or 1
+
+    # asyncio.to_thread uses the default executor, like Starlette's threadpool for sync endpoints
+    threadpool = await storm(logins, lambda: asyncio.to_thread(bcrypt.checkpw, PASSWORD.encode(), hashed), cores)
+
+    results = {"logins": logins, "rounds": rounds, "cores": cores, "threadpool": threadpool}
+    for workers in sorted({1, max(1, cores // 2), cores}):
+        hasher = PasswordHasher(workers=workers, max_pending=logins, rounds=rounds)
+        hasher.start()
+        await hasher.verify(PASSWORD, hashed.decode())  # wait for the pool to be up
+        results[f"process_pool_{workers}"] = await storm(
+            logins, lambda: hasher.verify(PASSWORD, hashed.decode()), min(workers, cores)
+        )
+        hasher.stop()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+# bench_scoreboard_fanout.py
+#
+# Score update fan-out latency with many connected viewers, using in-memory
+# fake sockets (no network). Compares the old "await each send in a loop" code
+# with the FanOut engine. 1% of the viewers are slow (each send takes 20 ms).
+#
+#   python backend/benchmarks/bench_scoreboard_fanout.py [updates]
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from ws.fanout import FanOut
+
+SLOW_EVERY = 100
+SLOW_SEND = 0.02
+
+
+class FakeWebSocket:
+    def __init__(self, slow, latencies):
+        self.slow = slow
+        self.latencies = latencies
+
+    async def _send(self, message):
+        if self.slow:
+            await asyncio.sleep(SLOW_SEND)
+        sent_at = json.loads(message)["sent_at"]
+        self.latencies.append(time.perf_counter() - sent_at)
+
+    async def send_text(self, message):
+        await self._send(message)
+
+    async def send_json(self, data):
+        await self._send(json.dumps(data))
+
+    async def close(self, code=1000):
+        pass
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda q: round(samples[min(int(len(samples) * q), len(samples) - 1)] * 1000, 2)
+    return {"p50_ms": pick(0.50), "p99_ms": pick(0.99), "p999_ms": pick(0.999), "max_ms": pick(1.0)}
+
+
+async def run_legacy(n, updates):
+    latencies = []
+    sockets = [FakeWebSocket(i % SLOW_EVERY == 0, latencies) for i in range(n)]
+    post_times = []
+    for _ in range(updates):
+        start = time.perf_counter()
+        for ws in sockets:
+            await ws.send_json({"home": 1, "away": 0, "sent_at": start})
+        post_times.append(time.perf_counter() - start)
+    return latencies, post_times
+
+
+async def run_fanout(n, updates):
+    latencies = []
+    fanout = FanOut("bench", queue_size=4, policy="latest", send_timeout=5, max_strikes=1000)
+    subs = [fanout.subscribe(FakeWebSocket(i % SLOW_EVERY == 0, latencies)) for i in range(n)]
+    post_times = []
+    for _ in range(updates):
+        start = time.perf_counter()
+        fanout.publish(json.dumps({"home": 1, "away": 0, "sent_at": time.perf_counter()}))
+        post_times.append(time.perf_counter() - start)
+        await asyncio.sleep(0.05)
+    await asyncio.sleep(SLOW_SEND * 4)
+    for sub in subs:
+        fanout.unsubscribe(sub)
+    return latencies, post_times, fanout.dropped
+
+
+async def main():
+    updates = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    results = []
+    for n in (1000, 5000, 10000):
+        legacy, legacy_post = await run_legacy(n, updates)
+        fan, fan_post, dropped = await run_fanout(n, updates)
+        results.append({
+            "connections": n,
+            "legacy": {**percentiles(legacy), "post_ms": percentiles(legacy_post)["p50_ms"]},
+            "fanout": {**percentiles(fan), "post_ms": percentiles(fan_post)["p50_ms"], "dropped": dropped},
+        })
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
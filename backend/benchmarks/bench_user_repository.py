@@ -0,0 +1,114 @@
+# bench_user_repository.py
+#
+# Login lookup and registration latency: the old pattern (select("*"), then a
+# separate existence check + insert for registration) against UserRepository
+# (projected columns, one insert-on-conflict). Runs offline against the SQLite
+# stand-in, with a simulated network round-trip added to every statement, or
+# against a real database if a postgres:// URL is given.
+#
+#   python backend/benchmarks/bench_user_repository.py [users] [rtt_ms] [postgres://...]
+
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+# Keep the module's default repository offline too
+os.environ.setdefault("USERS_DB_URL", "sqlite://:memory:")
+
+from services.user_repository import SqliteUserRepository, PostgresUserRepository
+
+# A bcrypt hash is ~60 bytes; the wide columns stand in for a real users row
+HASH = "$2b$12$" + "x" * 53
+PROFILE = "p" * 2000
+
+
+class LegacyQueries:
+    """The statements the old routes sent, against the same table."""
+
+    def __init__(self, repo, rtt):
+        self.repo = repo
+        self.rtt = rtt
+
+    async def _sql(self, sql, *args, one=True):
+        await asyncio.sleep(self.rtt)
+        if isinstance(self.repo, SqliteUserRepository):
+            sql = sql.replace("$1", "?").replace("$2", "?").replace("$3", "?")
+            return await self.repo._run(lambda: self.repo.db.execute(sql, args).fetchall())
+        return await self.repo.pool.fetch(sql, *args)
+
+    async def login(self, email):
+        rows = await self._sql("SELECT * FROM users WHERE email = $1", email)
+        return dict(rows[0]) if rows else None
+
+    async def register(self, email, name):
+        if await self._sql("SELECT * FROM users WHERE email = $1", email):
+            return None
+        rows = await self._sql("INSERT INTO users (email, password_hash, name) VALUES ($1, $2, $3) RETURNING id",
+                               email, HASH, name)
+        return rows[0][0]
+
+
+class DelayedRepository:
+    """Adds one simulated round-trip per repository call."""
+
+    def __init__(self, repo, rtt):
+        self.repo = repo
+        self.rtt = rtt
+
+    async def get_login(self, email):
+        await asyncio.sleep(self.rtt)
+        return await self.repo.get_login(email)
+
+    async def create(self, email, password_hash, name):
+        await asyncio.sleep(self.rtt)
+        return await self.repo.create(email, password_hash, name)
+
+
+async def timed(n, fn):
+    latencies = []
+    for i in range(n):
+        start = time.perf_counter()
+        await fn(i)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {"p50_ms": round(statistics.median(latencies) * 1000, 3),
+            "p99_ms": round(latencies[min(n - 1, int(n * 0.99))] * 1000, 3)}
+
+
+async def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    rtt = (float(sys.argv[2]) if len(sys.argv) > 2 else 1.0) / 1000
+    url = sys.argv[3] if len(sys.argv) > 3 else None
+
+    if url:
+        repo = PostgresUserRepository(url, min_size=1, max_size=4, statement_cache_size=100)
+        await repo.start()
+        rtt = 0  # real network
+    else:
+        repo = SqliteUserRepository(":memory:")
+        repo.db.execute("ALTER TABLE users ADD COLUMN profile TEXT")
+    legacy = LegacyQueries(repo, rtt)
+    new = DelayedRepository(repo, rtt)
+
+    results = {"users": users, "simulated_rtt_ms": rtt * 1000, "backend": "postgres" if url else "sqlite"}
+    results["register_legacy"] = await timed(users, lambda i: legacy.register(f"legacy{i}@bench", "Bench"))
+    results["register_repository"] = await timed(users, lambda i: new.create(f"repo{i}@bench", HASH, "Bench"))
+    if not url:
+        repo.db.execute("UPDATE users SET profile = ?", (PROFILE,))
+    results["login_legacy"] = await timed(users, lambda i: legacy.login(f"legacy{i}@bench"))
+    results["login_repository"] = await timed(users, lambda i: new.get_login(f"legacy{i}@bench"))
+    results["duplicate_register_legacy"] = await timed(100, lambda i: legacy.register(f"legacy{i}@bench", "Bench"))
+    results["duplicate_register_repository"] = await timed(100, lambda i: new.create(f"repo{i}@bench", HASH, "Bench"))
+
+    if url:
+        await repo.pool.execute("DELETE FROM users WHERE email LIKE '%@bench'")
+    await repo.close()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,132 @@
+# bench_wire_formats.py
+#
+# Bytes on the wire and server CPU per wire format when pushing score deltas and
+# chat frames to many viewers, using in-memory fake sockets.
+#   encode_cpu_s:  CPU spent encoding. "json_per_client" is the old send_json path
+#                  (one encode per viewer); the others go through codec.Message
+#                  (one encode per message per format).
+#   fanout_cpu_s:  CPU for the whole FanOut delivery (queues, writer tasks, encode).
+#   deflate_bytes: what one viewer would receive with permessage-deflate
+#                  (compression context kept across messages).
+# Formats whose package (msgpack, cbor2) is not installed are skipped.
+#
+#   python backend/benchmarks/bench_wire_formats.py [viewers]
+
+import asyncio
+import json
+import os
+import sys
+import time
+import zlib
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from ws import codec
+from ws.codec import Message
+from ws.fanout import FanOut
+
+DELTAS = 200
+CHAT_FRAMES = 50
+CHAT_FRAME_SIZE = 20
+
+
+class FakeWebSocket:
+    def __init__(self, expected, done, deflate=False):
+        self.bytes = 0
+        self.expected = expected
+        self.done = done
+        self.deflate = zlib.compressobj(wbits=-15) if deflate else None
+        self.deflate_bytes = 0
+
+    def _count(self, payload):
+        # All payloads here are ASCII, so len() of a str is its size in bytes
+        self.bytes += len(payload)
+        if self.deflate is not None:
+            raw = payload.encode() if isinstance(payload, str) else payload
+            self.deflate_bytes += len(self.deflate.compress(raw) + self.deflate.flush(zlib.Z_SYNC_FLUSH)) - 4
+        self.expected -= 1
+        if not self.expected:
+            self.done[0] -= 1
+            if not self.done[0]:
+                self.done[1].set()
+
+    async def send_text(self, message):
+        self._count(message)
+
+    async def send_bytes(self, message):
+        self._count(message)
+
+    async def close(self, code=1000):
+        pass
+
+
+def workload():
+    messages = []
+    for v in range(1, DELTAS + 1):
+        messages.append({"type": "delta", "e": "3f2a9c1b", "v": v, "changes": {"home": v // 3, "away": v // 4}})
+    for f in range(CHAT_FRAMES):
+        messages.append([
+            {"id": 1700000000000000 + f * 100 + i, "username": f"viewer{i}",
+             "message": f"what a play! #{f}-{i}", "ts": 1700000000.123 + f}
+            for i in range(CHAT_FRAME_SIZE)
+        ])
+    return messages
+
+
+def encode_cpu(viewers, fmt, messages):
+    cpu = time.process_time()
+    if fmt == "json_per_client":
+        for data in messages:
+            for _ in range(viewers):
+                json.dumps(data)
+    else:
+        for data in messages:
+            message = Message(data)
+            for _ in range(viewers):
+                message.encode(fmt)
+    return round(time.process_time() - cpu, 3)
+
+
+async def run(viewers, fmt, messages):
+    result = {"encode_cpu_s": encode_cpu(viewers, fmt, messages)}
+    if fmt == "json_per_client":
+        return result
+
+    done = [viewers, asyncio.Event()]
+    sockets = [FakeWebSocket(len(messages), done, deflate=(i == 0)) for i in range(viewers)]
+    fanout = FanOut("bench", queue_size=len(messages) + 1)
+    subs = [fanout.subscribe(ws, format=fmt) for ws in sockets]
+
+    cpu = time.process_time()
+    for data in messages:
+        fanout.publish(Message(data))
+    await done[1].wait()
+    cpu = time.process_time() - cpu
+
+    for sub in subs:
+        fanout.unsubscribe(sub)
+    await asyncio.gather(*(sub.task for sub in subs), return_exceptions=True)
+    return {
+        **result,
+        "fanout_cpu_s": round(cpu, 3),
+        "bytes_per_viewer": sockets[0].bytes,
+        "deflate_bytes_per_viewer": sockets[0].deflate_bytes,
+        "total_mb": round(sum(ws.bytes for ws in sockets) / 1e6, 2),
+    }
+
+
+async def main():
+    max_viewers = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    formats = ["json_per_client", codec.JSON] + [f for f in ("msgpack", "cbor") if f in codec._ENCODERS]
+    messages = workload()
+    results = []
+    for viewers in (100, 1000, max_viewers):
+        row = {"viewers": viewers, "messages": len(messages)}
+        for fmt in formats:
+            row[fmt] = await run(viewers, fmt, messages)
+        results.append(row)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
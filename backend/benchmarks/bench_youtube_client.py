@@ -0,0 +1,106 @@
+# bench_youtube_client.py
+#
+# Per-request client overhead: the old "read token.json + build() on every call"
+# path vs the shared credential provider behind the pooled httpx client. No
+# network calls are made: the old path only builds its request (as before), the
+# new one sends it to an httpx.MockTransport, so its numbers include a full
+# (local) round trip through the real request code: quota, breaker, auth headers.
+#
+#   python backend/benchmarks/bench_youtube_client.py [iterations]
+
+import asyncio
+import datetime
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from config import settings
+
+
+def write_dummy_token(path):
+    expiry = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+    with open(path, "w") as f:
+        json.dump({
+            "token": "bench-token",
+            "refresh_token": "bench-refresh",
+            "client_id": "bench",
+            "client_secret": "bench",
+            "token_uri": "https://oauth2.googleapis.com/token",
+            "scopes": ["https://www.googleapis.com/auth/youtube.force-ssl"],
+            "expiry": expiry.isoformat() + "Z",
+        }, f)
+
+
+def summarize(samples):
+    samples.sort()
+    return {
+        "mean_ms": round(statistics.mean(samples), 3),
+        "p50_ms": round(samples[len(samples) // 2], 3),
+        "p99_ms": round(samples[int(len(samples) * 0.99) - 1], 3),
+    }
+
+
+def timed(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
+
+
+async def timed_async(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    tmp = tempfile.mkdtemp()
+    settings.YT_TOKEN_PATH = os.path.join(tmp, "token.json")
+    write_dummy_token(settings.YT_TOKEN_PATH)
+
+    import httpx
+    from services.youtube_async import AsyncYouTubeClient
+    from services.youtube_client import provider
+    from services.youtube_utils import authenticate_youtube
+
+    def before():
+        youtube = authenticate_youtube()
+        youtube.liveBroadcasts().list(part="snippet", broadcastStatus="upcoming", maxResults=50)
+
+    client = AsyncYouTubeClient("https://youtube.test/youtube/v3")
+    client._client = httpx.AsyncClient(
+        base_url=client.base_url,
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, json={"items": []})),
+    )
+
+    async def after():
+        await client.list_broadcasts(part="snippet", broadcastStatus="upcoming", maxResults=50)
+
+    async def run_after():
+        try:
+            return await timed_async(after, iterations)
+        finally:
+            await client.aclose()
+
+    results = {
+        "iterations": iterations,
+        "authenticate_per_call": timed(before, iterations),
+        "shared_provider_httpx": asyncio.run(run_after()),
+    }
+    provider.close()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+# loadtest.py
+#
+# Offline load test of the real FastAPI app. The server runs in a child process
+# with YouTube answered by an in-process fake (httpx.MockTransport behind the real
+# client, so quota/retry/breaker code still runs) and the users table on SQLite
+# instead of Supabase. This process then opens thousands of WebSocket clients and
+# reports connect time, fan-out latency (p50/p99/p999), delivered messages per
+# second and server RSS per connection, for:
+#   - score: viewers on /ws/score/<room> while scores are POSTed at --score-rate/s
+#   - chat:  clients on /ws/chat/<room>, each sending --chat-rate messages/s
+#   - rest:  --rest-concurrency clients hammering GET /broadcasts and /live_url
+# Results are written as JSON (with the git commit) so runs can be compared.
+# With --youtube-url the server talks HTTP to youtube_standin.py instead, so
+# real network latency and injected faults are part of the run.
+#
+#   python backend/benchmarks/loadtest.py --viewers 2000 --chat-clients 500 --out run.json
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(HERE, "..", "app")
+
+# Server settings for the run: everything local, and the per-client flood limits
+# lifted (every load-test client comes from 127.0.0.1)
+SERVER_ENV = {
+    "BROKER_URL": "memory://",
+    "USERS_DB_URL": "sqlite://:memory:",
+    "SCORE_STORE_URL": "",
+    "SCORE_LOG_DIR": "",
+    "CHAT_RATE": "1000",
+    "CHAT_BURST": "1000",
+    "CHAT_CLIENT_RATE": "1000000",
+    "CHAT_CLIENT_BURST": "1000000",
+    "SCORE_WS_CLIENT_RATE": "1000000",
+    "SCORE_WS_CLIENT_BURST": "1000000",
+}
+
+
+def raise_fd_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def fake_youtube_broadcasts(count=120):
+    now = time.time()
+    items = []
+    for i in range(count):
+        items.append({
+            "id": f"bc{i:04d}",
+            "snippet": {
+                "title": f"Game {i}",
+                "description": "Load test broadcast",
+                "scheduledStartTime": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now + 3600 * i)),
+            },
+            "status": {"lifeCycleStatus": "live" if i == 0 else "ready", "privacyStatus": "public"},
+        })
+    return items
+
+
+def install_fake_youtube():
+    """Answer the YouTube client's HTTP calls locally (list is paginated like the real API)."""
+    import httpx
+    from services.youtube_async import youtube_api
+
+    broadcasts = fake_youtube_broadcasts()
+
+    def handler(request: httpx.Request):
+        params = request.url.params
+        if request.method == "GET" and request.url.path.endswith("/liveBroadcasts"):
+            status = params.get("broadcastStatus")
+            items = [b for b in broadcasts
+                     if status is None
+                     or (status == "active") == (b["status"]["lifeCycleStatus"] == "live")]
+            start = int(params.get("pageToken") or 0)
+            size = int(params.get("maxResults") or 5)
+            body = {"items": items[start:start + size]}
+            if start + size < len(items):
+                body["nextPageToken"] = str(start + size)
+            return httpx.Response(200, json=body)
+        if request.method == "DELETE":
+            return httpx.Response(204)
+        body = json.loads(request.content or b"{}")
+        body.setdefault("id", "bc-new")
+        return httpx.Response(200, json=body)
+
+    async def no_auth(force_refresh=False):
+        return {}
+
+    youtube_api._auth_headers = no_auth
+    youtube_api._client = httpx.AsyncClient(
+        base_url=youtube_api.base_url, transport=httpx.MockTransport(handler)
+    )
+
+
+def run_server(port: int, youtube_url: str = None):
+    raise_fd_limit()
+    os.environ.update(SERVER_ENV)
+    if youtube_url:
+        os.environ.update({"YOUTUBE_API_BASE_URL": youtube_url, "YT_AUTH_DISABLED": "1"})
+    sys.path.insert(0, APP_DIR)
+    sys.path.insert(0, os.path.join(APP_DIR, "..", ".."))
+    os.chdir(APP_DIR)
+    import uvicorn
+    import main
+    if not youtube_url:
+        install_fake_youtube()
+    uvicorn.run(main.app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def rss_kb(pid: int):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return None
+
+
+def summarize(values):
+    if not values:
+        return None
+    values = sorted(values)
+    pick = lambda p: values[min(len(values) - 1, int(len(values) * p))]
+    return {
+        "count": len(values),
+        "mean_ms": round(statistics.fmean(values) * 1000, 3),
+        "p50_ms": round(pick(0.50) * 1000, 3),
+        "p99_ms": round(pick(0.99) * 1000, 3),
+        "p999_ms": round(pick(0.999) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3),
+    }
+
+
+async def wait_ready(http, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            await http.get("/live_status")
+            return
+        except Exception:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+
+async def connect_many(uris, concurrency):
+    import websockets
+
+    sem = asyncio.Semaphore(concurrency)
+    times, sockets, failures = [], [], 0
+
+    async def one(uri):
+        nonlocal failures
+        async with sem:
+            start = time.perf_counter()
+            try:
+                ws = await websockets.connect(uri, ping_interval=None, max_size=None, open_timeout=30)
+            except Exception:
+                failures += 1
+                return
+            times.append(time.perf_counter() - start)
+            sockets.append(ws)
+
+    await asyncio.gather(*(one(uri) for uri in uris))
+    return sockets, times, failures
+
+
+async def close_all(sockets):
+    await asyncio.gather(*(ws.close() for ws in sockets), return_exceptions=True)
+
+
+async def score_phase(args, http, ws_base, pid):
+    room = "loadtest"
+    # Viewers can only join a scoreboard that exists; the first write creates it
+    await http.post(f"/score/{room}/team_names", json={"home_name": "Home", "away_name": "Away"})
+    rss_before = rss_kb(pid)
+    sockets, connect_times, failures = await connect_many(
+        [f"{ws_base}/ws/score/{room}"] * args.viewers, args.connect_concurrency
+    )
+    rss_after = rss_kb(pid)
+
+    base_version = {}
+    received = []  # (version, perf_counter)
+
+    async def viewer(ws):
+        async for raw in ws:
+            msg = json.loads(raw)
+            if msg["type"] == "snapshot":
+                base_version.setdefault("v", msg["v"])
+            elif msg["type"] == "delta" and "from" not in msg:
+                received.append((msg["v"], time.perf_counter()))
+
+    tasks = [asyncio.create_task(viewer(ws)) for ws in sockets]
+    await asyncio.sleep(1)  # snapshots
+
+    sent = []
+    interval = 1 / args.score_rate
+    start = time.perf_counter()
+    for i in range(int(args.duration * args.score_rate)):
+        await asyncio.sleep(max(0, start + i * interval - time.perf_counter()))
+        sent.append(time.perf_counter())
+        await http.post(f"/score/{room}/update", json={"team": "home", "points": 1})
+    await asyncio.sleep(2)  # let the last deltas arrive
+    elapsed = time.perf_counter() - start
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await close_all(sockets)
+
+    base = base_version.get("v", 0)
+    latencies = [at - sent[v - base - 1] for v, at in received if 0 <= v - base - 1 < len(sent)]
+    expected = len(sent) * len(sockets)
+    return {
+        "viewers": len(sockets),
+        "connect_failures": failures,
+        "connect": summarize(connect_times),
+        "updates_sent": len(sent),
+        "deliveries": len(latencies),
+        "delivery_ratio": round(len(latencies) / expected, 4) if expected else None,
+        "messages_per_s": round(len(latencies) / elapsed, 1),
+        "fanout_latency": summarize(latencies),
+        "rss_kb_per_connection": round((rss_after - rss_before) / max(1, len(sockets)), 2),
+    }
+
+
+async def chat_phase(args, ws_base, pid):
+    room = "loadtest"
+    rss_before = rss_kb(pid)
+    sockets, connect_times, failures = await connect_many(
+        [f"{ws_base}/ws/chat/{room}"] * args.chat_clients, args.connect_concurrency
+    )
+    rss_after = rss_kb(pid)
+
+    latencies = []
+    sent = 0
+    stop = asyncio.Event()
+
+    async def reader(ws):
+        async for raw in ws:
+            now = time.perf_counter()
+            for message in json.loads(raw):
+                latencies.append(now - float(message["message"]))
+
+    async def writer(ws, offset):
+        nonlocal sent
+        interval = 1 / args.chat_rate
+        await asyncio.sleep(offset * interval)
+        while not stop.is_set():
+            await ws.send(json.dumps({"username": "load", "message": repr(time.perf_counter())}))
+            sent += 1
+            await asyncio.sleep(interval)
+
+    readers = [asyncio.create_task(reader(ws)) for ws in sockets]
+    start = time.perf_counter()
+    writers = [asyncio.create_task(writer(ws, i / len(sockets))) for i, ws in enumerate(sockets)]
+    await asyncio.sleep(args.duration)
+    stop.set()
+    await asyncio.gather(*writers, return_exceptions=True)
+    await asyncio.sleep(2)
+    elapsed = time.perf_counter() - start
+
+    for task in readers:
+        task.cancel()
+    await asyncio.gather(*readers, return_exceptions=True)
+    await close_all(sockets)
+
+    return {
+        "clients": len(sockets),
+        "connect_failures": failures,
+        "connect": summarize(connect_times),
+        "messages_sent": sent,
+        "deliveries": len(latencies),
+        "delivery_ratio": round(len(latencies) / (sent * len(sockets)), 4) if sent and sockets else None,
+        "messages_per_s": round(len(latencies) / elapsed, 1),
+        "fanout_latency": summarize(latencies),
+        "rss_kb_per_connection": round((rss_after - rss_before) / max(1, len(sockets)), 2),
+    }
+
+
+async def rest_phase(args, http):
+    results = {}
+    for path in ("/broadcasts", "/live_url"):
+        latencies, errors = [], 0
+        deadline = time.perf_counter() + args.duration
+
+        async def client():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                response = await http.get(path)
+                if response.status_code >= 400:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(args.rest_concurrency)))
+        elapsed = time.perf_counter() - start
+        results[path] = {
+            "requests": len(latencies),
+            "errors": errors,
+            "requests_per_s": round(len(latencies) / elapsed, 1),
+            "latency": summarize(latencies),
+        }
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=HERE, text=True).strip()
+    except Exception:
+        return None
+
+
+async def run(args, pid):
+    import httpx
+
+    http_base = f"http://127.0.0.1:{args.port}"
+    ws_base = f"ws://127.0.0.1:{args.port}"
+    limits = httpx.Limits(max_connections=args.rest_concurrency + 10)
+    async with httpx.AsyncClient(base_url=http_base, limits=limits, timeout=60) as http:
+        await wait_ready(http)
+        results = {"server_rss_kb_idle": rss_kb(pid)}
+        if "score" in args.phases:
+            results["score"] = await score_phase(args, http, ws_base, pid)
+        if "chat" in args.phases:
+            results["chat"] = await chat_phase(args, ws_base, pid)
+        if "rest" in args.phases:
+            results["rest"] = await rest_phase(args, http)
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--viewers", type=int, default=2000)
+    parser.add_argument("--score-rate", type=float, default=5, help="score updates per second")
+    parser.add_argument("--chat-clients", type=int, default=500)
+    parser.add_argument("--chat-rate", type=float, default=0.5, help="messages per second per chat client")
+    parser.add_argument("--rest-concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10, help="seconds per phase")
+    parser.add_argument("--connect-concurrency", type=int, default=200)
+    parser.add_argument("--phases", default="score,chat,rest")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--out", default=None, help="JSON file to write (default: stdout only)")
+    parser.add_argument("--youtube-url", default=None,
+                        help="YouTube API base URL of a running youtube_standin.py (default: in-process fake)")
+    args = parser.parse_args()
+    args.phases = set(args.phases.split(","))
+
+    raise_fd_limit()
+    # Not a daemon: the server starts its own bcrypt worker processes, which daemonic
+    # processes may not have. So it is always stopped here, SIGKILL if SIGTERM is ignored.
+    server = multiprocessing.get_context("spawn").Process(target=run_server, args=(args.port, args.youtube_url))
+    server.start()
+    try:
+        results = asyncio.run(run(args, server.pid))
+    finally:
+        server.terminate()
+        server.join(10)
+        if server.is_alive():
+            server.kill()
+            server.join()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": {k: (sorted(v) if isinstance(v, set) else v) for k, v in vars(args).items()},
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
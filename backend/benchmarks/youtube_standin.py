@@ -0,0 +1,286 @@
+# youtube_standin.py
+#
+# Local stand-in for the YouTube Data API liveBroadcasts endpoints the backend
+# uses (list with pagination, insert, update, delete, transition), so broadcast
+# endpoints can be benchmarked and load-tested offline without burning quota.
+#
+#   python backend/benchmarks/youtube_standin.py --port 8900 --seed 120 --latency-ms 80 --fail-rate 0.05
+#
+# then run the backend with
+#
+#   YOUTUBE_API_BASE_URL=http://127.0.0.1:8900/youtube/v3 YT_AUTH_DISABLED=1
+#
+# Modes:
+#   (default)        simulated in-memory broadcasts
+#   --record FILE    proxy to --upstream (the real API; the backend's Authorization
+#                    header is passed through) and append every exchange to FILE
+#   --replay FILE    answer from a recording: each (method, path, query) key replays
+#                    its recorded responses in order, repeating the last one
+#
+# Latency and faults apply in every mode and can be changed while running:
+#   curl -X POST 127.0.0.1:8900/_standin/config -d '{"fail_rate": 0.2}'
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+import uvicorn
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+
+PREFIX = "/youtube/v3"
+MAX_RESULTS = 50
+
+# broadcastStatus filter -> lifeCycleStatus values it matches
+STATUS_FILTER = {
+    "active": {"live", "liveStarting"},
+    "upcoming": {"created", "ready", "testing", "testStarting"},
+    "completed": {"complete", "revoked"},
+}
+TRANSITIONS = {"testing": "testing", "live": "live", "complete": "complete"}
+
+
+def iso(dt):
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class Faults:
+    """Latency (mean +/- jitter) and injected 503s, shared by every mode."""
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, fail_rate=0.0, retry_after=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.fail_rate = fail_rate
+        self.retry_after = retry_after
+        self.requests = 0
+        self.injected = 0
+
+    async def apply(self):
+        """Sleep for the configured latency; returns a 503 response to inject, or None."""
+        self.requests += 1
+        delay = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if self.fail_rate and random.random() < self.fail_rate:
+            self.injected += 1
+            headers = {"Retry-After": str(self.retry_after)} if self.retry_after is not None else None
+            return JSONResponse(status_code=503, headers=headers, content={
+                "error": {"code": 503, "message": "The service is currently unavailable.",
+                          "errors": [{"reason": "backendError"}]}
+            })
+        return None
+
+
+def api_error(status, reason, message):
+    return JSONResponse(status_code=status, content={
+        "error": {"code": status, "message": message, "errors": [{"reason": reason}]}
+    })
+
+
+class Simulator:
+    """In-memory liveBroadcasts resource, close enough to the real shapes for the backend."""
+
+    def __init__(self, seed: int):
+        self.broadcasts = {}  # id -> resource, insertion ordered
+        self._ids = itertools.count(1)
+        now = datetime.now(timezone.utc)
+        for i in range(seed):
+            status = "live" if i == 0 else ("complete" if i % 10 == 9 else "ready")
+            self._add({"title": f"Game {i}", "description": "Seeded by the stand-in",
+                       "scheduledStartTime": iso(now + timedelta(hours=i))}, status)
+
+    def _add(self, snippet, status, privacy="public"):
+        broadcast_id = f"standin{next(self._ids):06d}"
+        resource = {
+            "kind": "youtube#liveBroadcast",
+            "id": broadcast_id,
+            "snippet": {"publishedAt": iso(datetime.now(timezone.utc)), **snippet},
+            "status": {"lifeCycleStatus": status, "privacyStatus": privacy},
+            "contentDetails": {"enableAutoStart": False, "enableAutoStop": True},
+        }
+        self.broadcasts[broadcast_id] = resource
+        return resource
+
+    def list(self, params):
+        items = list(self.broadcasts.values())
+        if "id" in params:
+            ids = set(params["id"].split(","))
+            items = [b for b in items if b["id"] in ids]
+        status = params.get("broadcastStatus", "all")
+        if status != "all":
+            if status not in STATUS_FILTER:
+                return api_error(400, "invalidValue", f"Invalid broadcastStatus: {status}")
+            items = [b for b in items if b["status"]["lifeCycleStatus"] in STATUS_FILTER[status]]
+        if params.get("orderBy") == "startTime":
+            items.sort(key=lambda b: b["snippet"].get("scheduledStartTime", ""))
+
+        size = min(int(params.get("maxResults", 5)), MAX_RESULTS)
+        start = int(params.get("pageToken") or 0)
+        body = {
+            "kind": "youtube#liveBroadcastListResponse",
+            "pageInfo": {"totalResults": len(items), "resultsPerPage": size},
+            "items": items[start:start + size],
+        }
+        if start + size < len(items):
+            body["nextPageToken"] = str(start + size)
+        if start:
+            body["prevPageToken"] = str(max(0, start - size))
+        return JSONResponse(body)
+
+    def insert(self, body):
+        snippet = body.get("snippet") or {}
+        if not snippet.get("title") or not snippet.get("scheduledStartTime"):
+            return api_error(400, "required", "snippet.title and snippet.scheduledStartTime are required")
+        privacy = (body.get("status") or {}).get("privacyStatus", "private")
+        return JSONResponse(self._add(snippet, "created", privacy))
+
+    def update(self, body):
+        resource = self.broadcasts.get(body.get("id"))
+        if resource is None:
+            return api_error(404, "liveBroadcastNotFound", "Broadcast not found")
+        resource["snippet"].update(body.get("snippet") or {})
+        if "status" in body:
+            resource["status"]["privacyStatus"] = body["status"].get("privacyStatus", resource["status"]["privacyStatus"])
+        return JSONResponse(resource)
+
+    def delete(self, params):
+        if self.broadcasts.pop(params.get("id"), None) is None:
+            return api_error(404, "liveBroadcastNotFound", "Broadcast not found")
+        return Response(status_code=204)
+
+    def transition(self, params):
+        resource = self.broadcasts.get(params.get("id"))
+        if resource is None:
+            return api_error(404, "liveBroadcastNotFound", "Broadcast not found")
+        target = TRANSITIONS.get(params.get("broadcastStatus"))
+        if target is None:
+            return api_error(400, "invalidTransition", "Invalid broadcastStatus")
+        resource["status"]["lifeCycleStatus"] = target
+        return JSONResponse(resource)
+
+
+def request_key(method, path, query):
+    return f"{method} {path}?{'&'.join(f'{k}={v}' for k, v in sorted(query.items()) if k != 'key')}"
+
+
+class Recorder:
+    """Proxies to the real API and appends each exchange to a JSON-lines file."""
+
+    def __init__(self, upstream: str, path: str):
+        import httpx
+        self.client = httpx.AsyncClient(base_url=upstream, timeout=30)
+        self.file = open(path, "a", encoding="utf-8")
+
+    async def forward(self, request: Request, path: str, body: bytes):
+        headers = {k: v for k, v in request.headers.items() if k.lower() in ("authorization", "content-type")}
+        response = await self.client.request(request.method, path, params=request.query_params,
+                                             content=body, headers=headers)
+        self.file.write(json.dumps({
+            "key": request_key(request.method, path, dict(request.query_params)),
+            "status": response.status_code,
+            "body": response.json() if response.content else None,
+        }) + "\n")
+        self.file.flush()
+        return Response(response.content, status_code=response.status_code,
+                        media_type=response.headers.get("content-type"))
+
+
+class Replayer:
+    def __init__(self, path: str):
+        self.responses = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                self.responses.setdefault(entry["key"], []).append(entry)
+        self.positions = {}
+
+    def answer(self, method, path, query):
+        key = request_key(method, path, query)
+        recorded = self.responses.get(key)
+        if not recorded:
+            return api_error(404, "notRecorded", f"No recorded response for {key}")
+        i = self.positions.get(key, 0)
+        self.positions[key] = i + 1
+        entry = recorded[min(i, len(recorded) - 1)]
+        if entry["body"] is None:
+            return Response(status_code=entry["status"])
+        return JSONResponse(status_code=entry["status"], content=entry["body"])
+
+
+def create_app(faults: Faults, simulator: Simulator = None, recorder: Recorder = None, replayer: Replayer = None):
+    app = FastAPI(title="YouTube Data API stand-in")
+    started = time.time()
+
+    @app.post("/_standin/config")
+    async def configure(request: Request):
+        for name, value in (await request.json()).items():
+            if hasattr(faults, name) and name not in ("requests", "injected"):
+                setattr(faults, name, value)
+        return vars(faults)
+
+    @app.get("/_standin/stats")
+    async def stats():
+        return {"uptime_s": round(time.time() - started, 1), **vars(faults),
+                "broadcasts": len(simulator.broadcasts) if simulator else None}
+
+    @app.api_route(PREFIX + "/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
+    async def api(path: str, request: Request):
+        path = "/" + path
+        injected = await faults.apply()
+        if injected is not None:
+            return injected
+        params = dict(request.query_params)
+        body = await request.body()
+
+        if recorder is not None:
+            return await recorder.forward(request, path, body)
+        if replayer is not None:
+            return replayer.answer(request.method, path, params)
+
+        route = (request.method, path)
+        if route == ("GET", "/liveBroadcasts"):
+            return simulator.list(params)
+        if route == ("POST", "/liveBroadcasts"):
+            return simulator.insert(json.loads(body or b"{}"))
+        if route == ("PUT", "/liveBroadcasts"):
+            return simulator.update(json.loads(body or b"{}"))
+        if route == ("DELETE", "/liveBroadcasts"):
+            return simulator.delete(params)
+        if route == ("POST", "/liveBroadcasts/transition"):
+            return simulator.transition(params)
+        return api_error(404, "notFound", f"{request.method} {path} is not implemented by the stand-in")
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local YouTube Data API stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--seed", type=int, default=60, help="broadcasts to start with (simulated mode)")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--fail-rate", type=float, default=0, help="fraction of requests answered with 503")
+    parser.add_argument("--retry-after", type=float, default=None, help="Retry-After seconds on injected 503s")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--record", metavar="FILE")
+    mode.add_argument("--replay", metavar="FILE")
+    parser.add_argument("--upstream", default="https://www.googleapis.com" + PREFIX)
+    args = parser.parse_args()
+
+    faults = Faults(args.latency_ms, args.jitter_ms, args.fail_rate, args.retry_after)
+    if args.record:
+        app = create_app(faults, recorder=Recorder(args.upstream, args.record))
+    elif args.replay:
+        app = create_app(faults, replayer=Replayer(args.replay))
+    else:
+        app = create_app(faults, simulator=Simulator(args.seed))
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
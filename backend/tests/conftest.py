@@ -0,0 +1,18 @@
+# conftest.py
+#
+# The app imports its modules as top-level packages (config, services, ws) from
+# backend/app, so put that directory on the path. Settings are read at import
+# time: keep everything in memory and off the working directory.
+
+import os
+import sys
+
+os.environ.setdefault("USERS_DB_URL", "sqlite://:memory:")
+os.environ.setdefault("SCORE_STORE_URL", "")
+os.environ.setdefault("SCORE_LOG_DIR", "")
+os.environ.setdefault("BROKER_URL", "memory://")
+# Cheap hashes, one worker: the tests check the flow, not bcrypt
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("BCRYPT_WORKERS", "1")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
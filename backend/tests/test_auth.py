@@ -0,0 +1,46 @@
+# test_auth.py
+#
+# Register / duplicate / login through the auth routes, on the sqlite stand-in
+# repository (USERS_DB_URL=sqlite://:memory: in conftest.py).
+
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from routers.auth import router
+from services.auth_utils import verify_token
+from services.password_hasher import password_hasher
+
+app = FastAPI()
+app.include_router(router)
+
+
+def test_register_duplicate_and_login():
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            user = {"email": "fan@example.com", "password": "hunter22", "name": "Fan"}
+            first = await client.post("/register", json=user)
+            assert first.status_code == 200
+            user_id = first.json()["id"]
+
+            again = await client.post("/register", json={**user, "password": "other"})
+            assert again.status_code == 400
+            assert again.json()["detail"] == "Email already registered"
+
+            wrong = await client.post("/login", json={"email": user["email"], "password": "nope"})
+            assert wrong.status_code == 401
+            unknown = await client.post("/login", json={"email": "nobody@example.com", "password": "x"})
+            assert unknown.status_code == 401
+
+            login = await client.post("/login", json={"email": user["email"], "password": user["password"]})
+            assert login.status_code == 200
+            claims = verify_token(login.json()["access_token"])
+            assert claims["id"] == user_id
+            assert claims["email"] == user["email"]
+
+    try:
+        asyncio.run(run())
+    finally:
+        password_hasher.stop()
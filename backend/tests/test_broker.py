@@ -0,0 +1,125 @@
+# test_broker.py
+#
+# The Lua scripts run against fakeredis (which needs lupa for EVALSHA); the same
+# checks run against InMemoryBroker so the two can't drift apart.
+
+import asyncio
+import json
+
+import pytest
+
+from services.broker import InMemoryBroker, RedisBroker
+from services.youtube_quota import Priority, QuotaExhaustedError, QuotaMeter
+from ws import score_rooms as score_rooms_module
+from ws.score_rooms import ScoreRooms
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+
+def redis_broker():
+    return RedisBroker(client=fakeredis.FakeAsyncRedis(decode_responses=True))
+
+
+@pytest.fixture(params=["memory", "redis"])
+def make_broker(request):
+    return InMemoryBroker if request.param == "memory" else redis_broker
+
+
+async def next_message(subscription):
+    return await asyncio.wait_for(subscription.__anext__(), timeout=2)
+
+
+async def until(condition):
+    for _ in range(200):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition never became true")
+
+
+def test_apply_update_is_versioned_and_published(make_broker):
+    async def run():
+        broker = make_broker()
+        await broker.start()
+        subscription = broker.subscribe("score:*")
+        listening = asyncio.ensure_future(next_message(subscription))
+        await asyncio.sleep(0.05)
+
+        assert await broker.apply_update("s", "score:g1", incr={"home": 2}) == (1, {"home": 2})
+        version, changes = await broker.apply_update("s", "score:g1", incr={"home": 3}, set={"home_name": "Lions"})
+        assert (version, changes) == (2, {"home": 5, "home_name": "Lions"})
+        assert await broker.get_state("s") == (2, {"home": "5", "home_name": "Lions"})
+
+        channel, message = await listening
+        assert channel == "score:g1"
+        assert json.loads(message) == {"v": 1, "changes": {"home": 2}}
+        await subscription.aclose()
+
+    asyncio.run(run())
+
+
+def test_seed_state_never_rolls_back(make_broker):
+    async def run():
+        broker = make_broker()
+        assert await broker.seed_state("s", 3, {"home": 1, "away": 2})
+        assert await broker.get_state("s") == (3, {"home": "1", "away": "2"})
+        # An older or equal saved copy loses to what the broker already has
+        assert not await broker.seed_state("s", 3, {"home": 9})
+        assert not await broker.seed_state("s", 2, {"home": 9})
+        await broker.apply_update("s", "score:g1", incr={"away": 1})
+        assert await broker.get_state("s") == (4, {"home": "1", "away": "3"})
+
+    asyncio.run(run())
+
+
+def test_next_id_is_one_sequence_per_key(make_broker):
+    async def run():
+        broker = make_broker()
+        assert [await broker.next_id("chat:a:next_id") for _ in range(3)] == [1, 2, 3]
+        assert await broker.next_id("chat:b:next_id") == 1
+
+    asyncio.run(run())
+
+
+def test_quota_is_shared_by_meters_on_the_same_broker(make_broker):
+    async def run():
+        broker = make_broker()
+        # Two workers' meters, one daily budget
+        first = QuotaMeter(daily_limit=100, admin_reserve=0, refresh_reserve=0, broker=broker)
+        second = QuotaMeter(daily_limit=100, admin_reserve=0, refresh_reserve=0, broker=broker)
+        await first.record("insert")
+        await second.record("list")
+        assert (second.used, second.calls) == (51, {"insert": 1, "list": 1})
+
+        await first.check("list", Priority.ADMIN)
+        assert first.used == 51
+        with pytest.raises(QuotaExhaustedError):
+            await first.check("insert", Priority.ADMIN)
+
+    asyncio.run(run())
+
+
+def test_relay_resyncs_a_room_that_missed_a_message(monkeypatch):
+    async def run():
+        broker = redis_broker()
+        await broker.start()
+        monkeypatch.setattr(score_rooms_module, "broker", broker)
+
+        rooms = ScoreRooms(idle_ttl=60, max_rooms=4)
+        room = await rooms.get("g1")
+        # Published before this worker subscribed: the room never sees version 1
+        await broker.apply_update("score:g1:state", "score:g1", incr={"home": 2})
+
+        rooms.start()
+        try:
+            await asyncio.sleep(0.05)
+            await broker.apply_update("score:g1:state", "score:g1", incr={"away": 1})
+            # Version 2 arrives on top of 0, so the room reloads the whole state
+            await until(lambda: room.score.version == 2)
+            assert room.score.state["home"] == 2
+            assert room.score.state["away"] == 1
+        finally:
+            await rooms.stop()
+
+    asyncio.run(run())
@@ -0,0 +1,114 @@
+# test_chat.py
+
+import asyncio
+import json
+
+import pytest
+
+from ws.chat_history import ChatHistory
+from ws.chat_rooms import ChatHub, RoomLimitError
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        pass
+
+
+async def until(condition):
+    for _ in range(200):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition never became true")
+
+
+def filled_history(capacity, count):
+    history = ChatHistory(capacity)
+    for i in range(1, count + 1):
+        history.append(i, f'{{"id": {i}}}')
+    return history
+
+
+def test_history_keeps_only_the_newest_messages():
+    history = filled_history(4, 10)
+    assert len(history) == 4
+    assert history.last(10) == ['{"id": 7}', '{"id": 8}', '{"id": 9}', '{"id": 10}']
+    assert history.last(2) == ['{"id": 9}', '{"id": 10}']
+
+
+def test_history_pages_back_with_a_cursor():
+    history = filled_history(8, 5)
+    page, cursor = history.before(None, 2)
+    assert page == ['{"id": 4}', '{"id": 5}']
+    assert cursor == 4
+    page, cursor = history.before(cursor, 2)
+    assert page == ['{"id": 2}', '{"id": 3}']
+    page, cursor = history.before(cursor, 2)
+    assert page == ['{"id": 1}']
+    assert cursor is None
+
+
+def test_history_pages_by_id_when_messages_arrive_out_of_order():
+    history = ChatHistory(8)
+    for i in (1, 3, 2, 5, 4):
+        history.append(i, f'{{"id": {i}}}')
+    page, cursor = history.before(None, 2)
+    assert page == ['{"id": 4}', '{"id": 5}']
+    page, cursor = history.before(cursor, 2)
+    assert page == ['{"id": 2}', '{"id": 3}']
+    page, cursor = history.before(cursor, 2)
+    assert page == ['{"id": 1}']
+    assert cursor is None
+
+
+def test_posts_are_framed_kept_and_replayed_to_new_subscribers():
+    async def run():
+        hub = ChatHub(max_rooms=4)
+        hub.start()
+        try:
+            ws = FakeWebSocket()
+            sub = hub.join("r1", ws)
+            await asyncio.sleep(0.01)
+            await hub.post("r1", "ann", "hello")
+            await hub.post("r1", "bob", "hi")
+            await until(lambda: ws.sent)
+            assert [m["message"] for m in ws.sent[0]] == ["hello", "hi"]
+            first, second = (m["id"] for m in ws.sent[0])
+            assert second == first + 1
+
+            messages, cursor = hub.history("r1")
+            assert [json.loads(m)["username"] for m in messages] == ["ann", "bob"]
+            assert cursor is None
+
+            late = FakeWebSocket()
+            hub.join("r1", late)
+            await until(lambda: late.sent)
+            assert [m["message"] for m in late.sent[0]] == ["hello", "hi"]
+            hub.leave("r1", sub)
+        finally:
+            await hub.stop()
+
+    asyncio.run(run())
+
+
+def test_rooms_are_bounded_and_empty_ones_removed():
+    async def run():
+        hub = ChatHub(max_rooms=2)
+        a = hub.join("a", FakeWebSocket())
+        hub.join("b", FakeWebSocket())
+        with pytest.raises(RoomLimitError):
+            hub.join("c", FakeWebSocket())
+
+        # Nothing was said in "a", so it goes with its last subscriber
+        hub.leave("a", a)
+        assert "a" not in hub.rooms
+        hub.join("c", FakeWebSocket())
+        assert set(hub.rooms) == {"b", "c"}
+
+    asyncio.run(run())
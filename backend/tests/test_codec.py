@@ -0,0 +1,51 @@
+# test_codec.py
+
+from types import SimpleNamespace
+
+import pytest
+
+from ws import codec
+from ws.codec import JSON, Message, decode, negotiate
+
+
+def offering(*subprotocols):
+    return SimpleNamespace(scope={"subprotocols": list(subprotocols)})
+
+
+def test_negotiate_picks_the_first_format_offered():
+    assert negotiate(offering("bearer.abc", "livestream.cbor", "livestream.msgpack")) == ("cbor", "livestream.cbor")
+    assert negotiate(offering("livestream.json", "livestream.msgpack")) == (JSON, "livestream.json")
+
+
+def test_negotiate_falls_back_to_json(monkeypatch):
+    # No offers, or only ones we don't speak: JSON, and no subprotocol echoed back
+    assert negotiate(offering()) == (JSON, None)
+    assert negotiate(offering("bearer.abc", "v12.stomp")) == (JSON, None)
+
+    # A format whose package isn't installed is skipped
+    monkeypatch.delitem(codec._ENCODERS, "msgpack", raising=False)
+    assert negotiate(offering("livestream.msgpack", "livestream.json")) == (JSON, "livestream.json")
+    assert negotiate(offering("livestream.msgpack")) == (JSON, None)
+
+
+@pytest.mark.parametrize("fmt, module", [("msgpack", "msgpack"), ("cbor", "cbor2")])
+def test_binary_formats_round_trip(fmt, module):
+    pytest.importorskip(module)
+    data = {"v": 3, "changes": {"home": 2, "home_name": "Lions"}}
+
+    encoded = Message(data).encode(fmt)
+    assert isinstance(encoded, bytes)
+    assert decode(fmt, encoded) == data
+
+    # Built from JSON text (as chat frames are), it is decoded once for the binary client
+    assert decode(fmt, Message(text='[{"id": 1}]').encode(fmt)) == [{"id": 1}]
+
+
+def test_json_text_is_sent_as_is_and_text_frames_are_always_json():
+    text = '{"v": 1, "changes": {}}'
+    assert Message(text=text).encode(JSON) is text
+    assert Message({"v": 1}).encode() == '{"v": 1}'
+
+    # Binary-format clients may still send text frames
+    assert decode("msgpack", '{"message": "hi"}') == {"message": "hi"}
+    assert decode(JSON, b'{"message": "hi"}') == {"message": "hi"}
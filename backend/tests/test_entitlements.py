@@ -0,0 +1,151 @@
+# test_entitlements.py
+
+import asyncio
+import json
+
+import httpx
+from fastapi import FastAPI
+
+from config import settings
+from routers.auth import router
+from services import entitlements as entitlements_module
+from services import user_repository as user_repository_module
+from services.broker import InMemoryBroker
+from services.entitlements import CHANNEL, Entitlements, entitlements
+from services.user_repository import SupabaseUserRepository
+
+app = FastAPI()
+app.include_router(router)
+
+
+def test_payment_webhook_grants_and_revokes(monkeypatch):
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            change = {"user_id": 5, "broadcast_id": "game1", "granted": True}
+            assert (await client.post("/entitlements", json=change)).status_code == 404
+
+            monkeypatch.setattr(settings, "ENTITLEMENTS_TOKEN", "s3cret")
+            wrong = await client.post("/entitlements", json=change, headers={"Authorization": "Bearer nope"})
+            assert wrong.status_code == 401
+            odd = await client.post("/entitlements", json=change, headers={"Authorization": "Bearer s3cr\xe9t".encode("latin-1")})
+            assert odd.status_code == 401
+
+            auth = {"Authorization": "Bearer s3cret"}
+            assert (await client.post("/entitlements", json=change, headers=auth)).status_code == 200
+            assert entitlements.can_watch(5, "game1")
+            assert not entitlements.can_watch(5, "game2")
+
+            await client.post("/entitlements", json={**change, "granted": False}, headers=auth)
+            assert not entitlements.can_watch(5, "game1")
+
+    asyncio.run(run())
+
+
+def test_failed_initial_load_is_retried(monkeypatch):
+    calls = []
+
+    async def flaky_load():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ConnectionError("database unavailable")
+        return [(1, None), (2, "game1")]
+
+    monkeypatch.setattr(user_repository_module.user_repository, "load_entitlements", flaky_load)
+
+    async def run():
+        access = Entitlements(retry_delay=0.01)
+        await access.start()
+        try:
+            assert access.loaded_at is None
+            for _ in range(100):
+                if access.loaded_at is not None:
+                    break
+                await asyncio.sleep(0.01)
+            assert len(calls) == 3
+            assert access.can_watch(1, "anything")
+            assert access.can_watch(2, "game1")
+        finally:
+            await access.stop()
+
+    asyncio.run(run())
+
+
+class SlowToSubscribe(InMemoryBroker):
+    async def subscribe(self, pattern, ready=None):
+        await asyncio.sleep(0.05)  # e.g. the round trip to Redis
+        async for item in super().subscribe(pattern, ready):
+            yield item
+
+
+def test_grants_published_during_the_initial_load_are_kept(monkeypatch):
+    broker = SlowToSubscribe()
+    monkeypatch.setattr(entitlements_module, "broker", broker)
+
+    async def load_while_another_worker_grants():
+        await broker.publish(CHANNEL, json.dumps({"user": 7, "broadcast": "game1", "granted": True}))
+        return []
+
+    monkeypatch.setattr(user_repository_module.user_repository, "load_entitlements", load_while_another_worker_grants)
+
+    async def run():
+        access = Entitlements()
+        await access.start()
+        try:
+            for _ in range(100):
+                if access.can_watch(7, "game1"):
+                    break
+                await asyncio.sleep(0.01)
+            assert access.can_watch(7, "game1")
+        finally:
+            await access.stop()
+
+    asyncio.run(run())
+
+
+class FakeQuery:
+    """Just enough of the PostgREST query builder: a table, optional range, execute."""
+
+    def __init__(self, rows, max_rows):
+        self.rows = rows
+        self.max_rows = max_rows
+        self.span = None
+
+    def select(self, columns):
+        return self
+
+    def eq(self, column, value):
+        self.rows = [r for r in self.rows if r[column] == value]
+        return self
+
+    def order(self, column):
+        return self
+
+    def range(self, start, end):
+        self.span = (start, end)
+        return self
+
+    def execute(self):
+        start, end = self.span or (0, len(self.rows))
+        data = self.rows[start:end + 1][:self.max_rows]
+        return type("Result", (), {"data": data})()
+
+
+class FakeClient:
+    def __init__(self, tables, max_rows):
+        self.tables = tables
+        self.max_rows = max_rows
+
+    def table(self, name):
+        return FakeQuery(self.tables[name], self.max_rows)
+
+
+def test_supabase_entitlements_are_read_past_max_rows():
+    users = [{"id": i, "pay_status": i % 2 == 0} for i in range(2500)]
+    rows = [{"user_id": i, "broadcast_id": f"g{i % 7}"} for i in range(2300)]
+    # A server max-rows below our page size must not cut the load short either
+    for max_rows in (1000, 400):
+        repo = SupabaseUserRepository(client=FakeClient({"users": users, "entitlements": rows}, max_rows))
+        loaded = asyncio.run(repo.load_entitlements())
+        assert len([r for r in loaded if r[1] is None]) == 1250
+        assert len([r for r in loaded if r[1] is not None]) == 2300
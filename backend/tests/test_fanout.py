@@ -0,0 +1,89 @@
+# test_fanout.py
+
+import asyncio
+import json
+
+from ws import codec
+from ws.codec import JSON, Message
+from ws.fanout import FanOut
+
+
+class FakeWebSocket:
+    def __init__(self, block=False):
+        self.sent = []
+        self.closed_with = None
+        self.gate = asyncio.Event()
+        if not block:
+            self.gate.set()
+
+    async def send_text(self, text):
+        await self.gate.wait()
+        self.sent.append(text)
+
+    async def send_bytes(self, data):
+        await self.send_text(data)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+def test_publish_reaches_every_subscriber_encoded_once(monkeypatch):
+    encoded = []
+
+    def spy(data):
+        encoded.append(data)
+        return json.dumps(data)
+
+    monkeypatch.setitem(codec._ENCODERS, JSON, spy)
+
+    async def run():
+        fanout = FanOut("score:test", queue_size=4)
+        sockets = [FakeWebSocket() for _ in range(3)]
+        for ws in sockets:
+            fanout.subscribe(ws)
+        for version in (1, 2):
+            fanout.publish(Message({"v": version}))
+            await asyncio.sleep(0.01)
+            # One encode per publish, not one per subscriber
+            assert len(encoded) == version
+        return sockets
+
+    sockets = asyncio.run(run())
+    assert [ws.sent for ws in sockets] == [['{"v": 1}', '{"v": 2}']] * 3
+    assert encoded == [{"v": 1}, {"v": 2}]
+
+
+def test_latest_policy_skips_a_slow_client_to_the_resync_message():
+    async def run():
+        fanout = FanOut("score:test", queue_size=2, policy="latest", resync=lambda: "snapshot")
+        slow = FakeWebSocket(block=True)
+        fanout.subscribe(slow)
+        await asyncio.sleep(0)  # writer takes the first message and blocks on it
+        for version in range(1, 6):
+            fanout.publish(str(version))
+        slow.gate.set()
+        await asyncio.sleep(0.01)
+        return fanout, slow
+
+    fanout, slow = asyncio.run(run())
+    # Never more than a queue's worth behind, ending on the fresh state
+    assert len(slow.sent) <= 3
+    assert slow.sent[-1] == "snapshot"
+    assert fanout.dropped > 0
+
+
+def test_client_that_keeps_overflowing_is_disconnected():
+    async def run():
+        fanout = FanOut("chat:test", queue_size=1, policy="drop", max_strikes=3)
+        stuck = FakeWebSocket(block=True)
+        fanout.subscribe(stuck)
+        await asyncio.sleep(0)
+        for i in range(10):
+            fanout.publish(str(i))
+        await asyncio.sleep(0.01)
+        return fanout, stuck
+
+    fanout, stuck = asyncio.run(run())
+    assert len(fanout) == 0
+    assert fanout.disconnected == 1
+    assert stuck.closed_with == 1013
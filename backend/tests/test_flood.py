@@ -0,0 +1,86 @@
+# test_flood.py
+
+import pytest
+from fastapi import FastAPI, WebSocketDisconnect
+from fastapi.testclient import TestClient
+
+from ws import chat, flood
+from ws.flood import FloodError, FloodGuard, TokenBucket
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(flood.time, "monotonic", clock)
+    # Keep test guards out of the /metrics list
+    monkeypatch.setattr(flood, "guards", [])
+    return clock
+
+
+def test_bucket_allows_a_burst_then_refills_at_its_rate():
+    bucket = TokenBucket(rate=2, burst=3, now=0.0)
+    assert [bucket.take(0.0) for _ in range(4)] == [True, True, True, False]
+
+    assert not bucket.take(0.25)  # half a token back
+    assert bucket.take(0.5)
+    # Idle time never banks more than the burst
+    assert bucket.full_at(100.0)
+    assert [bucket.take(100.0) for _ in range(4)] == [True, True, True, False]
+
+
+def test_guard_sheds_over_the_limit_and_raises_after_max_strikes(clock):
+    guard = FloodGuard("test", rate=1, burst=2, user_rate=100, user_burst=100, max_strikes=3)
+    conn = guard.connect("ann")
+    assert guard.admit(conn) and guard.admit(conn)
+    assert not guard.admit(conn)
+    assert not guard.admit(conn)
+
+    # One admitted message resets the run of strikes
+    clock.now += 1
+    assert guard.admit(conn)
+    assert not guard.admit(conn)
+    assert not guard.admit(conn)
+    with pytest.raises(FloodError):
+        guard.admit(conn)
+    assert (guard.admitted, guard.shed, guard.disconnected) == (3, 5, 1)
+
+
+def test_connections_of_one_user_share_a_bucket(clock):
+    guard = FloodGuard("test", rate=100, burst=100, user_rate=1, user_burst=3, max_strikes=10)
+    first, second = guard.connect("ann"), guard.connect("ann")
+    assert [guard.admit(first), guard.admit(second), guard.admit(first)] == [True, True, True]
+    assert not guard.admit(second)
+    # Someone else still has their own budget
+    assert guard.admit(guard.connect("bob"))
+
+
+def test_flooding_chat_client_is_dropped_then_closed_with_1008(clock, monkeypatch):
+    posted = []
+
+    async def post(room, username, message):
+        posted.append(message)
+
+    monkeypatch.setattr(chat, "flood_guard",
+                        FloodGuard("chat", rate=1, burst=2, user_rate=100, user_burst=100, max_strikes=3))
+    monkeypatch.setattr(chat.chat_hub, "post", post)
+    app = FastAPI()
+    app.include_router(chat.router)
+
+    with TestClient(app) as client:
+        with client.websocket_connect("/ws/chat/flood") as ws:
+            for i in range(10):
+                ws.send_json({"username": "ann", "message": f"m{i}"})
+            with pytest.raises(WebSocketDisconnect) as info:
+                ws.receive_text()
+
+    assert info.value.code == 1008
+    # Only the burst got through; shed messages were never parsed or posted
+    assert posted == ["m0", "m1"]
@@ -0,0 +1,37 @@
+# test_log.py
+
+import logging
+
+from services.log import RedactFilter, TextFormatter
+
+
+def record(msg, *args):
+    return logging.LogRecord("uvicorn.access", logging.INFO, "", 0, msg, args, None)
+
+
+def test_tokens_in_logged_urls_are_redacted():
+    rec = record('%s - "WebSocket %s" [accepted]', "127.0.0.1:5000", "/ws/chat?token=abc.def.ghi&since=3")
+    assert RedactFilter().filter(rec)
+    assert rec.getMessage() == '127.0.0.1:5000 - "WebSocket /ws/chat?token=[redacted]&since=3" [accepted]'
+
+    rec = record("GET /score?room=1&token=secret HTTP/1.1")
+    RedactFilter().filter(rec)
+    assert rec.getMessage() == "GET /score?room=1&token=[redacted] HTTP/1.1"
+
+
+def test_records_without_tokens_are_untouched():
+    rec = record('%s - "GET %s HTTP/%s" %d', "127.0.0.1:5000", "/score/g1", "1.1", 200)
+    args = rec.args
+    RedactFilter().filter(rec)
+    assert rec.args is args
+
+
+def test_text_format_names_the_subsystem_and_skips_uvicorn_extras():
+    formatter = TextFormatter()
+    rec = logging.LogRecord("livestream.chat", logging.INFO, "", 0, "Client connected", None, None)
+    rec.room = "r1"
+    assert formatter.format(rec) == "[CHAT] Client connected (room=r1)"
+
+    rec = logging.LogRecord("uvicorn.error", logging.INFO, "", 0, "Started server process", None, None)
+    rec.color_message = "\x1b[36mStarted server process\x1b[0m"
+    assert formatter.format(rec) == "[UVICORN] Started server process"
@@ -0,0 +1,63 @@
+# test_metrics.py
+
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from config import settings
+from routers import metrics as metrics_router
+from ws.fanout import FanOut, retired_counts
+
+app = FastAPI()
+app.include_router(metrics_router.router)
+
+
+async def scrape(headers=None):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.get("/metrics", headers=headers)
+
+
+def test_metrics_need_a_token_unless_made_public(monkeypatch):
+    assert asyncio.run(scrape()).status_code == 403
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "t0ken")
+    assert asyncio.run(scrape()).status_code == 401
+    ok = asyncio.run(scrape({"Authorization": "Bearer t0ken"}))
+    assert ok.status_code == 200
+    assert "# TYPE fanout_dropped_messages_total counter" in ok.text
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "")
+    monkeypatch.setattr(settings, "METRICS_PUBLIC", True)
+    assert asyncio.run(scrape()).status_code == 200
+
+
+class Room:
+    def __init__(self, clients):
+        self.clients = clients
+
+
+def test_only_the_busiest_rooms_get_their_own_series(monkeypatch):
+    rooms = {f"r{i}": Room(list(range(i))) for i in range(1, 6)}
+    monkeypatch.setattr(metrics_router.score_rooms, "rooms", rooms)
+    monkeypatch.setattr(metrics_router.chat_hub, "rooms", {})
+    monkeypatch.setattr(settings, "METRICS_ROOM_LABELS", 2)
+    assert metrics_router._ws_connections() == [
+        (("score", "r5"), 5), (("score", "r4"), 4), (("score", "_other"), 6),
+    ]
+
+
+def test_fanout_counts_outlive_their_room(monkeypatch):
+    monkeypatch.setattr(metrics_router.chat_hub, "rooms", {})
+    monkeypatch.setitem(retired_counts, "score", [0, 0])
+    fanout = FanOut("score:gone", queue_size=1)
+    fanout.dropped, fanout.disconnected = 7, 2
+    monkeypatch.setattr(metrics_router.score_rooms, "rooms", {"gone": Room(fanout)})
+    assert dict(metrics_router._fanout_counts(0))[("score",)] == 7
+
+    # The room is swept: its counts move to the retired totals, nothing is lost
+    fanout.retire()
+    monkeypatch.setattr(metrics_router.score_rooms, "rooms", {})
+    assert dict(metrics_router._fanout_counts(0))[("score",)] == 7
+    assert dict(metrics_router._fanout_counts(1))[("score",)] == 2
@@ -0,0 +1,90 @@
+# test_score_log.py
+
+import asyncio
+import os
+
+import pytest
+from pydantic import ValidationError
+
+from ws.score_log import ScoreLog, ScoreLogs
+from ws.scoreboard import ScoreUpdate
+
+
+def test_state_at_and_events_by_time(tmp_path):
+    log = ScoreLog(str(tmp_path / "g.log"), chunk_records=4, checkpoint_every=2)
+    log.append(100.0, 1, {"home": 1, "home_name": "Lions"})
+    log.append(110.0, 2, {"away": 3})
+    log.append(120.0, 3, {"home": 2})
+    assert log.state_at(115.0) == (2, {"home": 1, "away": 3, "home_name": "Lions"})
+    assert [e["v"] for e in log.events(105.0, 125.0)] == [2, 3]
+    log.close()
+
+    # Reopening replays the file, the name table included
+    reopened = ScoreLog(str(tmp_path / "g.log"), chunk_records=4, checkpoint_every=2)
+    assert reopened.state_at(200.0) == (3, {"home": 2, "away": 3, "home_name": "Lions"})
+    reopened.close()
+
+
+def test_reads_never_create_logs(tmp_path):
+    async def run():
+        logs = ScoreLogs(str(tmp_path / "logs"), keep_detail=0)
+        async with logs.reader("nothing") as log:
+            assert log is None
+        assert not os.path.exists(tmp_path / "logs")
+        assert logs.logs == {}
+
+    asyncio.run(run())
+
+
+def test_swept_logs_are_compacted_closed_and_readable(tmp_path):
+    async def run():
+        logs = ScoreLogs(str(tmp_path), keep_detail=60)
+        await logs.open("g1")
+        logs.append("g1", 1.0, 1, {"home": 1})
+        logs.append("g1", 2.0, 2, {"home": 2})
+        logs.append("g1", 3.0, 3, {"away": 1})
+
+        logs.release("g1")
+        assert "g1" not in logs.logs
+        await logs.close()
+
+        # Everything was older than keep_detail: one record per field is left
+        async with logs.reader("g1") as log:
+            assert log.read_only
+            assert log.count == 2
+            assert log.state_at(10.0) == (3, {"home": 2, "away": 1})
+
+        # The room can come back and append to the same file
+        await logs.open("g1")
+        logs.append("g1", 4.0, 4, {"away": 2})
+        async with logs.reader("g1") as log:
+            assert log.state_at(10.0) == (4, {"home": 2, "away": 2})
+        await logs.close()
+
+    asyncio.run(run())
+
+
+def test_scores_are_logged_as_int64(tmp_path):
+    log = ScoreLog(str(tmp_path / "g.log"), chunk_records=4, checkpoint_every=2)
+    log.append(100.0, 1, {"home": 2 ** 40})
+    assert log.state_at(200.0) == (1, {"home": 2 ** 40, "away": 0})
+    log.close()
+
+
+def test_a_record_that_does_not_fit_never_fails_the_update(tmp_path):
+    async def run():
+        logs = ScoreLogs(str(tmp_path), keep_detail=0)
+        await logs.open("g1")
+        logs.append("g1", 1.0, 1, {"home": 2 ** 63})  # logged as a warning, not raised
+        logs.append("g1", 2.0, 2, {"home": 3})
+        async with logs.reader("g1") as log:
+            assert log.state_at(10.0) == (2, {"home": 3, "away": 0})
+        await logs.close()
+
+    asyncio.run(run())
+
+
+def test_score_updates_are_bounded():
+    assert ScoreUpdate(team="home", points=-3).points == -3
+    with pytest.raises(ValidationError):
+        ScoreUpdate(team="home", points=2 ** 31)
@@ -0,0 +1,106 @@
+# test_score_persistence.py
+
+import asyncio
+from types import SimpleNamespace
+
+from services.score_store import SqliteScoreStore
+from ws.score_persistence import ScoreWriteBehind
+
+
+class RecordingStore(SqliteScoreStore):
+    """In-memory SQLite that remembers each batch and can fail the next few writes."""
+
+    def __init__(self, fail=0):
+        super().__init__(":memory:")
+        self.batches = []
+        self.fail = fail
+        self.closed = False
+
+    async def upsert_many(self, rows):
+        if self.fail:
+            self.fail -= 1
+            raise ConnectionError("database unavailable")
+        self.batches.append([room_id for room_id, _, _ in rows])
+        await super().upsert_many(rows)
+
+    async def close(self):
+        self.closed = True
+
+
+def room(room_id, version, **state):
+    return SimpleNamespace(room_id=room_id, score=SimpleNamespace(version=version, state=state))
+
+
+def writer_for(store, batch_size=100):
+    return ScoreWriteBehind(store, interval=60, batch_size=batch_size, timeout=5)
+
+
+def test_flush_writes_each_dirty_room_once_in_batches():
+    async def run():
+        store = RecordingStore()
+        writer = writer_for(store, batch_size=2)
+        busy = room("g0", 1, home=1)
+        for version in range(1, 6):
+            busy.score.version = version
+            busy.score.state = {"home": version}
+            writer.mark(busy)
+        for i in range(1, 5):
+            writer.mark(room(f"g{i}", 1, home=i))
+
+        await writer.flush()
+        assert [len(batch) for batch in store.batches] == [2, 2, 1]
+        assert writer.rows_written == 5
+        assert (await store.load_all())["g0"] == (5, {"home": 5})
+
+        # Nothing changed since: no writes at all
+        writer.mark(busy)
+        await writer.flush()
+        assert len(store.batches) == 3
+
+    asyncio.run(run())
+
+
+def test_failed_write_keeps_rooms_dirty_for_the_next_flush():
+    async def run():
+        store = RecordingStore(fail=1)
+        writer = writer_for(store)
+        game = room("g1", 1, home=1)
+        writer.mark(game)
+
+        await writer.flush()
+        assert writer.failures == 1
+        assert "g1" in writer.dirty
+        assert await store.load_all() == {}
+
+        # The retry saves whatever the room holds by then
+        game.score.version, game.score.state = 2, {"home": 3}
+        await writer.flush()
+        assert writer.dirty == {}
+        assert await store.load_all() == {"g1": (2, {"home": 3})}
+
+    asyncio.run(run())
+
+
+def test_stop_flushes_what_is_left_before_closing_the_store():
+    async def run():
+        store = RecordingStore()
+        writer = writer_for(store)
+        await writer.start()
+        writer.mark(room("g1", 4, home=2, away=1))
+        await writer.stop()
+        assert store.closed
+        return store
+
+    store = asyncio.run(run())
+    assert store._load_all() == {"g1": (4, {"home": 2, "away": 1})}
+
+
+def test_sqlite_store_never_replaces_a_newer_version():
+    async def run():
+        store = SqliteScoreStore(":memory:")
+        await store.upsert_many([("g1", 3, {"home": 3})])
+        await store.upsert_many([("g1", 2, {"home": 9}), ("g2", 1, {"away": 1})])
+        assert await store.load_all() == {"g1": (3, {"home": 3}), "g2": (1, {"away": 1})}
+        await store.close()
+
+    asyncio.run(run())
@@ -0,0 +1,57 @@
+# test_score_rooms.py
+
+import asyncio
+
+import pytest
+
+from services.live_tracker import OFFLINE_STATE
+from ws import scoreboard
+from ws.score_rooms import RoomLimitError, ScoreRooms
+
+
+def test_find_does_not_take_a_room_for_unknown_ids():
+    async def run():
+        rooms = ScoreRooms(idle_ttl=60, max_rooms=2)
+        for i in range(10):
+            assert await rooms.find(f"junk{i}") is None
+        assert rooms.rooms == {}
+        # Writes still get a room, and the limit is still there for them
+        await rooms.get("game1")
+        await rooms.get("game2")
+        with pytest.raises(RoomLimitError):
+            await rooms.get("game3")
+
+    asyncio.run(run())
+
+
+def test_find_opens_a_scoreboard_scored_elsewhere():
+    async def run():
+        writer = ScoreRooms(idle_ttl=60, max_rooms=4)
+        room = await writer.get("scored")
+        await room.update(incr={"home": 2})
+
+        # Another worker has no room for it yet, but the broker has its state
+        reader = ScoreRooms(idle_ttl=60, max_rooms=4)
+        found = await reader.find("scored")
+        assert found is not None
+        assert found.score.version == 1
+        assert found.score.state["home"] == 2
+
+    asyncio.run(run())
+
+
+def test_viewers_of_the_live_broadcast_get_a_room_while_youtube_is_down(monkeypatch):
+    async def listing_down():
+        raise RuntimeError("quota exhausted")
+
+    monkeypatch.setattr(scoreboard, "score_rooms", ScoreRooms(idle_ttl=60, max_rooms=4))
+    monkeypatch.setattr(scoreboard.broadcast_cache, "get", listing_down)
+    monkeypatch.setattr(scoreboard.live_tracker, "state",
+                        dict(OFFLINE_STATE, status="live", id="onair", next=None))
+
+    async def run():
+        room = await scoreboard.find_room("onair")
+        assert room is not None and room.score.version == 0
+        assert await scoreboard.find_room("unknown") is None
+
+    asyncio.run(run())
@@ -0,0 +1,77 @@
+# test_score_state.py
+
+from ws.score_state import ScoreState
+
+BOARD = {"home": 0, "away": 0, "home_name": "Home", "away_name": "Away"}
+
+
+def make_state(backlog_size=8):
+    return ScoreState(BOARD, backlog_size=backlog_size, epoch="e1")
+
+
+def test_apply_bumps_version_and_skips_unchanged_fields():
+    score = make_state()
+    delta = score.apply({"home": 2, "away": 0})
+    assert delta.data == {"type": "delta", "e": "e1", "v": 1, "changes": {"home": 2}}
+    assert score.apply({"home": 2}) is None
+    assert score.version == 1
+
+
+def test_apply_with_version_records_it_as_is():
+    score = make_state()
+    score.apply({"home": 1}, version=7)
+    assert score.version == 7
+    assert score.state["home"] == 1
+
+
+def test_new_client_gets_a_snapshot():
+    score = make_state()
+    score.apply({"home": 3})
+    (message,) = score.catch_up(None)
+    assert message.data == {"type": "snapshot", "e": "e1", "v": 1, "state": {**BOARD, "home": 3}}
+
+
+def test_current_client_gets_nothing():
+    score = make_state()
+    score.apply({"home": 3})
+    assert score.catch_up(1, "e1") == []
+
+
+def test_client_behind_gets_one_merged_delta():
+    score = make_state()
+    score.apply({"home": 1})
+    score.apply({"away": 1})
+    score.apply({"home": 2})
+    (message,) = score.catch_up(1, "e1")
+    assert message.data == {"type": "delta", "e": "e1", "v": 3, "from": 1, "changes": {"away": 1, "home": 2}}
+
+
+def test_client_past_the_backlog_gets_a_snapshot():
+    score = make_state(backlog_size=2)
+    for points in range(1, 6):
+        score.apply({"home": points})
+    (message,) = score.catch_up(1, "e1")
+    assert message.data["type"] == "snapshot"
+    assert message.data["v"] == 5
+
+
+def test_other_epoch_or_future_version_gets_a_snapshot():
+    score = make_state()
+    score.apply({"home": 1})
+    assert score.catch_up(1, "old-epoch")[0].data["type"] == "snapshot"
+    assert score.catch_up(9, "e1")[0].data["type"] == "snapshot"
+
+
+def test_reset_drops_the_backlog():
+    score = make_state()
+    score.apply({"home": 1})
+    score.reset({**BOARD, "home": 10}, version=20)
+    assert score.catch_up(1, "e1")[0].data == {"type": "snapshot", "e": "e1", "v": 20, "state": {**BOARD, "home": 10}}
+
+
+def test_snapshot_is_cached_per_version():
+    score = make_state()
+    first = score.snapshot()
+    assert score.snapshot() is first
+    score.apply({"home": 1})
+    assert score.snapshot() is not first
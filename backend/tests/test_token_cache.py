@@ -0,0 +1,71 @@
+# test_token_cache.py
+
+from datetime import timedelta
+
+import pytest
+from jose import jwt
+
+from services import auth_utils
+from services.auth_utils import TokenCache, create_access_token, verify_token
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = TokenCache(max_size=2)
+    monkeypatch.setattr(auth_utils, "token_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def decodes(monkeypatch):
+    calls = []
+    decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(args[0])
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(auth_utils.jwt, "decode", counting_decode)
+    return calls
+
+
+def test_verified_tokens_are_served_from_the_cache(cache, decodes):
+    token = create_access_token({"id": 1, "paid": True})
+    first = verify_token(token)
+    assert verify_token(token) is first
+    assert first["id"] == 1
+    assert len(decodes) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entries_expire_with_the_token(cache, decodes, monkeypatch):
+    token = create_access_token({"id": 1}, expires_delta=timedelta(seconds=60))
+    claims = verify_token(token)
+
+    # Past the token's exp the cached claims are dropped and the token is checked again
+    monkeypatch.setattr(auth_utils.time, "time", lambda: claims["exp"] + 1)
+    verify_token(token)
+    assert len(decodes) == 2
+    assert cache.misses == 2
+
+
+def test_bad_tokens_are_never_cached(cache):
+    forged = jwt.encode({"id": 1}, "not-the-secret", algorithm=auth_utils.ALGORITHM)
+    expired = create_access_token({"id": 1}, expires_delta=timedelta(seconds=-1))
+    for token in ("garbage", forged, expired):
+        assert verify_token(token) is None
+        assert verify_token(token) is None
+    assert cache._entries == {}
+    assert cache.hits == 0
+
+
+def test_least_recently_used_entry_is_evicted(cache, decodes):
+    a, b, c = (create_access_token({"id": i}) for i in range(3))
+    verify_token(a)
+    verify_token(b)
+    verify_token(a)  # b is now the oldest
+    verify_token(c)
+    assert len(cache._entries) == 2
+    verify_token(a)
+    verify_token(b)
+    assert decodes == [a, b, c, b]
@@ -0,0 +1,131 @@
+# test_youtube_async.py
+
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from config import settings
+from services.youtube_async import AsyncYouTubeClient, CircuitBreaker, CircuitOpenError, YouTubeAPIError
+from services.youtube_quota import QuotaExhaustedError, Priority
+from services.youtube_utils import api_error
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(settings, "YT_MAX_RETRIES", 2)
+    monkeypatch.setattr(settings, "YT_BACKOFF_BASE", 0.001)
+    monkeypatch.setattr(settings, "YT_BACKOFF_CAP", 0.01)
+
+
+def client_for(handler, threshold=5, reset=30):
+    client = AsyncYouTubeClient("http://youtube.test", auth=False)
+    client.breaker = CircuitBreaker(threshold, reset)
+    client._client = httpx.AsyncClient(base_url=client.base_url, transport=httpx.MockTransport(handler))
+    return client
+
+
+def test_breaker_opens_after_threshold_and_fails_fast():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_breaker_lets_one_trial_through_when_half_open():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.state == "half_open"
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_failed_trial_reopens_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.05)
+    for _ in range(3):
+        breaker.record_failure()
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_trial_that_never_reports_back_expires():
+    # e.g. the trial request was cancelled or raised something unexpected
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    breaker.before_call()
+    time.sleep(0.06)
+    breaker.before_call()  # must not stay wedged in half-open
+
+
+def test_retries_retryable_statuses_then_succeeds():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) < 3:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"items": []})
+
+    client = client_for(handler)
+    assert asyncio.run(client.list_broadcasts(part="id")) == {"items": []}
+    assert len(calls) == 3
+
+
+def test_client_error_is_not_retried_and_keeps_its_status():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(404, text="not found")
+
+    client = client_for(handler)
+    with pytest.raises(YouTubeAPIError) as info:
+        asyncio.run(client.delete_broadcast("missing"))
+    assert info.value.status_code == 404
+    assert len(calls) == 1
+    assert client.breaker.failures == 0
+
+
+def test_long_retry_after_is_passed_back_instead_of_waited_out():
+    client = client_for(lambda request: httpx.Response(429, headers={"Retry-After": "120"}))
+    with pytest.raises(YouTubeAPIError) as info:
+        asyncio.run(client.list_broadcasts(part="id"))
+    assert info.value.status_code == 429
+    assert info.value.retry_after == 120
+
+    error = api_error(info.value, "Failed")
+    assert error.status_code == 429
+    assert error.headers["Retry-After"] == "120"
+
+
+def test_api_error_keeps_breaker_and_quota_statuses():
+    open_error = api_error(CircuitOpenError(12.2), "Failed")
+    assert open_error.status_code == 503
+    assert open_error.headers["Retry-After"] == "13"
+
+    quota_error = api_error(QuotaExhaustedError("insert", Priority.ADMIN, 0), "Failed")
+    assert quota_error.status_code == 429
+    assert int(quota_error.headers["Retry-After"]) > 0
+
+    # YouTube's auth failures are ours to fix, never the caller's 401/403
+    for status in (401, 403):
+        upstream_error = api_error(YouTubeAPIError(status, "insufficientPermissions"), "Failed")
+        assert upstream_error.status_code == 502
+        assert "insufficientPermissions" not in upstream_error.detail
+
+    passthrough = HTTPException(status_code=409, detail="conflict")
+    assert api_error(passthrough, "Failed") is passthrough
+    assert api_error(RuntimeError("boom"), "Failed").status_code == 500
@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import axios from 'axios';
 import '../styles.css';
 import { getUTCPartsFromLocal, getLocalInputsFromUTC } from '../utils/time_utils';
+import { connectScoreboard } from '../utils/scoreboard_socket';
 
 const API_BASE_URL = process.env.REACT_APP_API_URL;
 const WS_BASE_URL = process.env.REACT_APP_WS_URL;
@@ -25,27 +26,22 @@ const AdminPage = () => {
   const [currentBroadcastUrl, setCurrentBroadcastUrl] = useState('');
 
   useEffect(() => {
-    const ws = new WebSocket(`${WS_BASE_URL}/ws/score`);
-
-    ws.onmessage = (event) => {
-      const data = JSON.parse(event.data);
-      setHome(data.home);
-      setAway(data.away);
-      setHomeTeam(data.home_name);
-      setAwayTeam(data.away_name);
-    };
-
-    ws.onclose = () => {
-      console.log('WebSocket connection closed');
-    };
+    const close = connectScoreboard(
+      `${WS_BASE_URL}/ws/score`,
+      (data) => {
+        setHome(data.home);
+        setAway(data.away);
+        setHomeTeam(data.home_name);
+        setAwayTeam(data.away_name);
+      },
+      (status) => {
+        if (status === 'closed') console.log('WebSocket connection closed');
+      }
+    );
 
     fetchLiveUrl();
 
-    return () => {
-      if (ws.readyState === WebSocket.OPEN) {
-        ws.close();
-      }
-    };
+    return close;
   }, []);
 
   useEffect(() => {
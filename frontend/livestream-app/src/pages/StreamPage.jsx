@@ -1,9 +1,10 @@
 import React, { useEffect, useState, useRef, useContext } from 'react';
 import '../styles.css';
 import { AuthContext } from '../AuthContext';
+import { connectScoreboard, wsProtocols } from '../utils/scoreboard_socket';
 
 const StreamPage = () => {
-  const { user } = useContext(AuthContext);
+  const { user, token } = useContext(AuthContext);
   const [url, setUrl] = useState('');
   const [error, setError] = useState('');
   const [score, setScore] = useState({
@@ -38,28 +39,27 @@ const StreamPage = () => {
       });
   }, [API_URL]);
 
-  // Scoreboard WebSocket
+  // Scoreboard WebSocket. Sockets are authenticated once, when they connect,
+  // with the token offered as a subprotocol (see wsProtocols)
   useEffect(() => {
-    const scoreSocket = new WebSocket(`${process.env.REACT_APP_WS_URL}/ws/score`);
-    scoreSocket.onopen = () => setStatus('Connected to live scoreboard');
-    scoreSocket.onerror = () => setStatus('WebSocket error');
-    scoreSocket.onclose = () => setStatus('Disconnected');
-    scoreSocket.onmessage = (event) => {
-      const data = JSON.parse(event.data);
-      setScore(data);
+    const statusText = {
+      open: 'Connected to live scoreboard',
+      error: 'WebSocket error',
+      closed: 'Disconnected',
     };
-
-    return () => scoreSocket.close();
-  }, [WS_URL]);
+    return connectScoreboard(`${WS_URL}/ws/score`, setScore, (s) => setStatus(statusText[s]), wsProtocols(token));
+  }, [WS_URL, token]);
 
   // Chat WebSocket
   useEffect(() => {
-    const socket = new WebSocket(`${WS_URL}/ws/chat`);
+    const socket = new WebSocket(`${WS_URL}/ws/chat`, wsProtocols(token));
     chatSocketRef.current = socket;
 
     socket.onmessage = (event) => {
+      // The server batches messages into frames (JSON arrays)
       const data = JSON.parse(event.data);
-      setChatMessages((prev) => [...prev, data]);
+      const batch = Array.isArray(data) ? data : [data];
+      setChatMessages((prev) => [...prev, ...batch]);
     };
 
     socket.onerror = (err) => {
@@ -67,7 +67,7 @@ const StreamPage = () => {
     };
 
     return () => socket.close();
-  }, [WS_URL]);
+  }, [WS_URL, token]);
 
   const handleSendMessage = (e) => {
     e.preventDefault();
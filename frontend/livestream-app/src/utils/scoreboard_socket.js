@@ -0,0 +1,76 @@
+/**
+ * WebSocket subprotocols to open a socket with. The JWT goes in the list as
+ * "bearer.<jwt>" rather than in the URL, where access logs would keep it; the
+ * server always answers with "livestream.json", never the token entry.
+ *
+ * @param {string|null} token - the signed-in user's JWT, if any
+ * @returns {string[]}
+ */
+export function wsProtocols(token) {
+  return token ? ['livestream.json', `bearer.${token}`] : ['livestream.json'];
+}
+
+/**
+ * Connects to the scoreboard WebSocket and keeps a local copy of the score.
+ *
+ * The server sends a snapshot first and then versioned deltas. If the socket
+ * drops (or a version gap shows up) we reconnect with ?since=<last version>
+ * so the server only sends what we missed.
+ *
+ * @param {string} url - e.g. `${WS_URL}/ws/score`
+ * @param {Function} onScore - called with the full scoreboard object on every change
+ * @param {Function} [onStatus] - called with "open" | "closed" | "error"
+ * @param {string[]} [protocols] - see wsProtocols()
+ * @returns {Function} call it to close the socket and stop reconnecting
+ */
+export function connectScoreboard(url, onScore, onStatus = () => {}, protocols = wsProtocols(null)) {
+  let score = null;
+  let version = null;
+  let epoch = null;
+  let socket = null;
+  let stopped = false;
+  let retryTimer = null;
+
+  const open = () => {
+    const sep = url.includes('?') ? '&' : '?';
+    const resume = version !== null ? `${sep}since=${version}&epoch=${epoch}` : '';
+    socket = new WebSocket(`${url}${resume}`, protocols);
+
+    socket.onopen = () => onStatus('open');
+    socket.onerror = () => onStatus('error');
+    socket.onclose = () => {
+      onStatus('closed');
+      if (!stopped) {
+        retryTimer = setTimeout(open, 1000 + Math.random() * 2000);
+      }
+    };
+
+    socket.onmessage = (event) => {
+      const msg = JSON.parse(event.data);
+      if (msg.type === 'snapshot') {
+        score = msg.state;
+      } else if (msg.type === 'delta') {
+        const expected = msg.from !== undefined ? msg.from : msg.v - 1;
+        if (score === null || msg.e !== epoch || expected !== version) {
+          // Missed something; reconnecting gets us a catch-up or snapshot
+          socket.close();
+          return;
+        }
+        score = { ...score, ...msg.changes };
+      } else {
+        return;
+      }
+      version = msg.v;
+      epoch = msg.e;
+      onScore(score);
+    };
+  };
+
+  open();
+
+  return () => {
+    stopped = true;
+    clearTimeout(retryTimer);
+    socket.close();
+  };
+}